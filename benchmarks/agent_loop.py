@@ -0,0 +1,127 @@
+"""
+Measure the full agent/environment loop under seconds budgets, offline.
+
+An agent plays Freeway against a local `MockLLMServer` that streams a reply of
+`--reply_tokens` reasoning tokens then a boxed action (and completes answers
+cut off by the budget with "U"), at a chosen time to first token and token
+rate, failing `--error_rate` of the requests. Reports, per turn, how long the
+turn took against its budget (the agent's overrun is time the game would
+wait), the requests sent and the turns that fell back to the default action.
+
+With `--clock virtual` the server sends at once and the agent plays the turns
+on a `VirtualClock`: turn times are simulated, and the real time the whole
+loop took is reported next to them.
+
+Run:
+    python benchmarks/agent_loop.py --mode reactive --time_pressure 1 --turns 10
+    python benchmarks/agent_loop.py --mode agile --ttft 0.3 --tokens_per_second 200
+    python benchmarks/agent_loop.py --mode agile --time_pressure 8 --internal_budget 6 \
+        --tokens_per_second 20 --reply_tokens 400 --clock virtual
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import Any
+
+import realtimegym
+from realtimegym.agents.agile import AgileThinker
+from realtimegym.agents.base import BaseAgent
+from realtimegym.agents.clock import CLOCKS
+from realtimegym.agents.planning import PlanningAgent
+from realtimegym.agents.reactive import ReactiveAgent
+from realtimegym.mock_server import MockLLMServer
+from realtimegym.prompts import freeway
+
+
+def make_agent(
+    mode: str, directory: str, url: str, internal_budget: float
+) -> BaseAgent:
+    config = os.path.join(directory, "model.yaml")
+    with open(config, "w") as f:
+        f.write(
+            f"model: mock\nurl: {url}\napi_key: mock\n"
+            "retry:\n  base_delay: 0.05\n  max_delay: 0.2\n"
+        )
+    file = os.path.join(directory, f"{mode}.csv")
+    if mode == "reactive":
+        return ReactiveAgent(freeway, file, "seconds", config, internal_budget)  # type: ignore
+    if mode == "planning":
+        return PlanningAgent(freeway, file, "seconds", config, skip_action=True)
+    return AgileThinker(freeway, file, "seconds", config, config, internal_budget)  # type: ignore
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Agent loop against a mock model.")
+    parser.add_argument(
+        "--mode",
+        type=str,
+        default="reactive",
+        choices=["reactive", "planning", "agile"],
+    )
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--time_pressure", type=float, default=1.0)
+    parser.add_argument("--internal_budget", type=float, default=0.5)
+    parser.add_argument("--ttft", type=float, default=0.2)
+    parser.add_argument("--tokens_per_second", type=float, default=100.0)
+    parser.add_argument("--reply_tokens", type=int, default=60)
+    parser.add_argument("--error_rate", type=float, default=0.0)
+    parser.add_argument("--clock", type=str, default="real", choices=list(CLOCKS))
+    args = parser.parse_args()
+
+    thought = f"<think>{' step' * args.reply_tokens}</think>\\boxed{{U}}"
+
+    def reply(messages: list[dict[str, Any]]) -> str:
+        # Budget forcing continues the cut-off answer "... \boxed{" by a token.
+        return "U}" if messages[-1]["role"] == "assistant" else thought
+
+    server = MockLLMServer(
+        reply,
+        ttft=args.ttft,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        wait=args.clock == "real",
+    ).start()
+    env, _, _ = realtimegym.make("Freeway-v0", seed=0)
+    obs, _ = env.reset()
+    turn_seconds, fallbacks = [], 0
+    loop_start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as directory:
+        agent = make_agent(args.mode, directory, server.url, args.internal_budget)
+        agent.clock = CLOCKS[args.clock]()
+        for _ in range(args.turns):
+            start = agent.clock.time()
+            agent.observe(obs)
+            agent.think(timeout=args.time_pressure)
+            action = agent.act()
+            turn_seconds.append(agent.clock.time() - start)
+            fallbacks += agent.request_stats["fallback"]
+            obs, done, reward, reset_flag = env.step(action)
+            agent.log(reward, reset_flag)
+            if done:
+                obs, _ = env.reset()
+    server.stop()
+    loop_seconds = time.perf_counter() - loop_start
+
+    overrun = [max(0.0, t - args.time_pressure) for t in turn_seconds]
+    print(
+        f"{args.mode}: {args.turns} turns of {args.time_pressure:.2f}s, "
+        f"ttft {args.ttft:.2f}s, {args.tokens_per_second:.0f} tokens/s, "
+        f"{args.clock} clock"
+    )
+    print(
+        f"  turn {statistics.mean(turn_seconds):.3f}s mean, "
+        f"{max(turn_seconds):.3f}s max; overrun {statistics.mean(overrun) * 1000:.1f}ms "
+        f"mean, {max(overrun) * 1000:.1f}ms max"
+    )
+    print(f"  {len(server.requests)} requests, {fallbacks} fallback turns")
+    print(
+        f"  {sum(turn_seconds):.2f}s of turns played in {loop_seconds:.2f}s "
+        f"({sum(turn_seconds) / loop_seconds:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
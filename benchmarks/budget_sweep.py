@@ -0,0 +1,134 @@
+"""
+Measure the model requests of a `--time_unit token` budget sweep, with and
+without `agile_eval --chain_budgets`.
+
+Each seed's episode is played at every time pressure, against a local
+`MockLLMServer` whose planning replies are `--reply_tokens` reasoning tokens
+and a boxed plan. "per setting" plays every episode on its own; "chained"
+plays the settings of each episode one after another through one response
+cache, so that a later setting replays the requests an earlier one made from
+the same state. Reports the requests each way, split into planning
+generations and reactive (token-capped) calls, and checks that the rewards
+are the same.
+
+Run:
+    python benchmarks/budget_sweep.py --mode planning --time_pressures 256 1024 4096
+    python benchmarks/budget_sweep.py --mode agile --internal_budget 128 \
+        --tokenizer deepseek-ai/DeepSeek-R1
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+from collections import Counter
+from typing import Any
+
+from realtimegym import agile_eval
+from realtimegym.agents.cache import open_cache
+from realtimegym.mock_server import MockLLMServer
+
+
+def play(
+    name: str,
+    instances: list[tuple[str, int, argparse.Namespace]],
+    directory: str,
+) -> list[dict[str, Any]]:
+    if name == "per setting":
+        return [agile_eval.game_loop(*instance) for instance in instances]
+    for _, _, setting in instances:
+        setting.cache = os.path.join(directory, "responses.sqlite")
+    results = []
+    for chain in agile_eval.chain_episodes(instances):
+        results += agile_eval.play_chain(chain)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Requests of a budget sweep.")
+    parser.add_argument(
+        "--mode", type=str, default="planning", choices=["planning", "agile"]
+    )
+    parser.add_argument(
+        "--cognitive_load", type=str, default="E", choices=["E", "M", "H"]
+    )
+    parser.add_argument(
+        "--time_pressures", type=int, nargs="+", default=[256, 1024, 4096]
+    )
+    parser.add_argument("--internal_budget", type=int, default=128)
+    parser.add_argument("--seeds", type=int, default=4)
+    parser.add_argument("--reply_tokens", type=int, default=2000)
+    parser.add_argument(
+        "--tokenizer", type=str, default=None, help="Planning tokenizer, for agile"
+    )
+    args = parser.parse_args()
+    assert args.mode == "planning" or args.tokenizer, "--mode agile needs --tokenizer"
+
+    thought = f"<think>{' step' * args.reply_tokens}</think>\\boxed{{UUUSUU}}"
+
+    def reply(messages: list[dict[str, Any]]) -> str:
+        # Budget forcing continues the cut-off answer "... \boxed{" by a token.
+        return "U}" if messages[-1]["role"] == "assistant" else thought
+
+    with MockLLMServer(reply) as server, tempfile.TemporaryDirectory() as directory:
+        config = os.path.join(directory, "model.yaml")
+        with open(config, "w") as f:
+            f.write(f"model: mock\nurl: {server.url}\napi_key: mock\n")
+            if args.tokenizer:
+                f.write(f"tokenizer: {args.tokenizer}\n")
+        instances = []
+        for time_pressure in args.time_pressures:
+            setting = argparse.Namespace(
+                game="freeway",
+                cognitive_load=args.cognitive_load,
+                mode=args.mode,
+                time_unit="token",
+                time_pressure=time_pressure,
+                internal_budget=0 if args.mode == "planning" else args.internal_budget,
+                prompt_config="configs/example-prompts.yaml",
+                planning_model_config=config,
+                reactive_model_config=config,
+                save_trajectory_gifs=False,
+                checkpoint=None,
+                log_dir=directory,
+                cache=None,
+                cache_mode="record",
+                clock="real",
+            )
+            log_dir = os.path.join(directory, str(time_pressure))
+            os.makedirs(log_dir)
+            for seed in range(args.seeds):
+                instances.append(
+                    (os.path.join(log_dir, f"0_{seed}.csv"), seed, setting)
+                )
+
+        rewards = {}
+        for name in ("per setting", "chained"):
+            server.requests.clear()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):  # the games' progress
+                results = play(name, instances, directory)
+            seconds = time.perf_counter() - start
+            rewards[name] = sorted(
+                (r["log_dir"], r["seed"], r["reward"]) for r in results
+            )
+            kinds = Counter(
+                "reactive" if "max_tokens" in request else "planning"
+                for request in server.requests
+            )
+            print(
+                f"{name:<12} {len(server.requests):5d} requests: "
+                f"{kinds['planning']:5d} planning, {kinds['reactive']:5d} reactive "
+                f"({seconds:.1f}s)"
+            )
+        hits = open_cache(os.path.join(directory, "responses.sqlite")).hits
+        print(
+            f"{hits} requests answered from the cache; rewards equal: "
+            f"{rewards['per setting'] == rewards['chained']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Measure connection reuse of shared OpenAI clients against one client per agent.
+
+Agents take turns sending a short chat request each, as episodes do in a
+sweep. With "per-agent" every agent owns a client (and so a connection pool),
+as before `realtimegym.agents.clients`; with "shared" all of them use the
+registry's client of the endpoint. Reports the connections opened, the time
+spent connecting and in TLS handshakes, and the mean request latency.
+
+By default the endpoint is a local `MockLLMServer` answering instantly, so only the
+client overhead is measured; pass `--url` and `--api_key` for a real (HTTPS)
+endpoint, where handshakes cost a network round trip or more each.
+
+Run:
+    python benchmarks/client_pool.py --agents 32 --turns 8
+"""
+
+import argparse
+import time
+
+from realtimegym.agents import clients
+from realtimegym.mock_server import MockLLMServer
+
+
+def run(
+    url: str, api_key: str, model: str, agents: int, turns: int, shared: bool
+) -> None:
+    before = clients.connection_stats().get(url, {})
+    if shared:
+        llms = [clients.get_client(url, api_key) for _ in range(agents)]
+    else:
+        llms = [clients.create_client(url, api_key) for _ in range(agents)]
+    latencies = []
+    for _ in range(turns):
+        for llm in llms:
+            start = time.perf_counter()
+            llm.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": "Answer S."}],
+                max_tokens=4,
+            )
+            latencies.append(time.perf_counter() - start)
+    stats = clients.connection_stats()[url]
+    delta = {key: value - before.get(key, 0) for key, value in stats.items()}
+    name = "shared" if shared else "per-agent"
+    print(
+        f"{name:<10} {delta['connections']:5.0f} connections "
+        f"{delta['reused']:6.0f} reused  connect {delta['connect_seconds'] * 1000:7.1f}ms "
+        f"tls {delta['tls_seconds'] * 1000:7.1f}ms  "
+        f"{sum(latencies) / len(latencies) * 1000:6.2f}ms per request"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Shared client connection reuse.")
+    parser.add_argument("--url", type=str, default=None)
+    parser.add_argument("--api_key", type=str, default="stub")
+    parser.add_argument("--model", type=str, default="stub")
+    parser.add_argument("--agents", type=int, default=32)
+    parser.add_argument("--turns", type=int, default=8)
+    args = parser.parse_args()
+
+    url = args.url
+    if url is None:
+        url = MockLLMServer().start().url
+    for shared in (False, True):
+        run(url, args.api_key, args.model, args.agents, args.turns, shared)
+
+
+if __name__ == "__main__":
+    main()
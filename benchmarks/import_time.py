@@ -0,0 +1,67 @@
+"""
+Measure the startup cost of realtimegym: time to the first make() per game.
+
+Each case runs in a fresh interpreter under `python -X importtime`. Reports
+the best wall time over `--repeat` runs, the total import time and the
+slowest top-level packages imported along the way.
+
+Run:
+    python benchmarks/import_time.py --repeat 5
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+CASES = {
+    "make Freeway": "import realtimegym; realtimegym.make('Freeway-v0')",
+    "make Snake": "import realtimegym; realtimegym.make('Snake-v0')",
+    "make Overcooked": "import realtimegym; realtimegym.make('Overcooked-v0')",
+    "agile_eval": "import realtimegym.agile_eval",
+    "agents": "import realtimegym.agents.agile",
+}
+
+
+def profile(code: str) -> tuple[float, float, dict[str, float]]:
+    """(wall seconds, import seconds, import seconds per top-level package)."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    wall = time.perf_counter() - start
+    total = 0.0
+    packages: dict[str, float] = defaultdict(float)
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        seconds = int(self_us) / 1e6
+        total += seconds
+        packages[name.strip().split(".")[0]] += seconds
+    return wall, total, packages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="realtimegym startup time.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=4)
+    args = parser.parse_args()
+
+    for name, code in CASES.items():
+        runs = [profile(code) for _ in range(args.repeat)]
+        wall, total, packages = min(runs, key=lambda run: run[0])
+        slowest = sorted(packages.items(), key=lambda item: -item[1])[: args.top]
+        top = ", ".join(
+            f"{package} {seconds * 1000:.0f}ms" for package, seconds in slowest
+        )
+        print(f"{name:<16} {wall:6.2f}s wall {total:6.2f}s imports | {top}")
+
+
+if __name__ == "__main__":
+    main()
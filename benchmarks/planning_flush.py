@@ -0,0 +1,98 @@
+"""
+Measure the per-turn cost of revealing a planning generation under token budgets.
+
+Under `--time_unit token` a finished planning generation is revealed
+`budget` tokens per turn. Decoding the growing token prefix every turn costs
+O(turns x length); slicing the text at precomputed token offsets
+(`realtimegym.agents.base.token_ends`) costs one tokenization, then O(1) per
+turn. Reports both per generation, for a reasoning trace of `--tokens` tokens.
+
+The tokenizer is a byte-level BPE trained on the fly, since the benchmark runs
+offline; pass `--tokenizer` (e.g. deepseek-ai/DeepSeek-R1) to use a real one.
+
+Run:
+    python benchmarks/planning_flush.py --tokens 32768 --budgets 64 512 4096
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from typing import Any
+
+from realtimegym.agents.base import token_ends
+from realtimegym.agents.tokenizer_cache import load_tokenizer
+
+WORDS = (
+    "the car on freeway moves right at speed so turn covers x player row "
+    "collision safe stay up down wait plan if then because 0 1 2 3 4 5 6 7 8 9"
+).split()
+
+
+def local_tokenizer(directory: str) -> Any:  # noqa: ANN401
+    from tokenizers import Tokenizer, decoders, models, pre_tokenizers, trainers
+    from transformers import PreTrainedTokenizerFast
+
+    tokenizer = Tokenizer(models.BPE())
+    tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tokenizer.decoder = decoders.ByteLevel()
+    trainer = trainers.BpeTrainer(
+        vocab_size=2000, initial_alphabet=pre_tokenizers.ByteLevel.alphabet()
+    )
+    tokenizer.train_from_iterator([" ".join(WORDS)] * 100, trainer)
+    fast = PreTrainedTokenizerFast(tokenizer_object=tokenizer)
+    fast.add_tokens(["<think>", "</think>"])
+    fast.save_pretrained(directory)
+    return load_tokenizer(directory)
+
+
+def trace(tokenizer: Any, tokens: int) -> str:  # noqa: ANN401
+    rng = random.Random(0)
+    words: list[str] = []
+    text = ""
+    while len(tokenizer.encode(text)) < tokens:
+        words.extend(rng.choice(WORDS) for _ in range(max(64, tokens // 4)))
+        text = "<think>" + " ".join(words) + "\n</think>\n\\boxed{UUS}"
+    return text
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Token-budget planning flush cost.")
+    parser.add_argument("--tokenizer", type=str, default=None)
+    parser.add_argument("--tokens", type=int, default=32768)
+    parser.add_argument("--budgets", type=int, nargs="+", default=[64, 512, 4096])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.tokenizer is None:
+            tokenizer = local_tokenizer(directory)
+        else:
+            tokenizer = load_tokenizer(args.tokenizer)
+        text = trace(tokenizer, args.tokens)
+        length = len(tokenizer.encode(text))
+        print(f"trace of {length} tokens, {len(text)} characters")
+        for budget in args.budgets:
+            start = time.perf_counter()
+            tokens = tokenizer.encode(text)
+            decoded = [
+                tokenizer.decode(tokens[:accum], skip_special_tokens=True)
+                for accum in range(budget, len(tokens), budget)
+            ]
+            decode_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            ends = token_ends(tokenizer, text)
+            assert ends is not None
+            sliced = [
+                text[: ends[accum]] for accum in range(budget, len(ends) - 1, budget)
+            ]
+            slice_seconds = time.perf_counter() - start
+            assert len(decoded) == len(sliced)
+            print(
+                f"budget {budget:5d}: {len(sliced):4d} turns  decode "
+                f"{decode_seconds * 1000:8.1f}ms  offsets {slice_seconds * 1000:7.1f}ms  "
+                f"({decode_seconds / slice_seconds:5.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark the Snake engine on growing boards.
+
+Reports, for each board size:
+- engine steps/sec: step() with observation building stubbed out
+- steps/sec: step() including the observation
+- observe() latency
+- vec steps/sec: episode steps/sec of SnakeVecEnv with --num-envs episodes
+
+Run:
+    python benchmarks/snake_engine.py --steps 5000
+"""
+
+import argparse
+import time
+from typing import Any
+
+import numpy as np
+
+from realtimegym.environments.snake import OBSTACLE_DENSITY, SnakeEnv
+from realtimegym.environments.snake_vec import SnakeVecEnv
+
+
+def run(env: SnakeEnv, steps: int, rng: np.random.RandomState) -> float:
+    """Step with random non-reversing actions, resetting on game over."""
+    env.reset()
+    start = time.perf_counter()
+    for _ in range(steps):
+        actions = env.get_possible_actions()
+        _, done, _, _ = env.step(actions[rng.randint(len(actions))])
+        if done:
+            env.reset()
+    return steps / (time.perf_counter() - start)
+
+
+def run_vec(vec: SnakeVecEnv, steps: int, rng: np.random.RandomState) -> float:
+    """Step all episodes with random non-reversing moves."""
+    vec.reset()
+    start = time.perf_counter()
+    for _ in range(steps):
+        actions = rng.randint(4, size=vec.num_envs)
+        vec.step(actions)
+    return steps * vec.num_envs / (time.perf_counter() - start)
+
+
+def bench(board_size: int, steps: int, num_envs: int) -> dict[str, Any]:
+    env = SnakeEnv(board_size=board_size, obstacle_density=OBSTACLE_DENSITY["M"])
+    env.set_seed(5000)
+    full = run(env, steps, np.random.RandomState(0))
+
+    env.observe = lambda: {}  # type: ignore[method-assign]
+    engine = run(env, steps, np.random.RandomState(0))
+    del env.observe
+
+    env.reset()
+    start = time.perf_counter()
+    for _ in range(steps // 10):
+        env.observe()
+    observe_ms = (time.perf_counter() - start) / (steps // 10) * 1000
+
+    vec = SnakeVecEnv(
+        [5000 + i for i in range(num_envs)],
+        board_size=board_size,
+        obstacle_density=OBSTACLE_DENSITY["M"],
+    )
+    vec_steps = run_vec(vec, max(1, steps // num_envs * 4), np.random.RandomState(0))
+    return {
+        "B": board_size,
+        "engine steps/s": engine,
+        "steps/s": full,
+        "observe ms": observe_ms,
+        "vec steps/s": vec_steps,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Snake engine benchmark.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[8, 32, 128])
+    parser.add_argument("--steps", type=int, default=5000)
+    parser.add_argument("--num-envs", type=int, default=256)
+    args = parser.parse_args()
+    print(
+        f"{'B':>5} {'engine steps/s':>15} {'steps/s':>10} {'observe ms':>11} "
+        f"{'vec steps/s':>12}"
+    )
+    for size in args.sizes:
+        r = bench(size, args.steps, args.num_envs)
+        print(
+            f"{r['B']:>5} {r['engine steps/s']:>15.0f} {r['steps/s']:>10.0f} "
+            f"{r['observe ms']:>11.3f} {r['vec steps/s']:>12.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Measure the allocations made by SnakeEnv observations.
+
+Reports, per turn, the memory blocks still alive after the call (what the
+returned observation holds) and the peak KiB allocated during the call for:
+- step(), which builds the observation of the new turn
+- a second observe() on the same turn
+
+Run:
+    python benchmarks/snake_observe.py --turns 2000
+"""
+
+import argparse
+import tracemalloc
+from typing import Any, Callable
+
+import numpy as np
+
+from realtimegym.environments.snake import SnakeEnv
+
+
+def allocations(call: Callable[[], Any]) -> tuple[int, int, Any]:
+    """(live blocks, peak bytes) allocated by `call`, and its result."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    result = call()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(max(stat.count_diff, 0) for stat in after.compare_to(before, "lineno"))
+    return blocks, peak - base, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Snake observation allocations.")
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=5000)
+    args = parser.parse_args()
+
+    env = SnakeEnv()
+    env.set_seed(args.seed)
+    env.reset()
+    rng = np.random.RandomState(0)
+    step_blocks = step_bytes = observe_blocks = observe_bytes = 0.0
+    for _ in range(args.turns):
+        actions = env.get_possible_actions()
+        action = actions[rng.randint(len(actions))]
+        blocks, size, (obs, done, _, _) = allocations(lambda: env.step(action))
+        step_blocks += blocks
+        step_bytes += size
+        if done:
+            env.reset()
+            continue
+        blocks, size, _ = allocations(env.observe)
+        observe_blocks += blocks
+        observe_bytes += size
+
+    for name, blocks, size in (
+        ("step()", step_blocks, step_bytes),
+        ("observe()", observe_blocks, observe_bytes),
+    ):
+        print(
+            f"{name:<10} {blocks / args.turns:8.1f} blocks "
+            f"{size / args.turns / 1024:8.2f} KiB per turn"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Measure per-episode agent startup with and without the process's tokenizer cache.
+
+Each episode constructs a token-budget AgileThinker, whose planning model
+config names a tokenizer. "per agent" parses the tokenizer for every agent,
+as `AutoTokenizer.from_pretrained` in `config_model2` used to; "cached"
+loads it through `load_tokenizer`, once per process, as workers forked after
+`agile_eval.warm_up()` inherit it.
+
+The tokenizer is a synthetic byte-level BPE the size of a current LLM's
+(100k merges, ~9 MB of JSON), since the benchmark runs offline; pass
+`--tokenizer` for a real one.
+
+Run:
+    python benchmarks/tokenizer_load.py --episodes 8
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from realtimegym.agents.agile import AgileThinker
+from realtimegym.agents.tokenizer_cache import load_tokenizer
+from realtimegym.prompts import freeway
+
+
+def synthetic_tokenizer(directory: str, merges: int) -> str:
+    from tokenizers import Tokenizer, decoders, models, pre_tokenizers
+    from transformers import PreTrainedTokenizerFast
+
+    vocab = {c: i for i, c in enumerate(sorted(pre_tokenizers.ByteLevel.alphabet()))}
+    pieces, pairs = list(vocab), []
+    rng = random.Random(0)
+    while len(pairs) < merges:
+        a, b = rng.choice(pieces), rng.choice(pieces[:2000])
+        if len(a) + len(b) > 12 or a + b in vocab:
+            continue
+        vocab[a + b] = len(vocab)
+        pieces.append(a + b)
+        pairs.append((a, b))
+    tokenizer = Tokenizer(models.BPE(vocab=vocab, merges=pairs))
+    tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tokenizer.decoder = decoders.ByteLevel()
+    PreTrainedTokenizerFast(tokenizer_object=tokenizer).save_pretrained(directory)
+    return directory
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Agent startup and tokenizer loads.")
+    parser.add_argument("--tokenizer", type=str, default=None)
+    parser.add_argument("--merges", type=int, default=100000)
+    parser.add_argument("--episodes", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        tokenizer = args.tokenizer or synthetic_tokenizer(
+            os.path.join(directory, "tokenizer"), args.merges
+        )
+        config = os.path.join(directory, "model.yaml")
+        with open(config, "w") as f:
+            f.write(f"model: mock\napi_key: mock\ntokenizer: {tokenizer}\n")
+        file = os.path.join(directory, "0.csv")
+        for name, cached in (("per agent", False), ("cached", True)):
+            load_tokenizer.cache_clear()
+            seconds = []
+            for _ in range(args.episodes):
+                if not cached:
+                    load_tokenizer.cache_clear()
+                start = time.perf_counter()
+                AgileThinker(freeway, file, "token", config, config, 4096)  # type: ignore
+                seconds.append(time.perf_counter() - start)
+            print(
+                f"{name:<10} first episode {seconds[0]:6.3f}s, later episodes "
+                f"{statistics.mean(seconds[1:] or seconds):6.3f}s mean"
+            )
+
+
+if __name__ == "__main__":
+    main()
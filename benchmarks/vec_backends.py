@@ -0,0 +1,63 @@
+"""
+Measure make_vec throughput for each backend and worker count.
+
+Reports environment steps per second (episodes x turns / wall time) and the
+bytes received by the parent per vector step, on one game.
+
+Run:
+    python benchmarks/vec_backends.py --env Overcooked-v0 --envs 8 --steps 100
+"""
+
+import argparse
+import pickle
+import time
+
+import numpy as np
+
+import realtimegym
+from realtimegym.wrappers import TensorEnv
+
+
+def run(
+    env_id: str, seeds: list[int], backend: str, workers: int, steps: int
+) -> tuple[float, float]:
+    actions = TensorEnv(env_id).actions
+    rng = np.random.RandomState(0)
+    with realtimegym.make_vec(
+        env_id, seeds, backend=backend, num_workers=workers
+    ) as vec:
+        vec.reset()
+        received = 0
+        start = time.perf_counter()
+        for _ in range(steps):
+            batch = [actions[i] for i in rng.randint(len(actions), size=len(seeds))]
+            obs, dones, rewards, resets = vec.step(batch)
+            if backend == "subprocess":
+                received += len(pickle.dumps(list(zip(obs, dones, rewards, resets))))
+        elapsed = time.perf_counter() - start
+    return len(seeds) * steps / elapsed, received / steps
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="make_vec backend throughput.")
+    parser.add_argument("--env", type=str, default="Overcooked-v0")
+    parser.add_argument("--envs", type=int, default=8)
+    parser.add_argument("--steps", type=int, default=100)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    seeds = list(range(args.envs))
+    rate, _ = run(args.env, seeds, "sync", 1, args.steps)
+    print(f"{'sync':<14} {'-':>7} {rate:10.0f} steps/s")
+    for backend in ("subprocess", "shared_memory"):
+        for workers in args.workers:
+            rate, received = run(args.env, seeds, backend, workers, args.steps)
+            # Shared-memory replies are one pickled None per worker.
+            size = f"{received / 1024:.1f} KiB" if received else "-"
+            print(
+                f"{backend:<14} {workers:>7} {rate:10.0f} steps/s  {size:>10} per step"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Measure the startup cost agile_eval pays per episode, cold and warm.
+
+"cold" runs each episode's setup (imports, `make()` and first `reset()`,
+prompt module, tokenizer) in a fresh spawned interpreter, as a worker does
+without warm-up; "warm" calls `agile_eval.warm_up()` once in the parent and
+runs the same setup in forked workers that are reused across episodes.
+
+Run:
+    python benchmarks/worker_startup.py --game overcooked --episodes 8
+"""
+
+import argparse
+import multiprocessing as mp
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+
+def setup(args: argparse.Namespace) -> float:
+    """Seconds this process takes to get one episode ready."""
+    start = time.perf_counter()
+    from realtimegym import agile_eval
+
+    agile_eval.warm_up([("", 0, args)])
+    return time.perf_counter() - start
+
+
+def run(args: argparse.Namespace, warm: bool) -> tuple[float, float]:
+    """(seconds per episode from submission to ready, seconds in setup)."""
+    if warm:
+        from realtimegym import agile_eval
+
+        agile_eval.warm_up([("", 0, args)])
+        context = mp.get_context("fork")
+        max_tasks = None
+    else:
+        context = mp.get_context("spawn")
+        max_tasks = 1
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=args.workers, mp_context=context, max_tasks_per_child=max_tasks
+    ) as executor:
+        inside = list(executor.map(setup, [args] * args.episodes))
+    elapsed = time.perf_counter() - start
+    return elapsed * args.workers / args.episodes, sum(inside) / len(inside)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="agile_eval worker startup.")
+    parser.add_argument("--game", type=str, default="overcooked")
+    parser.add_argument("--cognitive_load", type=str, default="E")
+    parser.add_argument(
+        "--prompt_config", type=str, default="configs/example-prompts.yaml"
+    )
+    parser.add_argument("--planning_model_config", type=str, default=None)
+    parser.add_argument("--episodes", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+    args.mode = "agile"
+    args.save_trajectory_gifs = False
+
+    for name, warm in (("cold", False), ("warm", True)):
+        per_episode, inside = run(args, warm)
+        print(
+            f"{name:<5} {per_episode:6.3f}s per episode "
+            f"({inside:6.3f}s of setup inside the worker)"
+        )
+
+
+if __name__ == "__main__":
+    main()
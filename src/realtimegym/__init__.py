@@ -1,64 +1,45 @@
 """Real-time Reasoning Gym - A gym for evaluating language agents in dynamic environments."""
 
-from importlib import import_module
+from pathlib import Path
 from typing import Any
 
+from realtimegym.registration import EnvSpec, make, register, spec
+
 __version__ = "0.1.0"
 
-# Environment registry mapping environment IDs to module names and difficulty
-_REGISTRY = {
-    "Freeway-v0": ("freeway", "E"),
-    "Freeway-v1": ("freeway", "M"),
-    "Freeway-v2": ("freeway", "H"),
-    "Snake-v0": ("snake", "E"),
-    "Snake-v1": ("snake", "M"),
-    "Snake-v2": ("snake", "H"),
-    "Overcooked-v0": ("overcooked", "E"),
-    "Overcooked-v1": ("overcooked", "M"),
-    "Overcooked-v2": ("overcooked", "H"),
-}
-
-
-def make(env_id: str, seed: int = 0, render: bool = False) -> tuple[Any, int, Any]:
-    """
-    Create an environment instance.
-
-    Args:
-        env_id: Environment identifier (e.g., 'Freeway-v0', 'Snake-v1', 'Overcooked-v2')
-                Version suffixes: -v0 (Easy), -v1 (Medium), -v2 (Hard)
-        seed: Random seed for environment initialization (0-7)
-        render: Whether to enable rendering for trajectory visualization
-
-    Returns:
-        Tuple of (env, actual_seed, render_object)
-        - env: The environment instance
-        - actual_seed: The actual seed used (mapped from input seed)
-        - render_object: Renderer instance if render=True, else None
-
-    Examples:
-        >>> import realtimegym
-        >>> env, seed, renderer = realtimegym.make('Freeway-v0', seed=0)
-        >>> obs = env.reset()
-        >>> action = 'U'  # Move up
-        >>> reward, done = env.act(action)
-    """
-    if env_id not in _REGISTRY:
-        available = ", ".join(_REGISTRY.keys())
-        raise ValueError(
-            f"Unknown environment ID: {env_id}. Available environments: {available}"
+# Built-in games: -v0/-v1/-v2 are the Easy/Medium/Hard cognitive loads
+for _game in ("Freeway", "Snake", "Overcooked"):
+    for _version, _load in enumerate("EMH"):
+        register(
+            f"{_game}-v{_version}",
+            f"realtimegym.environments.{_game.lower()}:setup_env",
+            cognitive_load=_load,
         )
+# Snake on any board size, with the obstacle density of the matching 8x8 level
+for _version, _load in enumerate("EMH"):
+    register(
+        f"Snake-{{board_size}}x{{board_size}}-v{_version}",
+        "realtimegym.environments.snake:setup_env",
+        cognitive_load=_load,
+    )
 
-    game_name, cognitive_load = _REGISTRY[env_id]
-
-    # Import the environment module
-    env_module: Any = import_module(f"realtimegym.environments.{game_name}")
 
-    # Use the setup_env function from the environment module
-    env, actual_seed, render_obj = env_module.setup_env(  # type: ignore
-        seed=seed, cognitive_load=cognitive_load, save_trajectory_gifs=render
+def _overcooked_layouts() -> list[str]:
+    layouts = (
+        Path(__file__).parent
+        / "environments/overcooked_new/src/overcooked_ai_py/data/layouts"
     )
+    return [path.stem for path in layouts.glob("*.layout")]
 
-    return env, actual_seed, render_obj
+
+# Overcooked on any layout of overcooked_ai_py/data/layouts; the cognitive
+# load only selects the default layout.
+register(
+    "Overcooked-{layout}",
+    "realtimegym.environments.overcooked:setup_env",
+    field_choices={"layout": _overcooked_layouts},
+    cognitive_load="E",
+)
 
 
 # Export commonly used classes using lazy imports
@@ -80,6 +61,14 @@ def __getattr__(name: str) -> Any:  # noqa: ANN401
         from realtimegym.agents.agile import AgileThinker
 
         return AgileThinker
+    elif name == "make_vec":
+        from realtimegym.vector import make_vec
+
+        return make_vec
+    elif name == "TensorEnv":
+        from realtimegym.wrappers import TensorEnv
+
+        return TensorEnv
     elif name == "BaseEnv":
         from realtimegym.environments.base import BaseEnv
 
@@ -89,6 +78,11 @@ def __getattr__(name: str) -> Any:  # noqa: ANN401
 
 __all__ = [
     "make",
+    "register",
+    "spec",
+    "EnvSpec",
+    "make_vec",
+    "TensorEnv",
     "BaseAgent",
     "ReactiveAgent",
     "PlanningAgent",
@@ -1,7 +1,7 @@
 import re
 from typing import Any, Optional
 
-from .base import BaseAgent, extract_boxed
+from .base import BaseAgent, Steps, extract_boxed
 
 
 class AgileThinker(BaseAgent):
@@ -12,7 +12,7 @@ class AgileThinker(BaseAgent):
         time_unit: str,
         model1_config: str,
         model2_config: str,
-        internal_budget: int,
+        internal_budget: float,
     ) -> None:
         super().__init__(prompts, file, time_unit)
         self.config_model1(model1_config, internal_budget)
@@ -30,7 +30,7 @@ class AgileThinker(BaseAgent):
         for col in self.logs:
             self.logs[col] = self.logs[col][:final_step]
 
-    def think(self, timeout: Optional[float] = None) -> None:
+    def _think(self, timeout: Optional[float]) -> Steps:
         assert self.current_observation is not None and timeout is not None
         budget = timeout
         observation = self.current_observation
@@ -45,7 +45,9 @@ class AgileThinker(BaseAgent):
             prompt = messages[-1]["content"]
         else:
             messages = []
-        text, token_num, turn = self.planning_inference(messages, budget, game_turn)
+        text, token_num, turn = yield from self._planning_inference(
+            messages, budget, game_turn
+        )
         self.plan = f"""**Guidance from a Previous Thinking Model:** Turn \\( t_1 = {turn} \\)\n{text}"""
         if self.log_thinking:
             self.logs["plan"].append(self.plan)
@@ -59,7 +61,9 @@ class AgileThinker(BaseAgent):
             for line in lines:
                 prompt += f"> {line.strip()}\n"
         messages = [{"role": "user", "content": prompt}]
-        text, token_num = self.reactive_inference(messages, self.internal_budget)
+        text, token_num = yield from self._reactive_inference(
+            messages, self.internal_budget
+        )
         self.action = re.sub(
             r"[^" + self.prompts.ALL_ACTIONS + "]", "", extract_boxed(text)
         )
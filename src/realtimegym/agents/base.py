@@ -1,15 +1,46 @@
+import asyncio
+import bisect
 import os
-import queue
 import re
 import threading
 import time
-from collections import defaultdict
-from typing import Any, NoReturn, Optional, Union
+from collections import Counter, defaultdict
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncGenerator,
+    Callable,
+    Generator,
+    Optional,
+    Union,
+)
 
-import pandas as pd
 import yaml
-from openai import OpenAI
-from transformers import AutoTokenizer
+
+from realtimegym.agents.cache import (
+    CacheMiss,
+    ResponseCache,
+    areplay_stream,
+    decode_response,
+    request_key,
+    replay_stream,
+)
+from realtimegym.agents.clients import get_async_client, get_client
+from realtimegym.agents.clock import Clock, RealClock, arrival_offset
+from realtimegym.agents.retry import (
+    CircuitBreaker,
+    DeadlineExceeded,
+    RetryPolicy,
+    circuit_breaker,
+    retry_policy,
+)
+from realtimegym.agents.tokenizer_cache import load_tokenizer
+from realtimegym.environments.base import append_snapshot, load_snapshots
+
+# openai, transformers and pandas take most of the import time; they are
+# imported where they are first needed.
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
 
 # Load environment variables from .env file if it exists
 try:
@@ -20,6 +51,19 @@ except ImportError:
     pass  # dotenv not installed, will use system environment variables only
 
 
+# Inference is written once, as generators yielding the model calls and sleeps
+# they need as (method, client attribute, *args) tuples; the client attribute
+# is None for the agent's own methods, e.g. ("sleep", None, seconds).
+# `BaseAgent._run` performs them with the blocking methods, `BaseAgent._arun`
+# with their "a"-prefixed coroutine counterparts on AsyncOpenAI clients.
+Steps = Generator[tuple[Any, ...], Any, Any]
+
+
+def snapshot_file(log_file: str) -> str:
+    """Path of the per-turn environment snapshots kept next to a CSV log."""
+    return log_file.replace(".csv", ".states.pkl")
+
+
 class BaseAgent:
     def __init__(
         self,
@@ -35,7 +79,27 @@ class BaseAgent:
         self.tokenizer = None
         self.llm1 = None
         self.llm2 = None
+        # Client attribute -> endpoint (base_url, api_key), and the shared
+        # AsyncOpenAI clients of those endpoints, looked up on first use
+        self.client_args: dict[str, dict[str, Any]] = {}
+        self.async_clients: dict[str, "AsyncOpenAI"] = {}
+        self.planning_task: Optional[asyncio.Task] = None
+        self.retry_policies: dict[str, RetryPolicy] = {}
+        # Logged once per turn: retries and seconds spent in model requests,
+        # and whether a request missed its deadline
+        self.request_stats: dict[str, float] = {
+            "retries": 0,
+            "request_seconds": 0.0,
+            "fallback": 0,
+        }
+        self.cache: Optional[ResponseCache] = None
+        self.cache_namespace = ""
+        self.cache_counts: Counter[str] = Counter()
+        # Requests of the episode answered from the cache
+        self.cache_hits = 0
         self.internal_budget = 0
+        # Time of the seconds budgets; a VirtualClock plays them at CPU speed
+        self.clock: Clock = RealClock()
 
         self.logs = defaultdict(list)
         # better not set log_thinking to True for time-based budget, since storing logs can be slow and interfere with timing
@@ -47,10 +111,10 @@ class BaseAgent:
         self.gen_accum = 0
         self.gen_text = ""
         self.gen_token = []
+        # gen_text[: gen_ends[k]] is the text of its first k tokens
+        self.gen_ends: Optional[list[int]] = None
         self.gen_token_num = 0
-        self.planning_queue = None
-        self.planning_done = None
-        self.planning_reasoning = False
+        self.planning_stream: Optional[PlanningStream] = None
         self.plan = ""
         self.state_string = ""
 
@@ -88,7 +152,7 @@ class BaseAgent:
 
         return re.sub(pattern, replace_env_var, value)
 
-    def config_model1(self, model1_config: str, internal_budget: int) -> None:
+    def config_model1(self, model1_config: str, internal_budget: float) -> None:
         with open(model1_config, "r") as f:
             self.model1_config = yaml.safe_load(f)
 
@@ -96,10 +160,12 @@ class BaseAgent:
         api_key = self._resolve_env_var(self.model1_config["api_key"])
         assert isinstance(api_key, str), "API key must be a string after resolution."
 
-        self.llm1 = OpenAI(
-            api_key=api_key,
-            base_url=self.model1_config.get("url"),
-        )
+        self.client_args["llm1"] = {
+            "api_key": api_key,
+            "base_url": self.model1_config.get("url"),
+        }
+        self.llm1 = get_client(**self.client_args["llm1"])
+        self.retry_policies["llm1"] = retry_policy(self.model1_config)
         self.model1 = self.model1_config["model"]
         self.internal_budget = internal_budget
 
@@ -111,15 +177,15 @@ class BaseAgent:
         api_key = self._resolve_env_var(self.model2_config["api_key"])
         assert isinstance(api_key, str), "API key must be a string after resolution."
 
-        self.llm2 = OpenAI(
-            api_key=api_key,
-            base_url=self.model2_config.get("url"),
-        )
+        self.client_args["llm2"] = {
+            "api_key": api_key,
+            "base_url": self.model2_config.get("url"),
+        }
+        self.llm2 = get_client(**self.client_args["llm2"])
+        self.retry_policies["llm2"] = retry_policy(self.model2_config)
         self.model2 = self.model2_config["model"]
         if "tokenizer" in self.model2_config:
-            self.tokenizer = AutoTokenizer.from_pretrained(
-                self.model2_config["tokenizer"]
-            )
+            self.tokenizer = load_tokenizer(self.model2_config["tokenizer"])
 
     def observe(self, observation: dict[str, Any]) -> None:
         """
@@ -130,13 +196,103 @@ class BaseAgent:
         """
         self.current_observation = observation
 
-    def think(self, timeout: Optional[float] = None) -> NoReturn:
+    def use_cache(self, cache: ResponseCache, namespace: str = "") -> None:
+        """
+        Answer model requests from `cache` (see `realtimegym.agents.cache`).
+
+        Args:
+            namespace: Name of the episode, e.g. its log file name; requests
+                of episodes with different names are stored apart
+        """
+        self.cache = cache
+        self.cache_namespace = namespace
+        self.cache_counts.clear()
+        self.cache_hits = 0
+
+    def _cache_key(self, params: dict[str, Any]) -> str:
+        """Key of a request: its hash and how often it was made before."""
+        key = request_key(params, self.cache_namespace)
+        self.cache_counts[key] += 1
+        return f"{key}:{self.cache_counts[key] - 1}"
+
+    def _lookup(self, key: str) -> Optional[Any]:  # noqa: ANN401
+        """Stored record of a request, counting the episode's cache hits."""
+        assert self.cache is not None
+        record = self.cache.lookup(key)
+        if record is not None:
+            self.cache_hits += 1
+        return record
+
+    def async_client(self, name: str) -> "AsyncOpenAI":
+        """Shared AsyncOpenAI client of the endpoint of `self.<name>`."""
+        if name not in self.async_clients:
+            self.async_clients[name] = get_async_client(**self.client_args[name])
+        return self.async_clients[name]
+
+    def _run(self, steps: Steps) -> Any:  # noqa: ANN401
+        """Drive an inference generator, making its calls in this thread."""
+        result: Any = None
+        error: Optional[Exception] = None
+        while True:
+            try:
+                step = steps.send(result) if error is None else steps.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            result, error = None, None
+            method, client, *args = step
+            try:
+                if client is None:
+                    result = getattr(self, method)(*args)
+                else:
+                    result = getattr(self, method)(getattr(self, client), *args)
+            except Exception as e:
+                error = e
+
+    async def _arun(self, steps: Steps) -> Any:  # noqa: ANN401
+        """Drive an inference generator, awaiting its calls on the event loop."""
+        result: Any = None
+        error: Optional[Exception] = None
+        while True:
+            try:
+                step = steps.send(result) if error is None else steps.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            result, error = None, None
+            method, client, *args = step
+            try:
+                call = getattr(self, "a" + method)
+                if client is None:
+                    result = await call(*args)
+                else:
+                    result = await call(self.async_client(client), *args)
+            except Exception as e:
+                error = e
+
+    def think(self, timeout: Optional[float] = None) -> None:
         """
         Process the current observation and decide on an action.
 
         Args:
             timeout: Time/token budget for thinking (optional, uses internal_budget if not provided)
         """
+        self._run(self._think(timeout))
+
+    async def athink(self, timeout: Optional[float] = None) -> None:
+        """
+        `think()` for the event loop: model calls and waits are awaited, so
+        many agents can think concurrently in one thread.
+
+        Agents that only override `think()` run it in a worker thread.
+        """
+        if type(self)._think is BaseAgent._think:
+            # asyncio.to_thread() needs Python 3.9
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.think, timeout)
+        else:
+            await self._arun(self._think(timeout))
+
+    def _think(self, timeout: Optional[float]) -> Steps:
+        """Body of `think()` and `athink()`, yielding its model calls."""
         raise NotImplementedError("This method should be overridden by subclasses.")
 
     def act(self) -> Optional[str]:
@@ -149,136 +305,368 @@ class BaseAgent:
         return self.action
 
     def log(self, reward: float, reset: bool) -> None:
+        self._run(self._log(reward, reset))
+
+    async def alog(self, reward: float, reset: bool) -> None:
+        await self._arun(self._log(reward, reset))
+
+    def _log(self, reward: float, reset: bool) -> Steps:
         assert self.current_observation is not None, "Current observation is not set!"
         self.logs["render"].append(self.current_observation["state_string"])
         self.logs["action"].append(self.action)
         self.logs["reward"].append(reward)
+        turns = len(self.logs["action"])
+        for column, value in self.request_stats.items():
+            # Logs resumed from runs without these columns get zeros.
+            self.logs[column] += [0] * (turns - 1 - len(self.logs[column]))
+            self.logs[column].append(value)
+        self.request_stats = dict.fromkeys(self.request_stats, 0)
         if reset:
             self.plan = ""
             if self.time_unit == "token":
                 while self.gen_text != "":
-                    self.planning_inference([], 80000, 0)
+                    yield from self._planning_inference([], 80000, 0)
             else:
                 while self.gen_text != "":
-                    self.planning_inference([], 10.0 + self.internal_budget, 0)
+                    yield from self._planning_inference(
+                        [], 10.0 + self.internal_budget, 0
+                    )
             self.to_flush = ""
+        import pandas as pd
+
         df = pd.DataFrame(self.logs)
         df.to_csv(self.file)
 
     def resume_from_checkpoint(self, env: Any, checkpoint_file: str) -> None:  # noqa: ANN401
+        """
+        Load the logs of an interrupted run and bring `env` to where they end.
+
+        The environment is restored from the snapshots saved next to the
+        checkpoint when there are any, and replayed from the start otherwise.
+        """
+        import pandas as pd
+
         df = pd.read_csv(checkpoint_file)
         self.logs = df.to_dict("list")  # remove unnamed column
         self.logs.pop("Unnamed: 0", None)
         self.truncate_logs()
-        for a in self.logs["action"]:
-            env.act(a)
+        turns = len(self.logs["action"])
+        snapshots = []
+        if os.path.exists(snapshot_file(checkpoint_file)):
+            snapshots = load_snapshots(snapshot_file(checkpoint_file), turns + 1)
+        # This run's snapshots start over, one per turn up to the resumed one.
+        path = snapshot_file(self.file)
+        if os.path.exists(path):
+            os.remove(path)
+        if len(snapshots) == turns + 1:
+            env.set_state(snapshots[-1])
+            for snapshot in snapshots:
+                append_snapshot(path, snapshot)
+        else:
+            # Replay from the start of the seed, RNG included: `env` may have
+            # been played already, and Freeway draws its traffic from the RNG.
+            env.set_seed(env.seed)
+            env.reset()
+            append_snapshot(path, env.get_state())
+            for a in self.logs["action"]:
+                env.step(a)
+                append_snapshot(path, env.get_state())
         df = pd.DataFrame(self.logs)
         df.to_csv(self.file)
 
-    def truncate_logs(self) -> NoReturn:
+    def truncate_logs(self) -> None:
         raise NotImplementedError("This method should be overridden by subclasses.")
 
-    def generate(
+    def _breaker(self, client: str) -> CircuitBreaker:
+        return circuit_breaker(
+            self.client_args[client]["base_url"], self.retry_policies[client]
+        )
+
+    def _request(
         self,
-        llm: OpenAI,
+        client: str,
+        step: Callable[[], tuple[Any, ...]],
+        deadline: Optional[float] = None,
+    ) -> Steps:
+        """
+        Make the call `step()` to `client`, retried under its retry policy.
+
+        Raises:
+            DeadlineExceeded: If every attempt failed and the next one could
+                not start before `deadline` (a `self.clock.time()` value). Without
+                a deadline, retries stop `max_wait` seconds after the first
+                attempt.
+        """
+        policy = self.retry_policies[client]
+        breaker = self._breaker(client)
+        if deadline is None and policy.max_wait is not None:
+            deadline = self.clock.time() + policy.max_wait
+        retry = 0
+        while True:
+            if breaker.allow():
+                start = self.clock.time()
+                try:
+                    result = yield step()
+                    breaker.record_success()
+                    return result
+                except CacheMiss:
+                    raise
+                except Exception as e:
+                    breaker.record_failure()
+                    print(f"Error: {e}")
+                finally:
+                    # Without a verdict (a cache miss, or the caller gave up),
+                    # the request must not keep a half-open circuit's trial.
+                    breaker.release()
+                    self.request_stats["request_seconds"] += self.clock.time() - start
+                delay = policy.delay(retry)
+            else:
+                # The endpoint's circuit is open: wait for its trial request.
+                delay = max(breaker.retry_at() - time.monotonic(), policy.delay(retry))
+            if deadline is not None and self.clock.time() + delay >= deadline:
+                raise DeadlineExceeded(
+                    f"No request to {self.client_args[client]['base_url']} "
+                    f"succeeded in time after {retry + 1} attempts."
+                )
+            retry += 1
+            self.request_stats["retries"] += 1
+            yield ("sleep", None, delay)
+
+    def _generate(
+        self,
+        client: str,
         model: str,
         messages: list[dict[str, str]],
         sampling_params: dict[str, Any],
-    ) -> tuple[str, int]:
+        deadline: Optional[float] = None,
+    ) -> Steps:
+        """Text and completion tokens of a chat completion, see `_request`."""
         params = sampling_params
         params["messages"] = messages
         params["model"] = model
-        while True:
-            try:
-                text = ""
+        response = yield from self._request(
+            client, lambda: ("complete", client, params), deadline
+        )
+        return response_text(response, model)
+
+    def _fallback(self) -> str:
+        """Answer of a reactive request that missed its deadline."""
+        self.request_stats["fallback"] = 1
+        return "\\boxed{" + self.prompts.DEFAULT_ACTION + "}"
+
+    def complete(self, llm: "OpenAI", params: dict[str, Any]) -> Any:  # noqa: ANN401
+        """One chat completion, without retries."""
+        start, real_start = self.clock.time(), time.monotonic()
+        if self.cache is None:
+            response = llm.chat.completions.create(**params)
+        else:
+            key = self._cache_key(params)
+            record = self._lookup(key)
+            if record is not None:
+                response = decode_response(record)
+            else:
                 response = llm.chat.completions.create(**params)
-                if (
-                    hasattr(response.choices[0].message, "reasoning_content")
-                    and response.choices[0].message.reasoning_content is not None
-                ):
-                    text = (
-                        "<think>"
-                        + response.choices[0].message.reasoning_content
-                        + "\n</think>\n"
-                    )
-                if response.choices[0].message.content is not None:
-                    text += response.choices[0].message.content
-                if (
-                    "gemini" in model
-                ):  ### GEMINI EXCEPTION: completion_tokens do not include thinking tokens
-                    token_num = (
-                        response.usage.total_tokens - response.usage.prompt_tokens
-                    )
-                else:
-                    token_num = response.usage.completion_tokens
-                return text, token_num
-            except Exception as e:
-                print(f"Error: {e}")
-                time.sleep(1)
+                self.cache.store(key, params["model"], response, real_start)
+        if self.clock.virtual:
+            self.clock.arrive(start, arrival_offset(response, real_start))
+        return response
+
+    async def acomplete(self, llm: "AsyncOpenAI", params: dict[str, Any]) -> Any:  # noqa: ANN401
+        start, real_start = self.clock.time(), time.monotonic()
+        if self.cache is None:
+            response = await llm.chat.completions.create(**params)
+        else:
+            key = self._cache_key(params)
+            record = self._lookup(key)
+            if record is not None:
+                response = decode_response(record)
+            else:
+                response = await llm.chat.completions.create(**params)
+                self.cache.store(key, params["model"], response, real_start)
+        if self.clock.virtual:
+            self.clock.arrive(start, arrival_offset(response, real_start))
+        return response
+
+    def sleep(self, seconds: float) -> None:
+        self.clock.sleep(seconds)
+
+    async def asleep(self, seconds: float) -> None:
+        await self.clock.asleep(seconds)
+
+    def open_stream(self, llm: "OpenAI", params: dict[str, Any]) -> Any:  # noqa: ANN401
+        """Chunks of a streamed chat completion, from the cache if it has them."""
+        if self.cache is None:
+            return llm.chat.completions.create(**params)
+        cache = self.cache
+        start = time.monotonic()
+        key = self._cache_key(params)
+        record = self._lookup(key)
+
+        def resume() -> Generator[Any, None, None]:
+            # Record mode reads on past a cut recording, and stores it anew.
+            start = time.monotonic()
+            stream = llm.chat.completions.create(**params)
+            return cache.record_stream(key, params["model"], stream, start, True)
+
+        if record is not None:
+            return replay_stream(record, resume if cache.mode == "record" else None)
+        stream = llm.chat.completions.create(**params)
+        return cache.record_stream(key, params["model"], stream, start)
+
+    async def aopen_stream(self, llm: "AsyncOpenAI", params: dict[str, Any]) -> Any:  # noqa: ANN401
+        if self.cache is None:
+            return await llm.chat.completions.create(**params)
+        cache = self.cache
+        start = time.monotonic()
+        key = self._cache_key(params)
+        record = self._lookup(key)
+
+        async def resume() -> AsyncGenerator[Any, None]:
+            start = time.monotonic()
+            stream = await llm.chat.completions.create(**params)
+            return cache.arecord_stream(key, params["model"], stream, start, True)
+
+        if record is not None:
+            return areplay_stream(record, resume if cache.mode == "record" else None)
+        stream = await llm.chat.completions.create(**params)
+        return cache.arecord_stream(key, params["model"], stream, start)
 
     def start_planning_stream(
         self,
-        llm: OpenAI,
+        llm: "OpenAI",
         model: str,
         messages: list[dict[str, str]],
         sampling_params: dict[str, Any],
+        breaker: Optional[CircuitBreaker] = None,
     ) -> None:
-        self.planning_queue = queue.Queue()
-        self.planning_done = threading.Event()
+        stream = self.planning_stream = PlanningStream()
         params = sampling_params
         params["messages"] = messages
         params["model"] = model
         params["stream"] = True
+        clock, start = self.clock, self.clock.time()
 
         def planning_worker() -> None:
-            assert self.planning_queue is not None, "Planning queue is not initialized!"
-            assert self.planning_done is not None, (
-                "Planning done event is not initialized!"
-            )
+            # With the circuit open, the plan is requested again next turn.
+            if breaker is not None and not breaker.allow():
+                stream.finish()
+                return
             try:
-                stream_obj = llm.chat.completions.create(**params)
+                real_start = time.monotonic()
+                stream_obj = self.open_stream(llm, params)
                 for chunk in stream_obj:
-                    self.planning_queue.put(chunk)
-                self.planning_done.set()
+                    offset = arrival_offset(chunk, real_start)
+                    if not clock.virtual:
+                        clock.arrive(start, offset)
+                    stream.add(chunk, start + offset)
+                if breaker is not None:
+                    breaker.record_success()
+                stream.finish()
             except Exception as e:
                 print(f"Streaming error: {e}")
-                self.planning_done.set()
+                if breaker is not None:
+                    breaker.record_failure()
+                stream.finish()
 
         threading.Thread(target=planning_worker, daemon=True).start()
 
+    async def astart_planning_stream(
+        self,
+        llm: "AsyncOpenAI",
+        model: str,
+        messages: list[dict[str, str]],
+        sampling_params: dict[str, Any],
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        stream = self.planning_stream = PlanningStream()
+        params = sampling_params
+        params["messages"] = messages
+        params["model"] = model
+        params["stream"] = True
+        clock, start = self.clock, self.clock.time()
+
+        async def planning_worker() -> None:
+            if breaker is not None and not breaker.allow():
+                stream.finish()
+                return
+            try:
+                real_start = time.monotonic()
+                stream_obj = await self.aopen_stream(llm, params)
+                async for chunk in stream_obj:
+                    offset = arrival_offset(chunk, real_start)
+                    if not clock.virtual:
+                        await clock.aarrive(start, offset)
+                    stream.add(chunk, start + offset)
+                if breaker is not None:
+                    breaker.record_success()
+            except Exception as e:
+                print(f"Streaming error: {e}")
+                if breaker is not None:
+                    breaker.record_failure()
+            stream.finish()
+
+        # Keep a reference, the event loop only holds tasks weakly.
+        self.planning_task = asyncio.ensure_future(planning_worker())
+
     def get_planning_chunks(self) -> tuple[str, int]:
-        text = ""
-        token_num = 0
-        assert self.planning_queue is not None, "Planning queue is not initialized!"
-        while not self.planning_queue.empty():
-            chunk = self.planning_queue.get()
-            if (
-                hasattr(chunk.choices[0].delta, "reasoning_content")
-                and chunk.choices[0].delta.reasoning_content is not None
-            ):
-                if not self.planning_reasoning:
-                    text += "<think>"
-                    self.planning_reasoning = True
-                text += chunk.choices[0].delta.reasoning_content
+        """Text of the planning stream arrived since the last call, and its token count."""
+        stream = self.planning_stream
+        assert stream is not None, "Planning stream is not started!"
+        if not self.clock.virtual:
+            return stream.take()
+        # Simulated time may be ahead of the stream: let the worker catch up.
+        until = self.clock.time()
+        stream.wait(until)
+        return stream.take(until)
+
+    async def aget_planning_chunks(self) -> tuple[str, int]:
+        stream = self.planning_stream
+        assert stream is not None, "Planning stream is not started!"
+        if not self.clock.virtual:
+            return stream.take()
+        until = self.clock.time()
+        while not stream.ready(until):
+            await asyncio.sleep(0.001)
+        return stream.take(until)
+
+    def is_planning_finished(self) -> bool:
+        assert self.planning_stream is not None, "Planning stream is not started!"
+        return self.planning_stream.finished()
+
+    def start_reactive_stream(
+        self,
+        llm: "OpenAI",
+        model: str,
+        messages: list[dict[str, str]],
+        sampling_params: dict[str, Any],
+        max_time: float,
+    ) -> tuple[str, int]:
+        params = sampling_params
+        params["messages"] = messages
+        params["model"] = model
+        params["stream"] = True
+        start_time, real_start = self.clock.time(), time.monotonic()
+        stream_obj = self.open_stream(llm, params)
+        text, token_num = "", 0
+        for chunk in stream_obj:
+            self.clock.arrive(start_time, arrival_offset(chunk, real_start))
+            if self.clock.time() - start_time > max_time:
+                break
             if (
                 hasattr(chunk.choices[0].delta, "content")
                 and chunk.choices[0].delta.content is not None
             ):
-                if self.planning_reasoning:
-                    text += "\n</think>\n"
-                    self.planning_reasoning = False
                 text += chunk.choices[0].delta.content
             if hasattr(chunk, "usage") and chunk.usage is not None:
                 token_num = chunk.usage.completion_tokens
+        # Stop the request, and let the cache store what was read of it.
+        stream_obj.close()
+        self.clock.sleep(max_time - (self.clock.time() - start_time))
         return text, token_num
 
-    def is_planning_finished(self) -> bool:
-        assert self.planning_done is not None, "Planning done event is not initialized!"
-        return self.planning_done.is_set()
-
-    def start_reactive_stream(
+    async def astart_reactive_stream(
         self,
-        llm: OpenAI,
+        llm: "AsyncOpenAI",
         model: str,
         messages: list[dict[str, str]],
         sampling_params: dict[str, Any],
@@ -288,11 +676,12 @@ class BaseAgent:
         params["messages"] = messages
         params["model"] = model
         params["stream"] = True
-        start_time = time.time()
-        stream_obj = llm.chat.completions.create(**params)
+        start_time, real_start = self.clock.time(), time.monotonic()
+        stream_obj = await self.aopen_stream(llm, params)
         text, token_num = "", 0
-        for chunk in stream_obj:
-            if time.time() - start_time > max_time:
+        async for chunk in stream_obj:
+            await self.clock.aarrive(start_time, arrival_offset(chunk, real_start))
+            if self.clock.time() - start_time > max_time:
                 break
             if (
                 hasattr(chunk.choices[0].delta, "content")
@@ -301,17 +690,30 @@ class BaseAgent:
                 text += chunk.choices[0].delta.content
             if hasattr(chunk, "usage") and chunk.usage is not None:
                 token_num = chunk.usage.completion_tokens
-        current_time = time.time()
-        if max_time - (current_time - start_time) > 0:
-            time.sleep(max_time - (current_time - start_time))
+        # AsyncStream.close() and async generators' aclose() are coroutines.
+        if hasattr(stream_obj, "aclose"):
+            await stream_obj.aclose()
+        else:
+            await stream_obj.close()
+        await self.clock.asleep(max_time - (self.clock.time() - start_time))
         return text, token_num
 
     def reactive_inference(
         self, messages: list[dict[str, str]], budget: float
     ) -> tuple[str, int]:
+        return self._run(self._reactive_inference(messages, budget))
+
+    async def areactive_inference(
+        self, messages: list[dict[str, str]], budget: float
+    ) -> tuple[str, int]:
+        return await self._arun(self._reactive_inference(messages, budget))
+
+    def _reactive_inference(
+        self, messages: list[dict[str, str]], budget: float
+    ) -> Steps:
         assert self.model1 is not None, "Reactive LLM is not initialized!"
         sampling_params = self.model1_config.get("inference_parameters", {})
-        assert isinstance(self.llm1, OpenAI), "LLM1 is not an instance of OpenAI!"
+        assert self.llm1 is not None, "LLM1 is not initialized!"
         if self.time_unit == "token":
             if "max_completion_tokens" in sampling_params:
                 sampling_params["max_completion_tokens"] = min(
@@ -323,18 +725,34 @@ class BaseAgent:
                     self.internal_budget,
                     sampling_params.get("max_tokens", 80000),
                 )
-            text, token_num = self.generate(
-                self.llm1, self.model1, messages, sampling_params
-            )
+            try:
+                text, token_num = yield from self._generate(
+                    "llm1", self.model1, messages, sampling_params
+                )
+            except DeadlineExceeded as e:
+                print(f"Error: {e}")
+                return self._fallback(), 0
         else:
-            text, token_num = self.start_reactive_stream(
-                self.llm1,
-                self.model1,
-                messages,
-                sampling_params,
-                self.internal_budget,
-            )
-            time.sleep(budget - self.internal_budget)
+            # Retries share the reactive budget; the turn lasts as long anyway.
+            end = self.clock.time() + self.internal_budget
+            try:
+                text, token_num = yield from self._request(
+                    "llm1",
+                    lambda: (
+                        "start_reactive_stream",
+                        "llm1",
+                        self.model1,
+                        messages,
+                        sampling_params,
+                        end - self.clock.time(),
+                    ),
+                    end,
+                )
+            except DeadlineExceeded as e:
+                print(f"Error: {e}")
+                text, token_num = self._fallback(), 0
+                yield ("sleep", None, max(0.0, end - self.clock.time()))
+            yield ("sleep", None, budget - self.internal_budget)
         if "<think>" in text and "</think>" not in text:
             text += "</think>"
         if "oxed" in text.split("</think>")[-1]:
@@ -355,7 +773,7 @@ class BaseAgent:
             else:
                 new_params["max_tokens"] = 1
             try:
-                response = self.llm1.chat.completions.create(**new_params)
+                response = yield ("complete", "llm1", new_params)
                 if (
                     response.choices[0].message.content.strip()[0]
                     in self.prompts.ALL_ACTIONS
@@ -363,7 +781,7 @@ class BaseAgent:
                     text += response.choices[0].message.content.strip()[0] + "}"
                     break
             except Exception:
-                time.sleep(0.2)
+                yield ("sleep", None, 0.2)
             if max_attempt == 0:
                 text += self.prompts.DEFAULT_ACTION + "}"
         return text, token_num
@@ -371,19 +789,37 @@ class BaseAgent:
     def planning_inference(
         self, messages: list[dict[str, str]], budget: float, game_turn: int
     ) -> tuple[str, int, int]:
+        return self._run(self._planning_inference(messages, budget, game_turn))
+
+    async def aplanning_inference(
+        self, messages: list[dict[str, str]], budget: float, game_turn: int
+    ) -> tuple[str, int, int]:
+        return await self._arun(self._planning_inference(messages, budget, game_turn))
+
+    def _planning_inference(
+        self, messages: list[dict[str, str]], budget: float, game_turn: int
+    ) -> Steps:
         assert self.model2 is not None, "Planning LLM is not initialized!"
         token_num = 0
-        assert isinstance(self.llm2, OpenAI), "LLM2 is not an instance of OpenAI!"
+        assert self.llm2 is not None, "LLM2 is not initialized!"
         sampling_params = self.model2_config.get("inference_parameters", {})
         if self.time_unit == "token":
             if messages != []:
                 self.gen_turn = game_turn
                 self.gen_accum = -self.internal_budget
-                self.gen_text, self.gen_token_num = self.generate(
-                    self.llm2, self.model2, messages, sampling_params
-                )
+                try:
+                    self.gen_text, self.gen_token_num = yield from self._generate(
+                        "llm2", self.model2, messages, sampling_params
+                    )
+                except DeadlineExceeded as e:
+                    # No plan this time; it is requested again next turn.
+                    print(f"Error: {e}")
+                    self.request_stats["fallback"] = 1
+                    self.gen_text, self.gen_token_num = "", 0
                 if self.tokenizer is not None:
-                    self.gen_token = self.tokenizer.encode(self.gen_text)
+                    self.gen_ends = token_ends(self.tokenizer, self.gen_text)
+                    if self.gen_ends is None:
+                        self.gen_token = self.tokenizer.encode(self.gen_text)
                 token_num = self.gen_token_num
             self.gen_accum += budget
             can_flush = (
@@ -393,9 +829,12 @@ class BaseAgent:
                 self.to_flush_turn = self.gen_turn
                 if self.gen_accum >= self.gen_token_num:
                     self.to_flush = self.gen_text
+                elif self.gen_ends is not None:
+                    prefix = int(min(max(self.gen_accum, 0), len(self.gen_ends) - 1))
+                    self.to_flush = self.gen_text[: self.gen_ends[prefix]]
                 elif self.tokenizer is not None:
                     self.to_flush = self.tokenizer.decode(
-                        self.gen_token[: self.gen_accum],
+                        self.gen_token[: int(self.gen_accum)],
                         skip_special_tokens=True,
                     )
             text = self.to_flush
@@ -407,11 +846,16 @@ class BaseAgent:
         else:
             if messages != []:
                 self.gen_turn = game_turn
-                self.start_planning_stream(
-                    self.llm2, self.model2, messages, sampling_params
+                yield (
+                    "start_planning_stream",
+                    "llm2",
+                    self.model2,
+                    messages,
+                    sampling_params,
+                    self._breaker("llm2"),
                 )
-            time.sleep(budget - self.internal_budget)
-            new_text, token_num = self.get_planning_chunks()
+            yield ("sleep", None, budget - self.internal_budget)
+            new_text, token_num = yield ("get_planning_chunks", None)
             self.gen_text += new_text
             text = self.gen_text
             turn = self.gen_turn
@@ -420,6 +864,143 @@ class BaseAgent:
         return text, token_num, turn
 
 
+class PlanningStream:
+    """
+    Text of a planning stream, parsed by the thread (or task) reading it.
+
+    The reader appends each chunk's text to `segments` (reasoning wrapped in
+    <think> tags), stamped with its arrival time on the agent's clock, and
+    keeps the token counts of the usage reports; the turn loop takes the
+    segments added since its last `take()`. The reader only appends and the
+    turn loop only reads up to the length it saw, so no lock is needed (list
+    appends and attribute reads are atomic in CPython).
+    """
+
+    def __init__(self) -> None:
+        self.segments: list[str] = []
+        self.arrivals: list[float] = []
+        self.usage: list[int] = []
+        self.usage_arrivals: list[float] = []
+        self.reasoning = False
+        # Arrival of the last chunk added
+        self.latest = float("-inf")
+        self.done = threading.Event()
+        self.progress = threading.Event()
+        # Segments and usage reports already taken by the turn loop
+        self.taken = 0
+        self.usage_taken = 0
+
+    def _append(self, segment: str, arrival: float) -> None:
+        self.arrivals.append(arrival)
+        self.segments.append(segment)
+
+    def add(self, chunk: Any, arrival: float = 0.0) -> None:  # noqa: ANN401
+        if chunk.choices:
+            delta = chunk.choices[0].delta
+            reasoning = getattr(delta, "reasoning_content", None)
+            if reasoning is not None:
+                if not self.reasoning:
+                    self._append("<think>", arrival)
+                    self.reasoning = True
+                self._append(reasoning, arrival)
+            content = getattr(delta, "content", None)
+            if content is not None:
+                if self.reasoning:
+                    self._append("\n</think>\n", arrival)
+                    self.reasoning = False
+                self._append(content, arrival)
+        usage = getattr(chunk, "usage", None)
+        if usage is not None:
+            self.usage_arrivals.append(arrival)
+            self.usage.append(usage.completion_tokens)
+        self.latest = arrival
+        self.progress.set()
+
+    def finish(self) -> None:
+        """Mark the stream as ended (or failed)."""
+        self.done.set()
+        self.progress.set()
+
+    def ready(self, until: float) -> bool:
+        """Whether every chunk arriving by `until` has been added."""
+        return self.done.is_set() or self.latest > until
+
+    def wait(self, until: float) -> None:
+        """Block until `ready(until)`."""
+        while True:
+            self.progress.clear()
+            if self.ready(until):
+                return
+            self.progress.wait(0.1)
+
+    def take(self, until: Optional[float] = None) -> tuple[str, int]:
+        """
+        Text added since the last call, and the completion tokens reported
+        since then (0 if none were).
+
+        Args:
+            until: Take only what arrived by this time (default: everything)
+        """
+        end, reports = len(self.segments), len(self.usage)
+        if until is not None:
+            end = bisect.bisect_right(self.arrivals, until, self.taken, end)
+            reports = bisect.bisect_right(
+                self.usage_arrivals, until, self.usage_taken, reports
+            )
+        text = "".join(self.segments[self.taken : end])
+        self.taken = end
+        token_num = 0
+        if reports > self.usage_taken:
+            self.usage_taken = reports
+            token_num = self.usage[reports - 1]
+        return text, token_num
+
+    def finished(self) -> bool:
+        """Whether the stream ended and everything in it was taken."""
+        return (
+            self.done.is_set()
+            and self.taken == len(self.segments)
+            and self.usage_taken == len(self.usage)
+        )
+
+
+def token_ends(tokenizer: Any, text: str) -> Optional[list[int]]:  # noqa: ANN401
+    """
+    End in `text` of each token prefix, from a fast tokenizer's offsets.
+
+    `text[: ends[k]]` is the text of the first k tokens of `tokenizer.encode(text)`
+    (special tokens count, but add no text), so a growing prefix is a slice
+    rather than a decode of all its tokens. None for tokenizers without offsets.
+    """
+    if not getattr(tokenizer, "is_fast", False):
+        return None
+    offsets = tokenizer(text, return_offsets_mapping=True)["offset_mapping"]
+    ends = [0]
+    for _, end in offsets:
+        ends.append(max(ends[-1], end))
+    return ends
+
+
+def response_text(response: Any, model: str) -> tuple[str, int]:  # noqa: ANN401
+    """Text (reasoning in <think> tags) and completion tokens of a response."""
+    text = ""
+    if (
+        hasattr(response.choices[0].message, "reasoning_content")
+        and response.choices[0].message.reasoning_content is not None
+    ):
+        text = (
+            "<think>" + response.choices[0].message.reasoning_content + "\n</think>\n"
+        )
+    if response.choices[0].message.content is not None:
+        text += response.choices[0].message.content
+    if "gemini" in model:
+        ### GEMINI EXCEPTION: completion_tokens do not include thinking tokens
+        token_num = response.usage.total_tokens - response.usage.prompt_tokens
+    else:
+        token_num = response.usage.completion_tokens
+    return text, token_num
+
+
 def extract_boxed(text: str, default_value: str = "") -> str:
     """
     Extracts the \boxed{...} text from the input string.
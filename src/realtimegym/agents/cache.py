@@ -0,0 +1,342 @@
+"""
+Persistent store of model responses, for re-running sweeps offline.
+
+Responses are addressed by a hash of the request (model, messages and
+sampling parameters) together with a namespace, the episode's log file name,
+and the number of identical requests the episode made before. A re-run of an
+episode therefore meets the responses of the original run in the same order,
+even with sampling temperatures above zero. Streams are stored with the
+arrival time of each chunk, so that replays respect time budgets (on the
+agent's clock, see `realtimegym.agents.clock`). A stream its reader stopped
+early, like a reactive answer cut by the budget, is stored up to the chunk
+read last; replaying it under the same budget stops there too. Reading it
+further (e.g. under a longer budget) makes the request again in record mode,
+and its stream replaces the stored one.
+
+Modes:
+- "record": answer from the store when possible, otherwise make the request
+  and store its response
+- "replay": answer only from the store, a missing response raises `CacheMiss`
+- "passthrough": make every request, store nothing
+
+The store is one SQLite file in WAL mode, which any number of processes can
+read and write concurrently.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from types import SimpleNamespace
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Generator,
+    Iterator,
+    Optional,
+)
+
+from realtimegym.agents.clock import arrival_offset
+
+MODES = ("record", "replay", "passthrough")
+
+
+class CacheMiss(Exception):
+    """A request has no stored response in replay mode."""
+
+
+def request_key(params: dict[str, Any], namespace: str = "") -> str:
+    """Hash of a chat completion request's parameters and a namespace."""
+    payload = json.dumps([namespace, params], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def encode_response(response: Any, offset: float) -> dict[str, Any]:  # noqa: ANN401
+    message = response.choices[0].message
+    usage = response.usage
+    return {
+        "offset": offset,
+        "reasoning_content": getattr(message, "reasoning_content", None),
+        "content": message.content,
+        "usage": {
+            "prompt_tokens": getattr(usage, "prompt_tokens", None),
+            "completion_tokens": getattr(usage, "completion_tokens", None),
+            "total_tokens": getattr(usage, "total_tokens", None),
+        },
+    }
+
+
+def decode_response(record: dict[str, Any]) -> SimpleNamespace:
+    """Stand-in for a ChatCompletion with the attributes agents read."""
+    message = SimpleNamespace(
+        reasoning_content=record["reasoning_content"], content=record["content"]
+    )
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=message)],
+        usage=SimpleNamespace(**record["usage"]),
+        offset=record.get("offset"),
+    )
+
+
+def encode_chunk(chunk: Any, offset: float) -> list[Any]:  # noqa: ANN401
+    """[seconds since the request, reasoning delta, content delta, tokens]."""
+    delta = chunk.choices[0].delta if chunk.choices else None
+    usage = getattr(chunk, "usage", None)
+    return [
+        offset,
+        getattr(delta, "reasoning_content", None),
+        getattr(delta, "content", None),
+        None if usage is None else usage.completion_tokens,
+    ]
+
+
+def decode_chunk(item: list[Any]) -> SimpleNamespace:
+    """
+    Stand-in for a ChatCompletionChunk with the attributes agents read, and
+    its arrival `offset` (see `realtimegym.agents.clock`).
+    """
+    offset, reasoning, content, tokens = item
+    delta = SimpleNamespace(reasoning_content=reasoning, content=content)
+    usage = None if tokens is None else SimpleNamespace(completion_tokens=tokens)
+    return SimpleNamespace(
+        choices=[SimpleNamespace(delta=delta)], usage=usage, offset=offset
+    )
+
+
+def _stream_text(chunks: list[list[Any]]) -> tuple[str, int]:
+    reasoning = "".join(item[1] for item in chunks if item[1] is not None)
+    content = "".join(item[2] for item in chunks if item[2] is not None)
+    tokens = [item[3] for item in chunks if item[3] is not None]
+    text = f"<think>{reasoning}\n</think>\n{content}" if reasoning else content
+    return text, tokens[-1] if tokens else 0
+
+
+class ResponseCache:
+    """
+    Responses stored in the SQLite database at `path`.
+
+    Args:
+        path: Database file, created if missing
+        mode: "record", "replay" or "passthrough"
+    """
+
+    def __init__(self, path: str, mode: str = "record") -> None:
+        if mode not in MODES:
+            raise ValueError(
+                f"Unknown cache mode: {mode}. Available modes: {', '.join(MODES)}"
+            )
+        self.path = path
+        self.mode = mode
+        self.local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        with self._connection() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, model TEXT, stream INTEGER, text TEXT, "
+                "token_num INTEGER, record TEXT, created REAL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection; forked children open their own."""
+        if getattr(self.local, "pid", None) != os.getpid():
+            db = sqlite3.connect(self.path, timeout=60)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self.local.db, self.local.pid = db, os.getpid()
+        return self.local.db
+
+    def lookup(self, key: str) -> Optional[Any]:  # noqa: ANN401
+        """
+        Stored record of `key`, or None if the request should be made.
+
+        Raises:
+            CacheMiss: In replay mode, if nothing is stored
+        """
+        if self.mode == "passthrough":
+            return None
+        row = (
+            self._connection()
+            .execute("SELECT record FROM responses WHERE key = ?", (key,))
+            .fetchone()
+        )
+        if row is None:
+            self.misses += 1
+            if self.mode == "replay":
+                raise CacheMiss(f"No stored response for request {key}.")
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def _put(
+        self,
+        key: str,
+        model: str,
+        stream: bool,
+        text: str,
+        token_num: int,
+        record: Any,  # noqa: ANN401
+        replace: bool = False,
+    ) -> None:
+        if self.mode != "record":
+            return
+        # Concurrent writers of the same request store the same response.
+        verb = "REPLACE" if replace else "IGNORE"
+        with self._connection() as db:
+            db.execute(
+                f"INSERT OR {verb} INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, stream, text, token_num, json.dumps(record), time.time()),
+            )
+
+    def store(
+        self,
+        key: str,
+        model: str,
+        response: Any,  # noqa: ANN401
+        start: float,
+    ) -> None:
+        """
+        Store a (non-streamed) chat completion.
+
+        Args:
+            start: `time.monotonic()` when the request was sent
+        """
+        from realtimegym.agents.base import response_text
+
+        text, token_num = response_text(response, model)
+        record = encode_response(response, arrival_offset(response, start))
+        self._put(key, model, False, text, token_num, record)
+
+    def record_stream(
+        self,
+        key: str,
+        model: str,
+        stream: Any,  # noqa: ANN401
+        start: float,
+        replace: bool = False,
+    ) -> Generator[Any, None, None]:
+        """
+        Pass a stream's chunks through, storing it once fully read, or up to
+        the last chunk read if closed early (e.g. at the end of a budget).
+
+        Args:
+            start: `time.monotonic()` when the request was sent
+            replace: Overwrite a stored response of `key`, e.g. a cut one
+        """
+        chunks = []
+        try:
+            for chunk in stream:
+                chunks.append(encode_chunk(chunk, arrival_offset(chunk, start)))
+                yield chunk
+        except GeneratorExit:
+            record = cut_record(chunks)
+            self._put(key, model, True, *_stream_text(chunks), record, replace)
+            raise
+        self._put(key, model, True, *_stream_text(chunks), chunks, replace)
+
+    async def arecord_stream(
+        self,
+        key: str,
+        model: str,
+        stream: Any,  # noqa: ANN401
+        start: float,
+        replace: bool = False,
+    ) -> AsyncGenerator[Any, None]:
+        chunks = []
+        try:
+            async for chunk in stream:
+                chunks.append(encode_chunk(chunk, arrival_offset(chunk, start)))
+                yield chunk
+        except GeneratorExit:
+            record = cut_record(chunks)
+            self._put(key, model, True, *_stream_text(chunks), record, replace)
+            raise
+        self._put(key, model, True, *_stream_text(chunks), chunks, replace)
+
+
+def cut_record(chunks: list[list[Any]]) -> dict[str, Any]:
+    """Record of a stream whose reader stopped after `chunks`."""
+    return {"chunks": chunks, "cut": True}
+
+
+def _replayed_chunks(record: Any) -> tuple[list[list[Any]], bool]:  # noqa: ANN401
+    """(chunks, whether the recording was cut) of a stored stream."""
+    if isinstance(record, dict):
+        return record["chunks"], record["cut"]
+    return record, False
+
+
+CUT_MESSAGE = (
+    "The stored stream was cut off when recorded; it was read further now, "
+    "e.g. under a longer budget."
+)
+
+
+def replay_stream(
+    record: Any,  # noqa: ANN401
+    resume: Optional[Callable[[], Generator[Any, None, None]]] = None,
+) -> Iterator[Any]:
+    """
+    A stored stream. Chunks come at once, with their recorded `offset`s; the
+    agent's clock waits for (or jumps to) each arrival.
+
+    Args:
+        resume: Makes the request again, for reads past the end of a stream
+            that was recorded only up to where its reader stopped; its chunks
+            after the stored ones follow
+
+    Raises:
+        CacheMiss: When read past the end of such a stream without `resume`
+    """
+    chunks, cut = _replayed_chunks(record)
+    for item in chunks:
+        yield decode_chunk(item)
+    if not cut:
+        return
+    if resume is None:
+        raise CacheMiss(CUT_MESSAGE)
+    stream = resume()
+    try:
+        for i, chunk in enumerate(stream):
+            if i >= len(chunks):
+                yield chunk
+    finally:
+        stream.close()
+
+
+async def areplay_stream(
+    record: Any,  # noqa: ANN401
+    resume: Optional[Callable[[], Awaitable[AsyncGenerator[Any, None]]]] = None,
+) -> AsyncIterator[Any]:
+    chunks, cut = _replayed_chunks(record)
+    for item in chunks:
+        yield decode_chunk(item)
+    if not cut:
+        return
+    if resume is None:
+        raise CacheMiss(CUT_MESSAGE)
+    stream = await resume()
+    try:
+        i = 0
+        async for chunk in stream:
+            if i >= len(chunks):
+                yield chunk
+            i += 1
+    finally:
+        await stream.aclose()
+
+
+# (path, mode) -> the process's cache
+_caches: dict[tuple[str, str], ResponseCache] = {}
+
+
+def open_cache(path: str, mode: str = "record") -> ResponseCache:
+    """The process-wide `ResponseCache` of a file and mode."""
+    if (path, mode) not in _caches:
+        _caches[(path, mode)] = ResponseCache(path, mode)
+    return _caches[(path, mode)]
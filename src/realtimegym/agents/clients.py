@@ -0,0 +1,208 @@
+"""
+Process-wide OpenAI clients, one per (base_url, api_key).
+
+Agents on the same endpoint (e.g. the reactive and the planning model of an
+AgileThinker, or every episode of an async sweep) share one connection pool,
+so turns after the first skip the TCP and TLS handshakes. `configure()` tunes
+the pools of the clients created after it; `connection_stats()` reports, per
+endpoint, how many requests reused a connection and the time spent in
+handshakes, which under a time budget is time lost to thinking.
+
+Clients are not carried over `fork()`: a child process starts with an empty
+registry, since sharing the parent's sockets would interleave their traffic.
+"""
+
+import os
+import threading
+import time
+import weakref
+from importlib.util import find_spec
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
+# Pool settings of the clients created from now on, see `configure()`
+_settings: dict[str, Any] = {
+    "max_connections": 1000,
+    "max_keepalive_connections": 100,
+    "keepalive_expiry": 60.0,
+    "http2": None,
+}
+
+# (base_url, api_key)
+Endpoint = tuple[Optional[str], str]
+
+_lock = threading.Lock()
+_clients: dict[Endpoint, "OpenAI"] = {}
+# event loop -> its AsyncOpenAI clients, since connections belong to a loop
+_async_clients: "weakref.WeakKeyDictionary[Any, dict[Endpoint, AsyncOpenAI]]" = (
+    weakref.WeakKeyDictionary()
+)
+# base_url -> statistics of the requests to it
+_stats: dict[Optional[str], "ConnectionStats"] = {}
+# Clients inherited over fork(); kept so that they are never closed here.
+_inherited: list[Any] = []
+
+
+class ConnectionStats:
+    """Requests, new connections and handshake time for one endpoint."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.connections = 0
+        self.connect_seconds = 0.0
+        self.tls_handshakes = 0
+        self.tls_seconds = 0.0
+
+    @property
+    def reused(self) -> int:
+        """Requests sent on an already open connection."""
+        return self.requests - self.connections
+
+    def as_dict(self) -> dict[str, float]:
+        return {
+            "requests": self.requests,
+            "reused": self.reused,
+            "connections": self.connections,
+            "connect_seconds": self.connect_seconds,
+            "tls_handshakes": self.tls_handshakes,
+            "tls_seconds": self.tls_seconds,
+        }
+
+
+def configure(**settings: Any) -> None:  # noqa: ANN401
+    """
+    Set the connection pool of the clients created from now on.
+
+    Args:
+        settings: Any of max_connections, max_keepalive_connections,
+                  keepalive_expiry (seconds an idle connection is kept) and
+                  http2 (True, False, or None to use it when the `h2`
+                  package is installed)
+    """
+    unknown = set(settings) - set(_settings)
+    if unknown:
+        raise ValueError(f"Unknown client settings: {', '.join(sorted(unknown))}")
+    _settings.update(settings)
+
+
+def connection_stats() -> dict[Optional[str], dict[str, float]]:
+    """Statistics of this process's requests, by base URL."""
+    with _lock:
+        return {url: stats.as_dict() for url, stats in _stats.items()}
+
+
+def _record(stats: ConnectionStats, started: dict[str, float], event: str) -> None:
+    """Account one httpcore trace event, e.g. "connection.start_tls.complete"."""
+    step, _, phase = event.rpartition(".")
+    if phase == "started":
+        started[step] = time.perf_counter()
+        return
+    if phase != "complete" or step not in started:
+        return
+    seconds = time.perf_counter() - started.pop(step)
+    with _lock:
+        if step.endswith("connect_tcp") or step.endswith("connect_unix_socket"):
+            stats.connections += 1
+            stats.connect_seconds += seconds
+        elif step.endswith("start_tls"):
+            stats.tls_handshakes += 1
+            stats.tls_seconds += seconds
+
+
+def _stats_for(base_url: Optional[str]) -> ConnectionStats:
+    with _lock:
+        return _stats.setdefault(base_url, ConnectionStats())
+
+
+def _http_options(base_url: Optional[str], asynchronous: bool) -> dict[str, Any]:
+    import httpx
+
+    stats = _stats_for(base_url)
+
+    def count(request: Any) -> Callable[..., Any]:  # noqa: ANN401
+        with _lock:
+            stats.requests += 1
+        started: dict[str, float] = {}
+        return lambda event, info: _record(stats, started, event)
+
+    if asynchronous:
+
+        async def hook(request: Any) -> None:  # noqa: ANN401
+            record = count(request)
+
+            async def trace(event: str, info: Any) -> None:  # noqa: ANN401
+                record(event, info)
+
+            request.extensions["trace"] = trace
+
+    else:
+
+        def hook(request: Any) -> None:  # noqa: ANN401
+            request.extensions["trace"] = count(request)
+
+    http2 = _settings["http2"]
+    return {
+        "limits": httpx.Limits(
+            max_connections=_settings["max_connections"],
+            max_keepalive_connections=_settings["max_keepalive_connections"],
+            keepalive_expiry=_settings["keepalive_expiry"],
+        ),
+        "http2": find_spec("h2") is not None if http2 is None else http2,
+        "event_hooks": {"request": [hook]},
+    }
+
+
+def create_client(base_url: Optional[str], api_key: str) -> "OpenAI":
+    """A new OpenAI client with its own pool, configured and counted as shared ones."""
+    import openai
+
+    http_client = openai.DefaultHttpxClient(**_http_options(base_url, False))
+    # Retries are the agents' (`realtimegym.agents.retry`), bounded by the turn.
+    return openai.OpenAI(
+        api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0
+    )
+
+
+def get_client(base_url: Optional[str], api_key: str) -> "OpenAI":
+    """The shared OpenAI client of an endpoint, created on first use."""
+    key = (base_url, api_key)
+    with _lock:
+        client = _clients.get(key)
+    if client is None:
+        client = create_client(base_url, api_key)
+        with _lock:
+            client = _clients.setdefault(key, client)
+    return client
+
+
+def get_async_client(base_url: Optional[str], api_key: str) -> "AsyncOpenAI":
+    """The shared AsyncOpenAI client of an endpoint on the running event loop."""
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.setdefault(loop, {})
+    key = (base_url, api_key)
+    if key not in clients:
+        import openai
+
+        http_client = openai.DefaultAsyncHttpxClient(**_http_options(base_url, True))
+        clients[key] = openai.AsyncOpenAI(
+            api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0
+        )
+    return clients[key]
+
+
+def _forget_clients() -> None:
+    global _lock
+    _lock = threading.Lock()
+    _inherited.extend(_clients.values())
+    _inherited.extend(_async_clients.values())
+    _clients.clear()
+    _async_clients.clear()
+    _stats.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_clients)
@@ -0,0 +1,88 @@
+"""
+Clocks of the seconds time unit.
+
+Agents read the time and wait through their `clock`. `RealClock` is the
+monotonic wall clock. `VirtualClock` is simulated: waiting advances it at once,
+so a 100-turn game at 8 seconds per turn plays at CPU speed.
+
+Responses are placed in time by their `offset`, the seconds between the
+request and their arrival. Replayed chunks of the response cache carry their
+recorded offsets, and `MockLLMServer` stamps what it sends; for anything else
+the offset is the real time the response took. A virtual clock jumps to each
+arrival, a real one waits for it, so the text a turn sees within its budget is
+the same under both.
+"""
+
+import asyncio
+import time
+from typing import Any, Union
+
+
+def arrival_offset(response: Any, real_start: float) -> float:  # noqa: ANN401
+    """
+    Seconds after its request at which a response (or chunk) arrives.
+
+    Args:
+        real_start: `time.monotonic()` when the request was sent
+    """
+    offset = getattr(response, "offset", None)
+    return time.monotonic() - real_start if offset is None else offset
+
+
+class RealClock:
+    """Wall-clock time; waiting sleeps."""
+
+    virtual = False
+
+    def time(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            time.sleep(seconds)
+
+    async def asleep(self, seconds: float) -> None:
+        await asyncio.sleep(max(0.0, seconds))
+
+    def arrive(self, start: float, offset: float) -> None:
+        """Wait until `offset` seconds after `start`."""
+        self.sleep(start + offset - self.time())
+
+    async def aarrive(self, start: float, offset: float) -> None:
+        await self.asleep(start + offset - self.time())
+
+
+class VirtualClock:
+    """
+    Simulated time; waiting advances it without sleeping.
+
+    Args:
+        start: Initial reading, in seconds
+    """
+
+    virtual = True
+
+    def __init__(self, start: float = 0.0) -> None:
+        self.now = start
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += max(0.0, seconds)
+
+    async def asleep(self, seconds: float) -> None:
+        self.sleep(seconds)
+        await asyncio.sleep(0)  # still let other episodes run
+
+    def arrive(self, start: float, offset: float) -> None:
+        """Advance to `offset` seconds after `start`, unless that has passed."""
+        self.now = max(self.now, start + offset)
+
+    async def aarrive(self, start: float, offset: float) -> None:
+        self.arrive(start, offset)
+
+
+Clock = Union[RealClock, VirtualClock]
+
+CLOCKS = {"real": RealClock, "virtual": VirtualClock}
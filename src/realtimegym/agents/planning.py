@@ -1,7 +1,7 @@
 import re
 from typing import Any, Optional
 
-from .base import BaseAgent, extract_boxed
+from .base import BaseAgent, Steps, extract_boxed
 
 
 class PlanningAgent(BaseAgent):
@@ -27,7 +27,7 @@ class PlanningAgent(BaseAgent):
         for col in self.logs:
             self.logs[col] = self.logs[col][:final_step]
 
-    def think(self, timeout: Optional[float] = None) -> None:
+    def _think(self, timeout: Optional[float]) -> Steps:
         assert timeout is not None and self.current_observation is not None
         budget = timeout
 
@@ -44,7 +44,9 @@ class PlanningAgent(BaseAgent):
         else:
             messages = []
 
-        text, token_num, turn = self.planning_inference(messages, budget, game_turn)
+        text, token_num, turn = yield from self._planning_inference(
+            messages, budget, game_turn
+        )
         temp = extract_boxed(text)
         if temp != "":
             self.plan = re.sub(r"[^" + self.prompts.ALL_ACTIONS + "]", "", temp)
@@ -1,7 +1,7 @@
 import re
 from typing import Any, Optional
 
-from .base import BaseAgent, extract_boxed
+from .base import BaseAgent, Steps, extract_boxed
 
 
 class ReactiveAgent(BaseAgent):
@@ -11,7 +11,7 @@ class ReactiveAgent(BaseAgent):
         file: str,
         time_unit: str,
         model1_config: str,
-        internal_budget: int,
+        internal_budget: float,
     ) -> None:
         super().__init__(prompts, file, time_unit)
         self.config_model1(model1_config, internal_budget)
@@ -19,7 +19,7 @@ class ReactiveAgent(BaseAgent):
     def truncate_logs(self) -> None:
         return
 
-    def think(self, timeout: Optional[float] = None) -> None:
+    def _think(self, timeout: Optional[float]) -> Steps:
         assert self.current_observation is not None and timeout is not None
         budget = timeout
         observation = self.current_observation
@@ -27,7 +27,7 @@ class ReactiveAgent(BaseAgent):
             observation["state"], mode="reactive"
         )
         messages = [{"role": "user", "content": prompt_gen}]
-        text, token_num = self.reactive_inference(messages, budget)
+        text, token_num = yield from self._reactive_inference(messages, budget)
         self.action = re.sub(
             r"[^" + self.prompts.ALL_ACTIONS + "]", "", extract_boxed(text)
         )
@@ -0,0 +1,138 @@
+"""
+Retrying model requests within a turn's budget.
+
+`RetryPolicy` spaces out the attempts with jittered exponential backoff and
+gives up once the next attempt could not start before the turn's deadline, so
+the agent falls back to its default action instead of stalling the game.
+`CircuitBreaker`s are shared by every agent of the process that talks to the
+same endpoint: after repeated failures they stop requests to it for a while,
+instead of having every agent keep hammering a degraded endpoint.
+"""
+
+import random
+import threading
+import time
+from typing import Any, Optional
+
+
+class DeadlineExceeded(Exception):
+    """No attempt can be made before the deadline of the turn."""
+
+
+class RetryPolicy:
+    """
+    Jittered exponential backoff.
+
+    The n-th retry waits a uniformly random time up to
+    `min(max_delay, base_delay * multiplier ** n)` ("full jitter"), so the
+    agents that failed together do not retry together.
+
+    Args:
+        base_delay: Cap of the first wait, in seconds
+        max_delay: Largest cap of any wait, in seconds
+        multiplier: Growth of the cap per retry
+        max_wait: Seconds after the first attempt past which no retry starts,
+                  for requests without a deadline of their own (token budgets)
+        failure_threshold: Consecutive failures that open an endpoint's circuit
+        reset_timeout: Seconds an open circuit rejects requests
+    """
+
+    def __init__(
+        self,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        multiplier: float = 2.0,
+        max_wait: Optional[float] = 300.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+    ) -> None:
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.max_wait = max_wait
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.random = random.Random()
+
+    def delay(self, retry: int) -> float:
+        """Seconds to wait before retry number `retry` (from 0)."""
+        cap = min(self.max_delay, self.base_delay * self.multiplier**retry)
+        return self.random.uniform(0, cap)
+
+
+class CircuitBreaker:
+    """
+    Failure counter of one endpoint.
+
+    Closed, it lets requests through; `failure_threshold` failures in a row
+    open it, and it rejects requests for `reset_timeout` seconds. Then one
+    trial request is let through (half-open): its success closes the circuit,
+    its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial = False
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now."""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.trial or time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.trial = True
+            return True
+
+    def retry_at(self) -> float:
+        """`time.monotonic()` at which the open circuit lets a trial through."""
+        with self.lock:
+            if self.opened_at is None:
+                return time.monotonic()
+            return self.opened_at + self.reset_timeout
+
+    def record_success(self) -> None:
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial = False
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            if self.trial or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.trial = False
+
+    def release(self) -> None:
+        """End a request that says nothing about the endpoint, e.g. a cache
+        miss; a trial it was lets the next request through."""
+        with self.lock:
+            self.trial = False
+
+
+# base_url -> breaker shared by the agents of this process
+_breakers: dict[Optional[str], CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def circuit_breaker(
+    base_url: Optional[str], policy: Optional[RetryPolicy] = None
+) -> CircuitBreaker:
+    """The process-wide breaker of an endpoint, created with `policy`'s settings."""
+    with _breakers_lock:
+        if base_url not in _breakers:
+            policy = policy or RetryPolicy()
+            _breakers[base_url] = CircuitBreaker(
+                policy.failure_threshold, policy.reset_timeout
+            )
+        return _breakers[base_url]
+
+
+def retry_policy(config: dict[str, Any]) -> RetryPolicy:
+    """The policy of a model config's optional `retry:` section."""
+    return RetryPolicy(**config.get("retry", {}))
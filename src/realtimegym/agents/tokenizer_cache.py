@@ -0,0 +1,108 @@
+"""
+Tokenizers of planning models, loaded once per process from a local copy.
+
+The first `load_tokenizer()` of a hub name saves the tokenizer in the
+tokenizer directory ($REALTIMEGYM_TOKENIZER_DIR, by default
+~/.cache/realtimegym/tokenizers). Later loads, in any process, read that copy
+and never contact the hub, so machines without network access can run once
+the tokenizers were preloaded, e.g. with
+
+    python -m realtimegym.agents.tokenizer_cache configs/*-planning.yaml
+
+Delete a tokenizer's directory to fetch it again.
+"""
+
+import argparse
+import functools
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Iterable
+
+import yaml
+
+DEFAULT_DIR = os.path.join("~", ".cache", "realtimegym", "tokenizers")
+
+
+def tokenizer_dir() -> str:
+    """Directory holding the local copies of tokenizers."""
+    return os.path.expanduser(os.environ.get("REALTIMEGYM_TOKENIZER_DIR", DEFAULT_DIR))
+
+
+def local_path(name: str) -> str:
+    """Where the copy of hub tokenizer `name` is kept, e.g. .../deepseek-ai--DeepSeek-R1."""
+    return os.path.join(tokenizer_dir(), name.replace("/", "--"))
+
+
+def _save(tokenizer: Any, path: str) -> None:  # noqa: ANN401
+    """Save a copy at `path`, all at once so concurrent loaders never see half."""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        staging = tempfile.mkdtemp(dir=os.path.dirname(path), prefix=".staging-")
+        tokenizer.save_pretrained(staging)
+        try:
+            os.rename(staging, path)
+        except OSError:  # another process saved it first
+            shutil.rmtree(staging, ignore_errors=True)
+    except OSError as e:
+        print(f"Warning: could not keep a local copy of the tokenizer: {e}")
+
+
+@functools.lru_cache(maxsize=None)
+def load_tokenizer(name: str) -> Any:  # noqa: ANN401
+    """
+    `AutoTokenizer.from_pretrained(name)`, loaded once per process.
+
+    Args:
+        name: Hub name (read from, or saved to, the local copy) or a directory
+    """
+    from transformers import AutoTokenizer
+
+    if os.path.isdir(name):
+        return AutoTokenizer.from_pretrained(name)
+    path = local_path(name)
+    if os.path.isdir(path):
+        return AutoTokenizer.from_pretrained(path, local_files_only=True)
+    tokenizer = AutoTokenizer.from_pretrained(name)
+    _save(tokenizer, path)
+    return tokenizer
+
+
+def config_tokenizers(sources: Iterable[str]) -> list[str]:
+    """Tokenizer names in model config files, or the sources themselves."""
+    names = []
+    for source in sources:
+        if source.endswith((".yaml", ".yml")) and os.path.isfile(source):
+            with open(source, "r") as f:
+                config = yaml.safe_load(f) or {}
+            if "tokenizer" in config:
+                names.append(config["tokenizer"])
+        else:
+            names.append(source)
+    return list(dict.fromkeys(names))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Save local copies of tokenizers, for running offline."
+    )
+    parser.add_argument(
+        "sources", nargs="+", help="Model config files or tokenizer names"
+    )
+    parser.add_argument(
+        "--tokenizer_dir", type=str, default=None, help=f"Default: {DEFAULT_DIR}"
+    )
+    args = parser.parse_args()
+    if args.tokenizer_dir is not None:
+        os.environ["REALTIMEGYM_TOKENIZER_DIR"] = args.tokenizer_dir
+
+    for name in config_tokenizers(args.sources):
+        start = time.perf_counter()
+        load_tokenizer(name)
+        where = name if os.path.isdir(name) else local_path(name)
+        print(f"{name}: {where} ({time.perf_counter() - start:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
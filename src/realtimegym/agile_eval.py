@@ -1,25 +1,32 @@
 import argparse
+import asyncio
+import functools
 import importlib
 import importlib.util
+import multiprocessing as mp
 import os
 import sys
 import time
 from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 from types import ModuleType
-from typing import Any
+from typing import Any, AsyncIterator, Optional
 
-import pandas as pd
-import pygame
 import yaml
-from PIL import Image
 
 import realtimegym
 from realtimegym.agents.agile import AgileThinker
+from realtimegym.agents.base import snapshot_file
+from realtimegym.agents.cache import MODES as CACHE_MODES
+from realtimegym.agents.cache import open_cache
+from realtimegym.agents.clock import CLOCKS
 from realtimegym.agents.planning import PlanningAgent
 from realtimegym.agents.reactive import ReactiveAgent
+from realtimegym.agents.tokenizer_cache import load_tokenizer
+from realtimegym.environments.base import append_snapshot, load_snapshots
 
 
+@functools.lru_cache(maxsize=None)
 def _load_prompt_module(specifier: str) -> ModuleType:
     """
     Load prompt module from:
@@ -77,7 +84,7 @@ def check_args(args: argparse.Namespace) -> None:
     )
 
 
-def game_loop(file: str, raw_seed: int, args: argparse.Namespace) -> dict[str, Any]:
+def _env_id(args: argparse.Namespace) -> str:
     version = (
         "0"
         if args.cognitive_load == "E"
@@ -85,9 +92,50 @@ def game_loop(file: str, raw_seed: int, args: argparse.Namespace) -> dict[str, A
         if args.cognitive_load == "M"
         else "2"
     )
+    return f"{args.game.capitalize()}-v{version}"
+
+
+def warm_up(instances: list[tuple[str, int, argparse.Namespace]]) -> None:
+    """
+    Do once, in this process, the setup that every episode repeats.
+
+    Imports the agent stack, loads prompt modules and tokenizers, and plays a
+    reset of each environment, which also computes the Overcooked planner
+    tables. Workers forked afterwards start with all of it in memory.
+    """
+    import openai  # noqa: F401
+    import pandas  # noqa: F401
+
+    done = set()
+    for _, _, args in instances:
+        key = (_env_id(args), args.prompt_config, args.planning_model_config)
+        if key in done:
+            continue
+        done.add(key)
+        env, _, render = realtimegym.make(
+            _env_id(args), render=args.save_trajectory_gifs
+        )
+        env.reset()
+        if render is not None:
+            import pygame  # noqa: F401
+            from PIL import Image  # noqa: F401
+        with open(args.prompt_config, "r") as f:
+            prompt_config = yaml.safe_load(f)
+        if args.game in prompt_config:
+            _load_prompt_module(prompt_config[args.game])
+        if args.mode != "reactive" and args.planning_model_config is not None:
+            with open(args.planning_model_config, "r") as f:
+                model_config = yaml.safe_load(f)
+            if "tokenizer" in model_config:
+                load_tokenizer(model_config["tokenizer"])
 
+
+def _start_episode(
+    file: str, raw_seed: int, args: argparse.Namespace
+) -> tuple[Any, int, Any, Any, dict[str, Any], bool]:
+    """(env, seed, renderer, agent, first observation, done) of one episode."""
     env, seed, render = realtimegym.make(
-        f"{args.game.capitalize()}-v{version}",
+        _env_id(args),
         seed=raw_seed,
         render=args.save_trajectory_gifs,
     )
@@ -121,45 +169,48 @@ def game_loop(file: str, raw_seed: int, args: argparse.Namespace) -> dict[str, A
         agent = AgileThinker(**params)  # type: ignore
     else:
         raise NotImplementedError("mode not recognized.")
+    if args.cache is not None:
+        # Episodes are told apart by their log file name, e.g. "0_3.csv".
+        agent.use_cache(open_cache(args.cache, args.cache_mode), os.path.basename(file))
+    agent.clock = CLOCKS[args.clock]()
 
     if args.checkpoint is not None:  # resume from checkpoint
         checkpoint_file = file.replace(args.log_dir, args.checkpoint)
-        df = pd.read_csv(checkpoint_file)
-        obs, done = env.reset()
-        for a in df["action"]:
-            obs, done, reward, reset_flag = env.step(a)
-        if done:
-            ret = {
-                "seed": seed,
-                "reward": env.reward,
-                "total_time": 0,
-                "log_dir": os.path.dirname(file),
-            }
-            return ret
+        if os.path.exists(snapshot_file(checkpoint_file)):
+            env.reset()
+            env.set_state(load_snapshots(snapshot_file(checkpoint_file))[-1])
+            obs, done = env.observe(), env.terminal
         else:
-            env, seed, render = realtimegym.make(
-                f"{args.game.capitalize()}-v{version}",
-                seed=raw_seed,
-                render=args.save_trajectory_gifs,
-            )
-            agent.resume_from_checkpoint(env, checkpoint_file)
-    start_time = time.time()
-    surfaces = []
+            import pandas as pd
+
+            df = pd.read_csv(checkpoint_file)
+            obs, done = env.reset()
+            for a in df["action"]:
+                obs, done, reward, reset_flag = env.step(a)
+        if done:
+            return env, seed, render, agent, obs, done
+        agent.resume_from_checkpoint(env, checkpoint_file)
+        obs, done = env.observe(), env.terminal
+    else:
+        obs, done = env.reset()
+        if os.path.exists(snapshot_file(file)):
+            os.remove(snapshot_file(file))
+        append_snapshot(snapshot_file(file), env.get_state())
+    return env, seed, render, agent, obs, done
+
+
+def _finish_episode(
+    file: str,
+    env: Any,  # noqa: ANN401
+    seed: int,
+    surfaces: list,
+    total_time: float,
+    agent: Any = None,  # noqa: ANN401
+) -> dict[str, Any]:
+    if surfaces:
+        import pygame
+        from PIL import Image
 
-    # New API loop: obs, done = env.reset()
-    obs, done = env.reset()
-    if render is not None:
-        surfaces.append(render.render(env))
-    while not done:
-        agent.observe(obs)
-        agent.think(timeout=args.time_pressure)
-        action = agent.act()
-        obs, done, reward, reset_flag = env.step(action)
-        env.summary()
-        agent.log(reward, reset_flag)
-        if render is not None:
-            surfaces.append(render.render(env))
-    if render is not None:
         gif_path = file.replace(".csv", ".gif")
         images = [pygame.surfarray.array3d(surface) for surface in surfaces]
         pil_images = [
@@ -172,14 +223,128 @@ def game_loop(file: str, raw_seed: int, args: argparse.Namespace) -> dict[str, A
             duration=1000,
             loop=0,
         )
-    ret = {
+    result = {
         "seed": seed,
         "reward": env.reward,
-        "total_time": time.time() - start_time,
+        "total_time": total_time,
         "log_dir": os.path.dirname(file),
     }
-    del env
-    return ret
+    if agent is not None and agent.cache is not None:
+        result["requests"] = sum(agent.cache_counts.values())
+        result["cache_hits"] = agent.cache_hits
+    return result
+
+
+def game_loop(file: str, raw_seed: int, args: argparse.Namespace) -> dict[str, Any]:
+    env, seed, render, agent, obs, done = _start_episode(file, raw_seed, args)
+    if done:  # finished before the checkpoint was taken
+        return _finish_episode(file, env, seed, [], 0)
+    start_time = time.time()
+    surfaces = []
+
+    if render is not None:
+        surfaces.append(render.render(env))
+    while not done:
+        agent.observe(obs)
+        agent.think(timeout=args.time_pressure)
+        action = agent.act()
+        obs, done, reward, reset_flag = env.step(action)
+        env.summary()
+        agent.log(reward, reset_flag)
+        append_snapshot(snapshot_file(file), env.get_state())
+        if render is not None:
+            surfaces.append(render.render(env))
+    return _finish_episode(file, env, seed, surfaces, time.time() - start_time, agent)
+
+
+async def async_game_loop(
+    file: str, raw_seed: int, args: argparse.Namespace
+) -> dict[str, Any]:
+    """`game_loop()` on the event loop, awaiting the agent's model calls."""
+    env, seed, render, agent, obs, done = _start_episode(file, raw_seed, args)
+    if done:
+        return _finish_episode(file, env, seed, [], 0)
+    start_time = time.time()
+    surfaces = []
+
+    if render is not None:
+        surfaces.append(render.render(env))
+    while not done:
+        agent.observe(obs)
+        await agent.athink(timeout=args.time_pressure)
+        action = agent.act()
+        obs, done, reward, reset_flag = env.step(action)
+        env.summary()
+        await agent.alog(reward, reset_flag)
+        append_snapshot(snapshot_file(file), env.get_state())
+        if render is not None:
+            surfaces.append(render.render(env))
+    return _finish_episode(file, env, seed, surfaces, time.time() - start_time, agent)
+
+
+def chain_episodes(
+    instances: list[tuple[str, int, argparse.Namespace]],
+) -> list[list[tuple[str, int, argparse.Namespace]]]:
+    """
+    Group the episodes that settings of a sweep play from the same start.
+
+    Episodes of the same game, cognitive load and log file name (repeat and
+    seed) start from the same state, and settings that differ only in their
+    budgets make identical requests until their actions first differ. With
+    `--time_unit token` that includes each planning generation started from
+    a shared state, since the budget only decides how much of it is revealed
+    per turn. Played one after another with a response cache, the first
+    episode of a chain records these requests and the others replay them.
+    With `--time_unit seconds`, a longer budget reads on past the reactive
+    streams a shorter one cut, and makes the rest of those requests.
+    """
+    chains: dict[tuple[str, str], list[tuple[str, int, argparse.Namespace]]] = {}
+    for file, seed, args in instances:
+        key = (os.path.basename(file), _env_id(args))
+        chains.setdefault(key, []).append((file, seed, args))
+    return list(chains.values())
+
+
+def play_chain(
+    chain: list[tuple[str, int, argparse.Namespace]],
+) -> list[dict[str, Any]]:
+    """Play episodes one after another, see `chain_episodes()`."""
+    return [game_loop(*episode) for episode in chain]
+
+
+async def run_async(
+    instances: list[tuple[str, int, argparse.Namespace]],
+    max_concurrency: Optional[int] = None,
+    chain: bool = False,
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    Play episodes concurrently on the running event loop.
+
+    Args:
+        instances: (log file, seed, args) of each episode
+        max_concurrency: Episodes in flight at once (default: all)
+        chain: Play the episodes of each of `chain_episodes()` one after another
+
+    Yields:
+        The result of each episode, in order of completion
+    """
+    chains = chain_episodes(instances) if chain else [[i] for i in instances]
+    slots = asyncio.Semaphore(max_concurrency or len(chains))
+
+    async def play(
+        episodes: list[tuple[str, int, argparse.Namespace]],
+    ) -> list[dict[str, Any]]:
+        async with slots:
+            return [await async_game_loop(*episode) for episode in episodes]
+
+    tasks = [asyncio.ensure_future(play(episodes)) for episodes in chains]
+    try:
+        for task in asyncio.as_completed(tasks):
+            for result in await task:
+                yield result
+    finally:
+        for task in tasks:
+            task.cancel()
 
 
 def main() -> None:
@@ -212,7 +377,70 @@ def main() -> None:
     args.add_argument("--settings", type=str, nargs="+", default=[])
     args.add_argument("--instance_num", type=int, default=None)
     args.add_argument("--checkpoint", type=str, default=None)
+    args.add_argument(
+        "--num_workers",
+        type=int,
+        default=None,
+        help="Worker processes, each running episodes one after the other "
+        "(default: one per episode)",
+    )
+    args.add_argument(
+        "--runtime",
+        type=str,
+        choices=["process", "async"],
+        default="process",
+        help="Run episodes in worker processes, or all of them in this "
+        "process on one event loop",
+    )
+    args.add_argument(
+        "--max_concurrency",
+        type=int,
+        default=None,
+        help="Episodes in flight at once with --runtime async (default: all)",
+    )
+    args.add_argument(
+        "--cache",
+        type=str,
+        default=None,
+        help="SQLite file storing model responses, to re-run sweeps offline",
+    )
+    args.add_argument(
+        "--cache_mode",
+        type=str,
+        choices=CACHE_MODES,
+        default="record",
+        help="record: store new responses; replay: only use stored ones; "
+        "passthrough: bypass the cache",
+    )
+    args.add_argument(
+        "--chain_budgets",
+        action="store_true",
+        help="Play the settings of each episode one after another, so that later "
+        "ones replay from --cache the requests (e.g. planning generations) an "
+        "earlier one made from the same state",
+    )
+    args.add_argument(
+        "--clock",
+        type=str,
+        choices=list(CLOCKS),
+        default="real",
+        help="Time of --time_unit seconds budgets; virtual skips the waits, for "
+        "replaying cached responses or mock servers run with --no_wait",
+    )
+    args.add_argument(
+        "--tokenizer_dir",
+        type=str,
+        default=None,
+        help="Local copies of tokenizers, read instead of the hub "
+        "(default: $REALTIMEGYM_TOKENIZER_DIR or ~/.cache/realtimegym/tokenizers)",
+    )
     args = args.parse_args()
+    assert args.cache is not None or not args.chain_budgets, (
+        "--chain_budgets shares requests through --cache."
+    )
+    if args.tokenizer_dir is not None:
+        # Set for the workers too, forked or spawned.
+        os.environ["REALTIMEGYM_TOKENIZER_DIR"] = args.tokenizer_dir
     if args.settings == []:
         args.settings = [
             f"{args.game}_{args.cognitive_load}_{args.time_pressure}_{args.mode}_{args.internal_budget}"
@@ -243,24 +471,43 @@ def main() -> None:
                 f.write("\n")
     if args.instance_num is not None:
         assert args.instance_num == len(instance), "instance_num incorrect!"
-    with ProcessPoolExecutor(max_workers=len(instance)) as executor:
-        futures = [
-            executor.submit(game_loop, log_file, seed, args)
-            for (log_file, seed, args) in instance
-        ]
-        results = []
-        total = len(futures)
-        for idx, future in enumerate(as_completed(futures), 1):
-            result = future.result()
-            log_dir = result["log_dir"]
-            # remove log_dir from result
-            del result["log_dir"]
-            results.append(result)
-            with open(f"{log_dir}/args.log", "a") as f:
-                for key, value in result.items():
-                    f.write(f"{key}: {value} ")
-                f.write("\n-----------------------------\n")
-            print(f"Progress: {idx}/{total} ({idx / total * 100:.2f}%)")
+    if not instance:
+        return
+    # Workers fork from this warmed-up process and are reused across episodes.
+    warm_up(instance)
+    total = len(instance)
+    if args.runtime == "async":
+
+        async def run() -> None:
+            idx = 0
+            async for result in run_async(
+                instance, args.max_concurrency, args.chain_budgets
+            ):
+                idx += 1
+                _report(result, idx, total)
+
+        asyncio.run(run())
+        return
+    context = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else None
+    chains = chain_episodes(instance) if args.chain_budgets else [[i] for i in instance]
+    num_workers = min(args.num_workers or len(chains), len(chains))
+    with ProcessPoolExecutor(max_workers=num_workers, mp_context=context) as executor:
+        futures = [executor.submit(play_chain, chain) for chain in chains]
+        idx = 0
+        for future in as_completed(futures):
+            for result in future.result():
+                idx += 1
+                _report(result, idx, total)
+
+
+def _report(result: dict[str, Any], idx: int, total: int) -> None:
+    """Append an episode's result to its args.log and print the progress."""
+    log_dir = result.pop("log_dir")
+    with open(f"{log_dir}/args.log", "a") as f:
+        for key, value in result.items():
+            f.write(f"{key}: {value} ")
+        f.write("\n-----------------------------\n")
+    print(f"Progress: {idx}/{total} ({idx / total * 100:.2f}%)")
 
 
 if __name__ == "__main__":
@@ -1,15 +1,119 @@
-from typing import Any, NoReturn
+import copy
+import pickle
+import weakref
+from typing import Any, Iterator, NoReturn, Optional
 
 import numpy as np
 
+# Placeholder stored under a field that has not been computed yet
+_PENDING = object()
+
+
+class Observation(dict[str, Any]):
+    """
+    Observation whose text and state fields are computed on first access.
+
+    Behaves like the plain dict returned before: `obs["state"]`, `get`,
+    iteration, `dict(obs)`, JSON and pickling all see the computed values.
+    Each lazy field is computed at most once and then cached. An agent that
+    only reads `game_turn`, or nothing, never pays for `state_string()`.
+    """
+
+    # Field name -> environment method that computes it
+    lazy_fields = {"state_string": "state_string", "state": "state_builder"}
+
+    def __init__(self, source: Optional["BaseEnv"] = None, **values: Any) -> None:  # noqa: ANN401
+        """
+        Args:
+            source: Environment the lazy fields are computed from; None for an
+                observation that only holds the given values
+            values: Fields known up front, e.g. `game_turn`
+        """
+        super().__init__()
+        self.source = source
+        if source is not None:
+            for key in self.lazy_fields:
+                super().__setitem__(key, _PENDING)
+        self.update(values)
+
+    @property
+    def pending(self) -> bool:
+        """Whether some field has not been computed yet."""
+        return any(value is _PENDING for value in super().values())
+
+    def __getitem__(self, key: str) -> Any:  # noqa: ANN401
+        value = super().__getitem__(key)
+        if value is _PENDING:
+            value = getattr(self.source, self.lazy_fields[key])()
+            super().__setitem__(key, value)
+        return value
+
+    def get(self, key: object, default: Any = None) -> Any:  # noqa: ANN401
+        return self[key] if isinstance(key, str) and key in self else default
+
+    def __iter__(self) -> Iterator[str]:
+        # Overriding __iter__ also makes dict(obs) and {**obs} go through
+        # keys() and __getitem__ instead of copying the placeholders.
+        return iter(self.keys())
+
+    def values(self) -> Any:  # noqa: ANN401
+        self.materialize()
+        return super().values()
+
+    def items(self) -> Any:  # noqa: ANN401
+        self.materialize()
+        return super().items()
+
+    def pop(self, key: object, *default: Any) -> Any:  # noqa: ANN401
+        if isinstance(key, str) and key in self:
+            self[key]
+        return super().pop(key, *default)
+
+    def setdefault(self, key: str, default: Any = None) -> Any:  # noqa: ANN401
+        if key in self:
+            return self[key]
+        return super().setdefault(key, default)
+
+    def copy(self) -> "Observation":
+        return copy.copy(self)
+
+    def materialize(self) -> "Observation":
+        """Compute every pending field."""
+        for key in super().keys():
+            self[key]
+        return self
+
+    def __eq__(self, other: object) -> bool:
+        self.materialize()
+        if isinstance(other, Observation):
+            other.materialize()
+        return super().__eq__(other)
+
+    def __ne__(self, other: object) -> bool:
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        self.materialize()
+        return f"{type(self).__name__}({dict.__repr__(self)})"
+
+    def __reduce__(self) -> tuple:
+        # Pickles and copies hold the values only, not the environment.
+        return (type(self), (), None, None, iter(self.items()))
+
 
 class BaseEnv:
+    # Attributes holding the episode state, saved by get_state()
+    state_fields: tuple[str, ...] = ("seed", "game_turn", "reward", "terminal")
+
     def __init__(self) -> None:
         self.random = np.random.RandomState()
         self.seed = 42
         self.terminal = False
         self.game_turn = 0
         self.reward = 0
+        self._observation: Optional[weakref.ref] = None
 
     def set_seed(self, seed: int) -> None:
         self.random = np.random.RandomState(seed)
@@ -55,11 +159,78 @@ class BaseEnv:
     def observe(self) -> dict[str, Any]:
         """
         Get the current observation.
+
+        `state_string` and `state` are only computed when first read, see
+        `Observation`.
         """
         if self.terminal:
             return {}
-        return {
-            "state_string": self.state_string(),
-            "game_turn": self.game_turn,
-            "state": self.state_builder(),
-        }
+        observation = Observation(self, game_turn=self.game_turn)
+        self._observation = weakref.ref(observation)
+        return observation
+
+    def detach_observation(self) -> None:
+        """
+        Pin the last observation to the current turn.
+
+        Called before the state changes (start of `reset()`, `step()` and
+        `set_state()`), so that fields read later still describe the turn the
+        observation was made on. If the observation is gone or fully
+        computed, this costs nothing.
+        """
+        observation = self._observation() if self._observation else None
+        self._observation = None
+        if observation is not None and observation.pending:
+            observation.source = self.frozen_copy()
+
+    def frozen_copy(self) -> "BaseEnv":
+        """
+        Copy that `state_string()` and `state_builder()` can still read after
+        this environment moves on.
+        """
+        frozen = copy.copy(self)
+        for name in self.state_fields:
+            setattr(frozen, name, copy.deepcopy(getattr(self, name)))
+        frozen._observation = None
+        return frozen
+
+    def get_state(self) -> dict[str, Any]:
+        """
+        Snapshot the episode, including the RNG state.
+
+        Returns:
+            A picklable dict that `set_state()` restores on an environment
+            created with the same arguments
+        """
+        state = {name: copy.deepcopy(getattr(self, name)) for name in self.state_fields}
+        state["random"] = self.random.get_state()
+        return state
+
+    def set_state(self, state: dict[str, Any]) -> None:
+        """
+        Restore a snapshot taken by `get_state()`.
+
+        The snapshot is copied, so it can be restored any number of times.
+        """
+        self.detach_observation()
+        for name in self.state_fields:
+            setattr(self, name, copy.deepcopy(state[name]))
+        self.random.set_state(state["random"])
+
+
+def append_snapshot(path: str, state: dict[str, Any]) -> None:
+    """Append a snapshot taken by `BaseEnv.get_state()` to a snapshot file."""
+    with open(path, "ab") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_snapshots(path: str, limit: Optional[int] = None) -> list[dict[str, Any]]:
+    """Read up to `limit` snapshots written by `append_snapshot()`, in order."""
+    snapshots = []
+    with open(path, "rb") as f:
+        while limit is None or len(snapshots) < limit:
+            try:
+                snapshots.append(pickle.load(f))
+            except EOFError:
+                break
+    return snapshots
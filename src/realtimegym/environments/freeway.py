@@ -1,9 +1,13 @@
-from typing import Any, Optional
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional
 
 import numpy as np
 
 from .base import BaseEnv
-from .render.freeway_render import FreewayRender
+
+if TYPE_CHECKING:
+    from .render.freeway_render import FreewayRender
 
 seed_mapping = {
     "E": {
@@ -39,20 +43,49 @@ seed_mapping = {
 }
 
 
+# Seeds per cognitive load, generated by `python -m realtimegym.solvers.freeway`.
+# The first 8 seeds of each load are the ones in `seed_mapping`.
+CATALOG_FILE = Path(__file__).parent / "freeway_seeds.json"
+_catalog: Optional[dict[str, list[int]]] = None
+
+
+def seed_catalog() -> dict[str, list[int]]:
+    global _catalog
+    if _catalog is None:
+        with open(CATALOG_FILE, "r") as f:
+            _catalog = json.load(f)["seeds"]
+    return _catalog
+
+
 def setup_env(
     seed: int, cognitive_load: str, save_trajectory_gifs: bool = False
-) -> tuple[BaseEnv, int, Optional[FreewayRender]]:
-    assert seed in seed_mapping[cognitive_load]
+) -> tuple[BaseEnv, int, Optional["FreewayRender"]]:
+    seeds = seed_catalog()[cognitive_load]
+    if not 0 <= seed < len(seeds):
+        raise ValueError(
+            f"Freeway seed must be in [0, {len(seeds)}) for cognitive load {cognitive_load}, got {seed}."
+        )
     env = FreewayEnv()
-    env.set_seed(seed_mapping[cognitive_load][seed])
+    env.set_seed(seeds[seed])
     render = None
     if save_trajectory_gifs:
+        from .render.freeway_render import FreewayRender
+
         render = FreewayRender()
-    return env, seed_mapping[cognitive_load][seed], render
+    return env, seeds[seed], render
 
 
 class FreewayEnv(BaseEnv):
+    state_fields = BaseEnv.state_fields + (
+        "chosen_freeways",
+        "chosen",
+        "cars",
+        "pos",
+        "new_car",
+    )
+
     def reset(self) -> tuple[dict[str, Any], bool]:
+        self.detach_observation()
         self.chosen_freeways = self.random.choice(range(0, 8), 8, replace=False)
         self.chosen = [True if i in self.chosen_freeways else False for i in range(8)]
         self._randomize_cars()
@@ -65,7 +98,8 @@ class FreewayEnv(BaseEnv):
 
     def _randomize_cars(self) -> None:
         directions = np.sign(self.random.rand(8) - 0.5).astype(int)
-        self.cars = []
+        # [x, lane, timer, speed, length]; all None but the lane if unused
+        self.cars: list[list[Any]] = []
         # Patterns:
         # 1. Random batch neighbour lanes, share same car distribution
         # 2. Each car distribution is one of with equal probability:
@@ -103,6 +137,7 @@ class FreewayEnv(BaseEnv):
 
     def step(self, a: str) -> tuple[dict[str, Any], bool, float, bool]:
         # return: (reward, reset)
+        self.detach_observation()
         self.r = False  # reset or not
         self.reward -= 1
         self.game_turn += 1
@@ -118,12 +153,25 @@ class FreewayEnv(BaseEnv):
             self.pos = 9
             self.terminal = True
             return self.observe(), self.terminal, self.reward, self.r
-        # Update cars
+        self._update_cars()
+        if self._collides(self.pos):
+            self.pos = 9
+            self.r = True
+        self.terminal = True if self.game_turn >= 100 else False
+        if not self.terminal and self.r:
+            R = self.reward
+            G = self.game_turn
+            self.random = np.random.RandomState(self.seed)
+            self.reset()
+            self.reward = R
+            self.game_turn = G
+        return self.observe(), self.terminal, self.reward, self.r
+
+    def _update_cars(self) -> None:
         # car: [x, y, timer, speed, length]
         for car in self.cars:
             if car[3] is None:
                 continue
-            dir = -1 if car[3] > 0 else 1
             if car[0] < 0:
                 car[0] = 8
                 self.new_car = True
@@ -138,20 +186,17 @@ class FreewayEnv(BaseEnv):
                         car[0] += 1 if car[3] > 0 else -1
                 else:
                     car[0] += int(1 / car[3])
-            # collision check
+
+    def _collides(self, lane: int) -> bool:
+        # A car hits the player if any of its cells covers column 4 of the lane.
+        for car in self.cars:
+            if car[3] is None or car[1] != lane:
+                continue
+            dir = -1 if car[3] > 0 else 1
             for offset in range(car[4]):
-                if car[0] + offset * dir == 4 and self.pos == car[1]:
-                    self.pos = 9
-                    self.r = True
-        self.terminal = True if self.game_turn >= 100 else False
-        if not self.terminal and self.r:
-            R = self.reward
-            G = self.game_turn
-            self.random = np.random.RandomState(self.seed)
-            self.reset()
-            self.reward = R
-            self.game_turn = G
-        return self.observe(), self.terminal, self.reward, self.r
+                if car[0] + offset * dir == 4:
+                    return True
+        return False
 
     def state_string(self) -> str:
         grid_string = ""
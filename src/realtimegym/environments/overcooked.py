@@ -5,9 +5,10 @@
 # See overcooked_new/THIRD_PARTY_NOTICE.md for license and attribution details.
 
 import argparse
+import copy
 import os
 from pathlib import Path
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, Optional
 
 from .base import BaseEnv
 from .overcooked_new.config import get_config
@@ -19,7 +20,9 @@ from .overcooked_new.src.overcooked_ai_py.mdp.actions import (  # type: ignore
 from .overcooked_new.src.overcooked_ai_py.mdp.overcooked_mdp import (
     Recipe,  # type: ignore
 )
-from .render.overcooked_render import OvercookedRender
+
+if TYPE_CHECKING:
+    from .render.overcooked_render import OvercookedRender
 
 __all__ = ["Recipe", "orientation_to_char_mapping", "OvercookedEnv"]
 
@@ -101,11 +104,19 @@ def parse_args(args: list, parser: argparse.ArgumentParser) -> argparse.Namespac
 
 
 def setup_env(
-    seed: int, cognitive_load: str, save_trajectory_gifs: bool = False
-) -> tuple[BaseEnv, int, Optional[OvercookedRender]]:
+    seed: int,
+    cognitive_load: str,
+    save_trajectory_gifs: bool = False,
+    layout: Optional[str] = None,
+) -> tuple[BaseEnv, int, Optional["OvercookedRender"]]:
+    """
+    Args:
+        layout: Name of a layout in overcooked_ai_py/data/layouts; defaults to
+            the layout of the cognitive load
+    """
     parser = get_config()
     all_args = parse_args([], parser)
-    all_args.layout_name = cognitive_load_layout_mapping[cognitive_load]
+    all_args.layout_name = layout or cognitive_load_layout_mapping[cognitive_load]
     all_args.env_name = "overcooked"
     all_args.algorithm_name = "population"
     all_args.agent0_policy_name = "script:LLM"
@@ -121,6 +132,8 @@ def setup_env(
     env.run_dir = run_dir
     render = None
     if save_trajectory_gifs:
+        from .render.overcooked_render import OvercookedRender
+
         render = OvercookedRender()
     return env, seed, render
 
@@ -132,6 +145,7 @@ class OvercookedEnv(BaseEnv):
         self.run_dir = None  # type: ignore
 
     def reset(self) -> tuple[dict[str, Any], bool]:
+        self.detach_observation()
         self.gym_env = Overcooked(
             self.all_args, self.run_dir, featurize_type=("bc", "bc")
         )
@@ -149,7 +163,44 @@ class OvercookedEnv(BaseEnv):
         # Return initial observation and done flag
         return self.observe(), self.terminal
 
+    def get_state(self) -> dict[str, Any]:
+        """
+        Snapshot the episode, including the partner script agent.
+
+        The layout, MDP and planners are fixed for an environment and are not
+        saved; only the parts of the game that change from turn to turn are.
+        """
+        state = super().get_state()
+        gym_env = self.gym_env
+        state["overcooked"] = copy.deepcopy(
+            {
+                "state": gym_env.base_env.state,
+                "game_stats": gym_env.base_env.game_stats,
+                "script_agent": gym_env.script_agent,
+                "history_sa": gym_env.history_sa,
+                "cumulative_shaped_info": gym_env.cumulative_shaped_info,
+                "step_count": gym_env.step_count,
+                "history": self.history,
+            }
+        )
+        return state
+
+    def set_state(self, state: dict[str, Any]) -> None:
+        if not hasattr(self, "gym_env"):
+            self.reset()
+        super().set_state(state)
+        saved = copy.deepcopy(state["overcooked"])
+        gym_env = self.gym_env
+        gym_env.base_env.state = saved["state"]
+        gym_env.base_env.game_stats = saved["game_stats"]
+        gym_env.script_agent = saved["script_agent"]
+        gym_env.history_sa = saved["history_sa"]
+        gym_env.cumulative_shaped_info = saved["cumulative_shaped_info"]
+        gym_env.step_count = saved["step_count"]
+        self.history = saved["history"]
+
     def go(self, a: str) -> tuple[dict[str, Any], bool, float]:
+        self.detach_observation()
         self.game_turn += 1
 
         if a == "U":
@@ -225,14 +276,18 @@ class OvercookedEnv(BaseEnv):
         }
         return state
 
+    def frozen_copy(self) -> "OvercookedEnv":
+        # A step replaces the game state object instead of mutating it, so
+        # pinning the current one and copying the action history is enough.
+        frozen = copy.copy(self)
+        frozen.gym_env = copy.copy(self.gym_env)
+        frozen.gym_env.base_env = copy.copy(self.gym_env.base_env)
+        frozen.history = [list(h) for h in self.history]
+        frozen._observation = None
+        return frozen
+
     def observe(self) -> dict[str, Any]:
-        if self.terminal:
-            return {}
-        return {
-            "state_string": self.state_string(),
-            "game_turn": self.game_turn,
-            "state": self.state_builder(),
-        }
+        return super().observe()
         # kitchen_counters = state_for_llm["layout"]["X"]
         # tomatoes = state_for_llm["layout"]["T"]
         # onions = state_for_llm["layout"]["O"]
@@ -6,8 +6,6 @@ from .src.overcooked_ai_py.mdp.actions import Action, Direction
 from .src.overcooked_ai_py.mdp.overcooked_mdp import OvercookedGridworld, EVENT_TYPES
 from .src.overcooked_ai_py.mdp.overcooked_trajectory import TIMESTEP_TRAJ_KEYS, EPISODE_TRAJ_KEYS, DEFAULT_TRAJ_KEYS
 from .src.overcooked_ai_py.planning.planners import MediumLevelActionManager, MotionPlanner, NO_COUNTERS_PARAMS
-from .src.overcooked_ai_py.visualization.state_visualizer import StateVisualizer
-import imageio
 import os
 import pickle
 from collections import defaultdict
@@ -926,6 +924,9 @@ class Overcooked(gym.Env):
             self.traj[key].append([])
 
     def render(self):
+        # Deferred: the visualizer pulls in pygame, IPython and its sprite sheets.
+        from .src.overcooked_ai_py.visualization.state_visualizer import StateVisualizer
+        import imageio
         try:
             save_dir = f'{self.run_dir}/gifs/{self.layout_name}/traj_num_{self.traj_num}'
             save_dir = os.path.expanduser(save_dir)
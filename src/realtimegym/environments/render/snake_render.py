@@ -192,23 +192,23 @@ class SnakeRender:
             pos = (x * self.cell_size, (env.B - 1 - y) * self.cell_size)
             surface.blit(self.sprites["obstacle"], pos)
 
-        for x, y in env.food:
+        for x, y, life, value in env.foods():
             pos = (x * self.cell_size, (env.B - 1 - y) * self.cell_size)
-            if env.food_attributes[x][y][1] > 0:
+            if value > 0:
                 surface.blit(self.sprites["apple"], pos)
-                life = env.food_attributes[x][y][0]
                 self.draw_life_bar(surface, life, 12, pos)
 
-        for i, (x, y) in enumerate(env.snake):
+        snake = list(env.snake)
+        for i, (x, y) in enumerate(snake):
             pos = (x * self.cell_size, (env.B - 1 - y) * self.cell_size)
-            if i == len(env.snake) - 1:
+            if i == len(snake) - 1:
                 direction_map = {
                     "R": "right",
                     "D": "down",
                     "L": "left",
                     "U": "up",
                 }
-                if len(env.snake) == 1:
+                if len(snake) == 1:
                     head_sprite = self.sprites[
                         f"head_{direction_map.get(env.dir, 'up')}"
                     ]
@@ -218,12 +218,12 @@ class SnakeRender:
                     ]
                 surface.blit(head_sprite, pos)
             elif i == 0:
-                prev_pos = env.snake[1] if len(env.snake) > 1 else None
+                prev_pos = snake[1] if len(snake) > 1 else None
                 tail_sprite = self.get_snake_tail_sprite(prev_pos, (x, y))
                 surface.blit(tail_sprite, pos)
             else:
-                prev_pos = env.snake[i + 1] if i < len(env.snake) - 1 else None
-                next_pos = env.snake[i - 1] if i > 0 else None
+                prev_pos = snake[i + 1] if i < len(snake) - 1 else None
+                next_pos = snake[i - 1] if i > 0 else None
                 body_sprite = self.get_snake_body_sprite(
                     prev_pos, (x, y), next_pos, env.B
                 )
@@ -288,11 +288,12 @@ class SnakeRender:
                 end_text = f"REWARD {env.reward}"
                 color = (0, 255, 0)
 
+            size = env.B * self.cell_size
             end_surface = self.font.render(end_text, True, color)
             end_rect = end_surface.get_rect()
-            end_rect.center = (self.width // 2, self.height // 2)
+            end_rect.center = (size // 2, size // 2)
 
-            overlay = pygame.Surface((self.width, self.height))
+            overlay = pygame.Surface((size, size))
             overlay.set_alpha(128)
             overlay.fill((0, 0, 0))
             surface.blit(overlay, (0, 0))
@@ -1,10 +1,13 @@
-from copy import deepcopy
-from typing import Any, Optional
+import copy
+from collections import deque
+from typing import TYPE_CHECKING, Any, Optional
 
 import numpy as np
 
 from .base import BaseEnv
-from .render.snake_render import SnakeRender
+
+if TYPE_CHECKING:
+    from .render.snake_render import SnakeRender
 
 seed_mapping = {
     "E": {i: 1000 + i for i in range(32)},
@@ -12,48 +15,151 @@ seed_mapping = {
     "H": {i: 8000 + i for i in range(32)},
 }
 
+DEFAULT_BOARD_SIZE = 8
+# Obstacle share of the interior on the 8x8 levels (1, 5 and 8 of 36 cells),
+# used for larger boards of the same cognitive load.
+OBSTACLE_DENSITY = {"E": 1 / 36, "M": 5 / 36, "H": 8 / 36}
+
+FOOD_LIFE_SPAN = 10
+FOOD_VALUE = 1
+FOOD_SPAWN_PERIOD = 3
+INITIAL_FOOD = 3
+# Foods occupy slots round-robin in spawn order. The slot being reused always
+# belongs to a food spawned more than FOOD_LIFE_SPAN turns ago.
+FOOD_SLOTS = INITIAL_FOOD + FOOD_LIFE_SPAN // FOOD_SPAWN_PERIOD + 1
+
 
 def setup_env(
-    seed: int, cognitive_load: str, save_trajectory_gifs: bool = False
-) -> tuple[BaseEnv, int, Optional[SnakeRender]]:
-    env = SnakeEnv()
+    seed: int,
+    cognitive_load: str,
+    save_trajectory_gifs: bool = False,
+    board_size: int = DEFAULT_BOARD_SIZE,
+    obstacle_density: Optional[float] = None,
+) -> tuple[BaseEnv, int, Optional["SnakeRender"]]:
+    if board_size != DEFAULT_BOARD_SIZE and obstacle_density is None:
+        obstacle_density = OBSTACLE_DENSITY[cognitive_load]
+    env = SnakeEnv(board_size=board_size, obstacle_density=obstacle_density)
     env.set_seed(seed_mapping[cognitive_load][seed])
     render = None
     if save_trajectory_gifs:
+        from .render.snake_render import SnakeRender
+
         render = SnakeRender()
     return env, seed_mapping[cognitive_load][seed], render
 
 
+def start_cell(board_size: int) -> tuple[int, int]:
+    """Cell the snake starts on."""
+    return (board_size // 2 - 1, board_size // 2 - 1)
+
+
+def generate_layout(
+    seed: int, board_size: int, obstacle_density: Optional[float] = None
+) -> tuple[list[tuple[int, int]], list[tuple[int, int]]]:
+    """
+    Place the obstacles of a seed and shuffle the food spawn order.
+
+    Args:
+        seed: Environment seed; seed % 1000 seeds the RNG and, without an
+            obstacle density, seed // 1000 is the number of obstacles
+        board_size: Side length of the board, including the border walls
+        obstacle_density: Fraction of interior cells holding an obstacle
+
+    Returns:
+        (obstacles in placement order, free cells in food spawn order)
+    """
+    random = np.random.RandomState(seed % 1000)
+    coords = [
+        (x, y) for x in range(1, board_size - 1) for y in range(1, board_size - 1)
+    ]
+    start = start_cell(board_size)
+    if obstacle_density is None:
+        num_obstacle = seed // 1000
+    else:
+        num_obstacle = round(obstacle_density * (board_size - 2) ** 2)
+    if num_obstacle > len(coords) - 1:
+        raise ValueError(
+            f"Not enough free cells for {num_obstacle} obstacles on a "
+            f"{board_size}x{board_size} board"
+        )
+    obstacles: list[tuple[int, int]] = []
+    obstacle_set = set()
+    while len(obstacles) < num_obstacle:
+        x = random.randint(1, board_size - 1)
+        y = random.randint(1, board_size - 1)
+        if (x, y) != start and (x, y) not in obstacle_set:
+            obstacles.append((x, y))
+            obstacle_set.add((x, y))
+    # Same order as removing the cells one by one, in a single pass.
+    coords = [cell for cell in coords if cell not in obstacle_set and cell != start]
+    random.shuffle(coords)
+    random.shuffle(coords)
+    return obstacles, coords
+
+
 class SnakeEnv(BaseEnv):
-    def reset(self) -> tuple[dict[str, Any], bool]:
-        self.B = 8
-        self.true_seed = self.seed % 1000
-        self.random = np.random.RandomState(self.true_seed)
-        self.coords = [
-            (x, y) for x in range(1, self.B - 1) for y in range(1, self.B - 1)
-        ]
-        self.snake = [(self.B // 2 - 1, self.B // 2 - 1)]
-        self.num_obstacle = self.seed // 1000
-        step = self.num_obstacle
-        self.obstacle = []
-        while step > 0:
-            x = self.random.randint(1, self.B - 1)
-            y = self.random.randint(1, self.B - 1)
-            if (x, y) not in self.snake and (x, y) not in self.obstacle:
-                step -= 1
-                self.coords.remove((x, y))
-                self.obstacle.append((x, y))
-        self.coords.remove(self.snake[0])
-        self.random.shuffle(self.coords)
-        self.random.shuffle(self.coords)
-        if len(self.obstacle) >= self.num_obstacle:
-            self.obstacle = self.obstacle[: self.num_obstacle]
-        else:
+    state_fields = BaseEnv.state_fields + (
+        "B",
+        "true_seed",
+        "snake",
+        "body",
+        "obstacle",
+        "obstacle_set",
+        "num_obstacle",
+        "coords",
+        "idx",
+        "food_pos",
+        "food_life",
+        "food_value",
+        "food_slot",
+        "food_next",
+        "dir",
+    )
+
+    def __init__(
+        self,
+        board_size: int = DEFAULT_BOARD_SIZE,
+        obstacle_density: Optional[float] = None,
+    ) -> None:
+        """
+        Args:
+            board_size: Side length of the board, including the border walls
+            obstacle_density: Fraction of interior cells holding an obstacle.
+                If None, the obstacle count is encoded in the seed (seed // 1000).
+        """
+        super().__init__()
+        if board_size < 4:
+            raise ValueError(f"Board size must be at least 4, got {board_size}.")
+        if obstacle_density is not None and not 0 <= obstacle_density < 1:
             raise ValueError(
-                f"Not enough obstacles generated: {len(self.obstacle)} < {self.num_obstacle}"
+                f"Obstacle density must be in [0, 1), got {obstacle_density}."
             )
-        self.food = []
-        self.food_attributes = [[0 for _ in range(self.B)] for _ in range(self.B)]
+        self.board_size = board_size
+        self.obstacle_density = obstacle_density
+
+    def reset(self) -> tuple[dict[str, Any], bool]:
+        self.detach_observation()
+        self.B = self.board_size
+        self.true_seed = self.seed % 1000
+        # The body is stored tail first; `self.body` mirrors it as a set so
+        # that collision checks do not scan the snake.
+        self.snake = deque([start_cell(self.B)])
+        self.body = set(self.snake)
+        obstacles, self.coords = generate_layout(
+            self.seed, self.B, self.obstacle_density
+        )
+        self.obstacle = tuple(obstacles)
+        # Immutable views of the current turn, shared by every observation
+        # of that turn and dropped when the state changes.
+        self._views: dict[str, Any] = {}
+        self.obstacle_set = set(self.obstacle)
+        self.num_obstacle = len(self.obstacle)
+        # Food lives in fixed slots; `food_slot` maps a cell to its slot or -1.
+        self.food_pos = np.zeros((FOOD_SLOTS, 2), dtype=int)
+        self.food_life = np.zeros(FOOD_SLOTS, dtype=int)
+        self.food_value = np.zeros(FOOD_SLOTS, dtype=int)
+        self.food_slot = np.full((self.B, self.B), -1, dtype=int)
+        self.food_next = 0
 
         self.dir = "L"
         self.game_turn = 0
@@ -62,9 +168,8 @@ class SnakeEnv(BaseEnv):
         # random permute coords
         # random choose 30% of index in range(200) and set self.value to -1
         self.idx = 0
-        self.spawn_food()
-        self.spawn_food()
-        self.spawn_food()
+        for _ in range(INITIAL_FOOD):
+            self.spawn_food()
         # Return initial observation and done flag
         return self.observe(), self.terminal
 
@@ -73,16 +178,64 @@ class SnakeEnv(BaseEnv):
         self.idx += 1
         if self.idx >= len(self.coords):
             self.idx -= len(self.coords)
-        life_span = 10
-        value = 1
-        new_food = (x, y)
-        assert self.food_attributes[x][y] == 0 and new_food not in self.food, (
-            f"Food already exists at {new_food}, attributes: {self.food_attributes[x][y]}, coords: {self.coords}"
+        slot = self.food_next
+        assert self.food_life[slot] == 0 and self.food_slot[x, y] < 0, (
+            f"Food already exists at {(x, y)}, slot: {slot}, coords: {self.coords}"
         )
-        self.food.append(new_food)
-        self.food_attributes[x][y] = (life_span, value)
+        self.food_next = (slot + 1) % FOOD_SLOTS
+        self.food_pos[slot] = (x, y)
+        self.food_life[slot] = FOOD_LIFE_SPAN
+        self.food_value[slot] = FOOD_VALUE
+        self.food_slot[x, y] = slot
+
+    def set_state(self, state: dict[str, Any]) -> None:
+        super().set_state(state)
+        self._views = {}
+
+    def frozen_copy(self) -> "SnakeEnv":
+        # Only the containers that step() mutates in place need copying.
+        frozen = copy.copy(self)
+        frozen.snake = self.snake.copy()
+        frozen.body = self.body.copy()
+        frozen.food_pos = self.food_pos.copy()
+        frozen.food_life = self.food_life.copy()
+        frozen.food_value = self.food_value.copy()
+        frozen.food_slot = self.food_slot.copy()
+        frozen._views = dict(self._views)
+        frozen._observation = None
+        return frozen
+
+    def remove_food(self, slot: int) -> None:
+        x, y = self.food_pos[slot]
+        self.food_slot[x, y] = -1
+        self.food_life[slot] = 0
+
+    def foods(self) -> tuple[tuple[int, int, int, int], ...]:
+        """Live foods as (x, y, lifespan, value), oldest first."""
+        foods = self._views.get("foods")
+        if foods is None:
+            order = np.roll(np.arange(FOOD_SLOTS), -self.food_next)
+            order = order[self.food_life[order] > 0]
+            foods = self._views["foods"] = tuple(
+                (x, y, life, value)
+                for (x, y), life, value in zip(
+                    self.food_pos[order].tolist(),
+                    self.food_life[order].tolist(),
+                    self.food_value[order].tolist(),
+                )
+            )
+        return foods
+
+    def snake_cells(self) -> tuple[tuple[int, int], ...]:
+        """Body cells, head first."""
+        cells = self._views.get("snake")
+        if cells is None:
+            cells = self._views["snake"] = tuple(reversed(self.snake))
+        return cells
 
     def step(self, a: str) -> tuple[dict[str, Any], bool, float, bool]:
+        self.detach_observation()
+        self._views.clear()
         self.r = 0
         self.game_turn += 1
         if (
@@ -96,6 +249,7 @@ class SnakeEnv(BaseEnv):
         if a in ["L", "R", "U", "D"]:  # ignore invalid actions
             self.dir = a
         head_x, head_y = self.snake[-1]
+        tail = self.snake[0]
         if self.dir == "L":
             new_head = (head_x - 1, head_y)
         elif self.dir == "R":
@@ -107,74 +261,87 @@ class SnakeEnv(BaseEnv):
         else:
             raise ValueError(f"Invalid action a = {a}, dir = {self.dir}")
         x, y = new_head
+        slot = int(self.food_slot[x, y])
+        has_food = slot >= 0
         # Death trigger: hit body; hit wall; head hits newly grown tail
         if (
-            new_head in self.snake[1:]
-            or new_head in self.obstacle
+            (new_head in self.body and new_head != tail)
+            or new_head in self.obstacle_set
             or new_head[0] == 0
             or new_head[1] == 0
             or new_head[0] == self.B - 1
             or new_head[1] == self.B - 1
-            or (
-                new_head == self.snake[0]
-                and new_head in self.food
-                and self.food_attributes[x][y][1] > 0
-            )
+            or (new_head == tail and has_food and self.food_value[slot] > 0)
         ):
             self.r -= 1
             self.reward += self.r
             self.terminal = True
             return self.observe(), self.terminal, self.reward, False
         self.snake.append(new_head)
+        self.body.add(new_head)
 
-        if new_head in self.food:
-            self.r += self.food_attributes[x][y][1]
-            self.food.remove(new_head)
-            self.food_attributes[x][y] = 0
+        if has_food:
+            self.r += int(self.food_value[slot])
+            self.remove_food(slot)
             if self.r < 0:
-                self.snake.pop(0)
+                self._pop_tail()
         else:
-            self.snake.pop(0)
-
-        for food in self.food:
-            x, y = food
-            lifespan, value = self.food_attributes[x][y]
-            self.food_attributes[x][y] = (lifespan - 1, value)
-            if lifespan <= 1:
-                self.food.remove(food)
-                self.food_attributes[x][y] = 0
-        if self.game_turn % 3 == 1:
+            self._pop_tail()
+
+        alive = self.food_life > 0
+        self.food_life[alive] -= 1
+        for slot in np.flatnonzero(alive & (self.food_life == 0)):
+            self.remove_food(slot)
+        if self.game_turn % FOOD_SPAWN_PERIOD == 1:
             self.spawn_food()
         self.reward += self.r
         self.terminal = True if self.game_turn >= 100 else False
         return self.observe(), self.terminal, self.reward, False
 
+    def _pop_tail(self) -> None:
+        tail = self.snake.popleft()
+        # The head may have just moved into the cell the tail is leaving.
+        if tail != self.snake[-1]:
+            self.body.discard(tail)
+
     def state_string(self) -> str:
-        grid_string = ""
+        grid = self._views.get("state_string")
+        if grid is None:
+            grid = self._views["state_string"] = self._build_state_string()
+        return grid
+
+    def _build_state_string(self) -> str:
+        rows = []
         snake_length = len(self.snake)
+        # Letter of each body cell: "a" for the head, "b" behind it, and so on.
+        letters = {
+            cell: chr(ord("a") + snake_length - 1 - i)
+            for i, cell in enumerate(self.snake)
+        }
+        food_slot = self.food_slot.tolist()
         for i in range(self.B):
+            row = []
             for j in range(self.B):
                 output = ""
                 x, y = j, self.B - 1 - i
-                if (x, y) in self.obstacle:
+                if (x, y) in self.obstacle_set:
                     output += "#"
-                if (x, y) in self.snake:
-                    output += chr(
-                        ord("a") + snake_length - 1 - self.snake.index((x, y))
-                    )
-                if (x, y) in self.food:
-                    if self.food_attributes[x][y][1] > 0:
+                if (x, y) in letters:
+                    output += letters[(x, y)]
+                slot = food_slot[x][y]
+                if slot >= 0:
+                    if self.food_value[slot] > 0:
                         output += "+"
                     else:
                         output += "-"
-                    output += str(self.food_attributes[x][y][0])
+                    output += str(self.food_life[slot])
                 if x == 0 or x == self.B - 1 or y == 0 or y == self.B - 1:
                     output += "#"
                 if output == "":
                     output = "."
-                grid_string += output + " " * (6 - len(output))
-            grid_string += "\n"
-        return grid_string
+                row.append(output + " " * (6 - len(output)))
+            rows.append("".join(row) + "\n")
+        return "".join(rows)
 
     def get_possible_actions(self) -> list[str]:
         # return 'L', 'R', 'U', 'D' removing the reverse of the current direction
@@ -189,16 +356,12 @@ class SnakeEnv(BaseEnv):
         return actions
 
     def state_builder(self) -> dict[str, Any]:
-        snake = deepcopy(self.snake[::-1])
-        foods = []
-        for x, y in self.food:
-            lifespan, value = self.food_attributes[x][y]
-            foods.append((x, y, lifespan, value))
+        # Tuples of the current turn: safe to share, so nothing is copied.
         return {
             "snake_dir": self.dir,
             "internal_obstacles": self.obstacle,
-            "foods": foods,
-            "snake": snake,
+            "foods": self.foods(),
+            "snake": self.snake_cells(),
             "size": self.B,
             "game_turn": self.game_turn,
         }
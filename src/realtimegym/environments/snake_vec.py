@@ -0,0 +1,273 @@
+from typing import Any, Optional, Sequence, Union
+
+import numpy as np
+
+from .snake import (
+    DEFAULT_BOARD_SIZE,
+    FOOD_LIFE_SPAN,
+    FOOD_SLOTS,
+    FOOD_SPAWN_PERIOD,
+    FOOD_VALUE,
+    INITIAL_FOOD,
+    generate_layout,
+    start_cell,
+)
+
+MAX_TURNS = 100
+# Action codes index this string; S keeps the current direction.
+ACTIONS = "LRUDS"
+ACTION_CODES = {a: i for i, a in enumerate(ACTIONS)}
+DX = np.array([-1, 1, 0, 0])
+DY = np.array([0, 0, 1, -1])
+OPPOSITE = np.array([1, 0, 3, 2])
+# The snake grows by at most one cell per food, so it never outgrows this.
+MAX_LENGTH = 1 + INITIAL_FOOD + MAX_TURNS // FOOD_SPAWN_PERIOD + 1
+
+
+class SnakeVecEnv:
+    """
+    N Snake episodes stepped together with NumPy.
+
+    Follows `SnakeEnv` turn for turn: same obstacle layout, food spawn order
+    and death rules. Each body lives in a ring buffer, occupancy is a stacked
+    [N, B, B] grid and foods use the same slot layout as `SnakeEnv`. Finished
+    episodes restart on their seed at the end of `step`.
+    """
+
+    def __init__(
+        self,
+        seeds: Sequence[int],
+        board_size: int = DEFAULT_BOARD_SIZE,
+        obstacle_density: Optional[float] = None,
+    ) -> None:
+        """
+        Args:
+            seeds: Real seeds (e.g. 1000 for Snake-v0 seed 0), one per episode
+            board_size: Side length of the board, including the border walls
+            obstacle_density: Fraction of interior cells holding an obstacle.
+                If None, the obstacle count is encoded in the seed (seed // 1000).
+        """
+        self.seeds = np.array(seeds, dtype=int)
+        self.num_envs = N = len(self.seeds)
+        self.B = B = board_size
+        self.obstacle_density = obstacle_density
+        self._layouts: dict[int, tuple[tuple, np.ndarray]] = {}
+
+        cells = (B - 2) ** 2
+        self.walls = np.zeros((N, B, B), dtype=bool)
+        self.obstacles: list[tuple[tuple[int, int], ...]] = [() for _ in range(N)]
+        self.coords = np.zeros((N, cells, 2), dtype=int)
+        self.num_coords = np.zeros(N, dtype=int)
+        self.idx = np.zeros(N, dtype=int)
+
+        # Ring buffer of body cells; `head` indexes the head, the tail sits
+        # `length - 1` entries behind it.
+        self.body = np.zeros((N, MAX_LENGTH, 2), dtype=int)
+        self.head = np.zeros(N, dtype=int)
+        self.length = np.zeros(N, dtype=int)
+        self.occupied = np.zeros((N, B, B), dtype=bool)
+        self.dir = np.zeros(N, dtype=int)
+
+        self.food_pos = np.zeros((N, FOOD_SLOTS, 2), dtype=int)
+        self.food_life = np.zeros((N, FOOD_SLOTS), dtype=int)
+        self.food_value = np.zeros((N, FOOD_SLOTS), dtype=int)
+        self.food_slot = np.full((N, B, B), -1, dtype=int)
+        self.food_next = np.zeros(N, dtype=int)
+
+        self.game_turn = np.zeros(N, dtype=int)
+        self.reward = np.zeros(N, dtype=int)
+        self.terminal = np.zeros(N, dtype=bool)
+        self._all = np.arange(N)
+
+    def _layout(self, seed: int) -> tuple[tuple, np.ndarray]:
+        if seed not in self._layouts:
+            obstacles, coords = generate_layout(seed, self.B, self.obstacle_density)
+            self._layouts[seed] = (tuple(obstacles), np.array(coords, dtype=int))
+        return self._layouts[seed]
+
+    def reset(self, indices: Optional[Sequence[int]] = None) -> np.ndarray:
+        """
+        Restart episodes on their seeds.
+
+        Args:
+            indices: Episodes to restart; all of them if None. Assign to
+                `self.seeds[i]` beforehand to move an episode to a new seed.
+
+        Returns:
+            Board planes of all episodes, see `planes()`.
+        """
+        rows = self._all if indices is None else np.asarray(indices, dtype=int)
+        B = self.B
+        for i in rows.tolist():
+            obstacles, coords = self._layout(int(self.seeds[i]))
+            self.obstacles[i] = obstacles
+            self.walls[i] = False
+            self.walls[i, [0, -1], :] = True
+            self.walls[i, :, [0, -1]] = True
+            for x, y in obstacles:
+                self.walls[i, x, y] = True
+            self.coords[i, : len(coords)] = coords
+            self.num_coords[i] = len(coords)
+        x, y = start_cell(B)
+        self.idx[rows] = 0
+        self.body[rows, 0] = (x, y)
+        self.head[rows] = 0
+        self.length[rows] = 1
+        self.occupied[rows] = False
+        self.occupied[rows, x, y] = True
+        self.dir[rows] = ACTIONS.index("L")
+        self.food_life[rows] = 0
+        self.food_value[rows] = 0
+        self.food_slot[rows] = -1
+        self.food_next[rows] = 0
+        self.game_turn[rows] = 0
+        self.reward[rows] = 0
+        self.terminal[rows] = False
+        for _ in range(INITIAL_FOOD):
+            self._spawn_food(rows)
+        return self.planes()
+
+    def _spawn_food(self, indices: np.ndarray) -> None:
+        cells = self.coords[indices, self.idx[indices]]
+        self.idx[indices] = (self.idx[indices] + 1) % self.num_coords[indices]
+        slots = self.food_next[indices]
+        x, y = cells[:, 0], cells[:, 1]
+        assert not np.any(self.food_life[indices, slots] > 0) and not np.any(
+            self.food_slot[indices, x, y] >= 0
+        ), f"Food already exists in episodes {indices.tolist()}"
+        self.food_next[indices] = (slots + 1) % FOOD_SLOTS
+        self.food_pos[indices, slots] = cells
+        self.food_life[indices, slots] = FOOD_LIFE_SPAN
+        self.food_value[indices, slots] = FOOD_VALUE
+        self.food_slot[indices, x, y] = slots
+
+    def step(
+        self, actions: Union[Sequence[str], Sequence[int], np.ndarray]
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Advance every episode by one turn.
+
+        Args:
+            actions: One action per episode, as letters of "LRUDS" or their
+                indices. Reversing into the body keeps the current direction.
+
+        Returns:
+            (planes, dones, rewards): `rewards` are cumulative episode rewards
+            as returned by `SnakeEnv.step`, so a finished episode reports its
+            final score. Finished episodes are reset before returning, and
+            `planes` shows their first turn.
+        """
+        actions = np.asarray(actions)
+        if actions.dtype.kind in "US":
+            actions = np.array([ACTION_CODES.get(a, -1) for a in actions.tolist()])
+        n = self._all
+        self.game_turn += 1
+        turn = actions.astype(int)
+        move = (turn >= 0) & (turn < 4)
+        turn = np.where(move & (turn != OPPOSITE[self.dir]), turn, self.dir)
+        self.dir = turn
+
+        head = self.body[n, self.head]
+        tail_index = (self.head - self.length + 1) % MAX_LENGTH
+        tail = self.body[n, tail_index]
+        x = head[:, 0] + DX[self.dir]
+        y = head[:, 1] + DY[self.dir]
+        slot = self.food_slot[n, x, y]
+        has_food = slot >= 0
+        value = np.where(has_food, self.food_value[n, slot], 0)
+        on_tail = (x == tail[:, 0]) & (y == tail[:, 1])
+        # Death trigger: hit body; hit wall; head hits newly grown tail
+        dead = (
+            (self.occupied[n, x, y] & ~on_tail)
+            | self.walls[n, x, y]
+            | (on_tail & has_food & (value > 0))
+        )
+        alive = ~dead
+        a = n[alive]
+        r = np.where(dead, -1, 0)
+
+        # Move: free the tail cell first, so that a head entering it stays set.
+        self.head[a] = (self.head[a] + 1) % MAX_LENGTH
+        self.body[a, self.head[a]] = np.stack([x[a], y[a]], axis=1)
+        eat = alive & has_food
+        e = n[eat]
+        r[eat] += value[eat]
+        self.food_slot[e, x[e], y[e]] = -1
+        self.food_life[e, slot[e]] = 0
+        pop = alive & (~has_food | (r < 0))
+        p = n[pop]
+        self.occupied[p, tail[p, 0], tail[p, 1]] = False
+        self.occupied[a, x[a], y[a]] = True
+        self.length[a] += 1
+        self.length[p] -= 1
+
+        live = (self.food_life > 0) & alive[:, None]
+        self.food_life[live] -= 1
+        gone, gone_slot = np.nonzero(live & (self.food_life == 0))
+        pos = self.food_pos[gone, gone_slot]
+        self.food_slot[gone, pos[:, 0], pos[:, 1]] = -1
+        spawn = a[self.game_turn[a] % FOOD_SPAWN_PERIOD == 1]
+        if len(spawn):
+            self._spawn_food(spawn)
+
+        self.reward += r
+        self.terminal = dead | (self.game_turn >= MAX_TURNS)
+        dones = self.terminal.copy()
+        rewards = self.reward.copy()
+        if dones.any():
+            self.reset(n[dones])
+        return self.planes(), dones, rewards
+
+    def planes(self) -> np.ndarray:
+        """
+        Board planes of all episodes, indexed [episode, plane, x, y].
+
+        Planes: 0 walls and obstacles, 1 body, 2 head, 3 food value times its
+        remaining life.
+        """
+        n = self._all
+        planes = np.zeros((self.num_envs, 4, self.B, self.B), dtype=np.int8)
+        planes[:, 0] = self.walls
+        planes[:, 1] = self.occupied
+        head = self.body[n, self.head]
+        planes[n, 2, head[:, 0], head[:, 1]] = 1
+        live_env, live_slot = np.nonzero(self.food_life > 0)
+        pos = self.food_pos[live_env, live_slot]
+        planes[live_env, 3, pos[:, 0], pos[:, 1]] = (
+            self.food_life[live_env, live_slot] * self.food_value[live_env, live_slot]
+        )
+        return planes
+
+    def snake(self, i: int) -> tuple[tuple[int, int], ...]:
+        """Body cells of episode i, head first."""
+        order = (self.head[i] - np.arange(self.length[i])) % MAX_LENGTH
+        return tuple((x, y) for x, y in self.body[i, order].tolist())
+
+    def foods(self, i: int) -> tuple[tuple[int, int, int, int], ...]:
+        """Live foods of episode i as (x, y, lifespan, value), oldest first."""
+        order = np.roll(np.arange(FOOD_SLOTS), -self.food_next[i])
+        order = order[self.food_life[i, order] > 0]
+        return tuple(
+            (x, y, life, value)
+            for (x, y), life, value in zip(
+                self.food_pos[i, order].tolist(),
+                self.food_life[i, order].tolist(),
+                self.food_value[i, order].tolist(),
+            )
+        )
+
+    def state(self, i: int) -> dict[str, Any]:
+        """State of episode i in the format of `SnakeEnv.state_builder`."""
+        return {
+            "snake_dir": ACTIONS[self.dir[i]],
+            "internal_obstacles": self.obstacles[i],
+            "foods": self.foods(i),
+            "snake": self.snake(i),
+            "size": self.B,
+            "game_turn": int(self.game_turn[i]),
+        }
+
+    def get_possible_actions(self, i: int) -> list[str]:
+        """Moves of episode i that do not reverse into the body."""
+        reverse = ACTIONS[OPPOSITE[self.dir[i]]]
+        return [a for a in "LRUD" if a != reverse]
@@ -0,0 +1,331 @@
+"""
+Stand-in for an OpenAI-compatible endpoint, for tests and offline benchmarks.
+
+`MockLLMServer` answers POST /v1/chat/completions, streamed (server-sent
+events) or not, with `reasoning_content` and `usage`, at a configurable
+time to first token and token rate, and fails a configurable share of the
+requests. Replies are scripted, or replayed from the prompts and responses of
+agent logs. Text before a "</think>" in a reply is sent as reasoning.
+
+Tokens are whitespace-separated words (with their leading whitespace), and
+`max_tokens` / `max_completion_tokens` cut replies at that many of them.
+
+Every response and chunk has an extra `offset` field, the seconds after the
+request at which it is due. Agents on a `VirtualClock` place it in simulated
+time by that offset, so a server started with `wait=False` (`--no_wait`),
+sending everything at once, plays out the configured latencies without
+waiting for them.
+
+Run:
+    python -m realtimegym.mock_server --port 8000 --ttft 0.5 --tokens_per_second 40 \\
+        --reply "<think>Cars ahead.</think>\\boxed{S}"
+and point a model config at it:
+    url: http://127.0.0.1:8000/v1
+"""
+
+import argparse
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Iterable, Iterator, Optional, Union
+
+# messages -> reply text
+Script = Union[str, Iterable[str], Callable[[list[dict[str, Any]]], str]]
+
+TOKEN = re.compile(r"\s*\S+|\s+")
+
+
+def split_reasoning(reply: str) -> tuple[str, str]:
+    """(reasoning, content) of a reply with an optional <think> block."""
+    if "</think>" not in reply:
+        return "", reply
+    reasoning, content = reply.split("</think>", 1)
+    return reasoning.replace("<think>", "", 1).strip(), content.lstrip()
+
+
+def load_replays(log_files: Iterable[str]) -> dict[str, str]:
+    """
+    Prompt -> response of the model requests recorded in agent CSV logs.
+
+    A planning response is logged a piece per turn; the longest piece logged
+    before the next prompt is taken as the response.
+    """
+    import pandas as pd
+
+    replays: dict[str, str] = {}
+    for log_file in log_files:
+        logs = pd.read_csv(log_file, keep_default_na=False)
+        for model in ("model1", "model2"):
+            prompts, responses = f"{model}_prompt", f"{model}_response"
+            if prompts not in logs or responses not in logs:
+                continue
+            prompt = ""
+            for row_prompt, response in zip(logs[prompts], logs[responses]):
+                prompt = row_prompt or prompt
+                if prompt and len(str(response)) >= len(replays.get(prompt, "")):
+                    replays[prompt] = str(response)
+    return replays
+
+
+class MockLLMServer:
+    """
+    OpenAI-compatible chat completions server running in a background thread.
+
+    Args:
+        script: Reply to every request (str), replies used in turn and then
+                cycled (iterable), or a function of the request's messages
+        replays: Prompt -> reply, tried first on the last user message
+        ttft: Seconds before the first token (or the whole reply)
+        tokens_per_second: Token rate after the first one (None: instant)
+        error_rate: Share of requests failing with `error_status`
+        error_status: HTTP status of injected errors, e.g. 429 or 500
+        seed: Seed of the error injection
+        wait: Send each token when it is due; otherwise send at once, leaving
+              the timing to the `offset` fields
+        host, port: Address to listen on (port 0 picks a free one)
+
+    Examples:
+        >>> with MockLLMServer("\\\\boxed{U}", ttft=0.2, tokens_per_second=50) as server:
+        ...     client = OpenAI(base_url=server.url, api_key="mock")
+    """
+
+    def __init__(
+        self,
+        script: Script = "\\boxed{S}",
+        replays: Optional[dict[str, str]] = None,
+        ttft: float = 0.0,
+        tokens_per_second: Optional[float] = None,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        seed: int = 0,
+        wait: bool = True,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.script: Union[str, Iterator[str], Callable[[list[dict[str, Any]]], str]]
+        if isinstance(script, str) or not isinstance(script, Iterable):
+            self.script = script
+        else:
+            self.script = itertools.cycle(list(script))
+        self.replays = replays or {}
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.wait = wait
+        # Bodies of the requests received, in order
+        self.requests: list[dict[str, Any]] = []
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL for OpenAI clients, e.g. "http://127.0.0.1:8000/v1"."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockLLMServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "MockLLMServer":
+        return self.start()
+
+    def __exit__(self, *args: Any) -> None:  # noqa: ANN401
+        self.stop()
+
+    def reply(self, messages: list[dict[str, Any]]) -> str:
+        """Reply text to a request's messages."""
+        users = [m for m in messages if m.get("role") == "user"]
+        if users and users[-1].get("content") in self.replays:
+            return self.replays[users[-1]["content"]]
+        if isinstance(self.script, str):
+            return self.script
+        if isinstance(self.script, Iterator):
+            with self.lock:
+                return next(self.script)
+        return self.script(messages)
+
+    def _fails(self) -> bool:
+        with self.lock:
+            return self.random.random() < self.error_rate
+
+    def _handler(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers, body and events are separate writes; don't let them
+            # wait for delayed ACKs.
+            disable_nagle_algorithm = True
+
+            def log_message(self, format: str, *args: Any) -> None:  # noqa: ANN401
+                return
+
+            def _send(self, status: int, body: dict[str, Any]) -> None:
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self) -> None:
+                request = json.loads(
+                    self.rfile.read(int(self.headers["Content-Length"]))
+                )
+                with server.lock:
+                    server.requests.append(request)
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send(404, {"error": {"message": f"No route {self.path}"}})
+                    return
+                if server._fails():
+                    message = f"Injected error {server.error_status}"
+                    self._send(server.error_status, {"error": {"message": message}})
+                    return
+                server._complete(self, request)
+
+        return Handler
+
+    def _complete(
+        self, handler: BaseHTTPRequestHandler, request: dict[str, Any]
+    ) -> None:
+        reasoning, content = split_reasoning(self.reply(request.get("messages", [])))
+        limit = request.get("max_completion_tokens") or request.get("max_tokens")
+        tokens = [("reasoning_content", t) for t in TOKEN.findall(reasoning)]
+        tokens += [("content", t) for t in TOKEN.findall(content)]
+        tokens = tokens[:limit] if limit else tokens
+        usage = {
+            "prompt_tokens": sum(
+                len(TOKEN.findall(str(m.get("content", ""))))
+                for m in request.get("messages", [])
+            ),
+            "completion_tokens": len(tokens),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        reply: dict[str, Any] = {
+            "id": "chatcmpl-mock",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+        }
+        start = time.monotonic()
+        rate = self.tokens_per_second
+
+        def due(i: int) -> float:
+            """Seconds after the request at which token i is due."""
+            offset = self.ttft + (i / rate if rate else 0.0)
+            if self.wait and start + offset > time.monotonic():
+                time.sleep(start + offset - time.monotonic())
+            return offset
+
+        if not request.get("stream"):
+            reply["offset"] = due(max(len(tokens) - 1, 0))
+            message: dict[str, Any] = {"role": "assistant", "content": ""}
+            for field, token in tokens:
+                message[field] = message.get(field, "") + token
+            reply.update(
+                object="chat.completion",
+                choices=[{"index": 0, "message": message, "finish_reason": "stop"}],
+                usage=usage,
+            )
+            handler._send(200, reply)  # type: ignore
+            return
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Cache-Control", "no-cache")
+        # No Content-Length: the stream ends with the connection.
+        handler.send_header("Connection", "close")
+        handler.end_headers()
+        handler.close_connection = True
+        reply["object"] = "chat.completion.chunk"
+
+        def event(delta: dict[str, Any], **extra: Any) -> None:  # noqa: ANN401
+            choice = {"index": 0, "delta": delta, "finish_reason": None}
+            choice.update(extra.pop("choice", {}))
+            chunk = {**reply, "choices": [choice], **extra}
+            handler.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            handler.wfile.flush()
+
+        try:
+            offset = due(0)
+            for i, (field, token) in enumerate(tokens):
+                offset = due(i)
+                delta = (
+                    {"role": "assistant", field: token} if i == 0 else {field: token}
+                )
+                event(delta, offset=offset)
+            event({}, choice={"finish_reason": "stop"}, usage=usage, offset=offset)
+            handler.wfile.write(b"data: [DONE]\n\n")
+            handler.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client stopped reading, e.g. at the end of its budget.
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Mock OpenAI-compatible chat completions server."
+    )
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--reply",
+        type=str,
+        nargs="+",
+        default=["\\boxed{S}"],
+        help="Replies used in turn; text before </think> is sent as reasoning",
+    )
+    parser.add_argument(
+        "--replay",
+        type=str,
+        nargs="*",
+        default=[],
+        help="Agent CSV logs whose recorded prompts get their recorded responses",
+    )
+    parser.add_argument("--ttft", type=float, default=0.0)
+    parser.add_argument("--tokens_per_second", type=float, default=None)
+    parser.add_argument("--error_rate", type=float, default=0.0)
+    parser.add_argument("--error_status", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--no_wait",
+        action="store_true",
+        help="Send replies at once, for agents on a virtual clock",
+    )
+    args = parser.parse_args()
+
+    server = MockLLMServer(
+        args.reply[0] if len(args.reply) == 1 else args.reply,
+        replays=load_replays(args.replay),
+        ttft=args.ttft,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+        wait=not args.no_wait,
+        host=args.host,
+        port=args.port,
+    )
+    print(f"Serving chat completions at {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
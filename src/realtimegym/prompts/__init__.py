@@ -12,6 +12,14 @@ Available game modules:
 - snake: Snake game prompts
 """
 
-from . import freeway, overcooked, snake
+from importlib import import_module
+from typing import Any
 
 __all__ = ["overcooked", "freeway", "snake"]
+
+
+def __getattr__(name: str) -> Any:  # noqa: ANN401
+    """Import game modules on first use; overcooked loads the whole Overcooked stack."""
+    if name in __all__:
+        return import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -37,8 +37,8 @@ def state_to_description(
     game_turn = state_for_llm["game_turn"]
     description = "**Cells occupied by walls**:\n"
     description += f"\t - Border Cells: x=0/x={state_for_llm['size'] - 1} or y=0/y={state_for_llm['size'] - 1}.\n"
-    description += f"\t - Internal Obstacles: {state_for_llm['internal_obstacles'] if len(state_for_llm['internal_obstacles']) > 0 else 'No internal obstacles'}\n"
-    description += f"**Snake Positions**:{state_for_llm['snake']}\n**Snake Head Direction**: {state_for_llm['snake_dir']}\n"
+    description += f"\t - Internal Obstacles: {list(state_for_llm['internal_obstacles']) if len(state_for_llm['internal_obstacles']) > 0 else 'No internal obstacles'}\n"
+    description += f"**Snake Positions**:{list(state_for_llm['snake'])}\n**Snake Head Direction**: {state_for_llm['snake_dir']}\n"
     description += "**Food Positions, Life Span and Value**:\n"
     for x, y, life_span, value in state_for_llm["foods"]:
         description += f"\t- ({x}, {y}, {life_span}, {value})\n"
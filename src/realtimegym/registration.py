@@ -0,0 +1,201 @@
+"""
+Environment registry: `register()` games and variants, `make()` them by ID.
+
+An entry point is a factory with the signature of the games' `setup_env`,
+`(seed, save_trajectory_gifs, **kwargs) -> (env, actual_seed, renderer)`,
+given as a callable or as a "module:function" string that is imported on the
+first `make()`. IDs may hold `{name}` fields, e.g. "Snake-{board_size}x{board_size}-v0";
+the matched values are passed to the factory as keyword arguments. A field
+can be limited to a list of values, e.g. the layouts of "Overcooked-{layout}".
+
+Third-party packages add games through the "realtimegym.envs" entry point
+group, mapping an ID (or ID pattern) to its factory:
+
+    [project.entry-points."realtimegym.envs"]
+    "Tetris-v0" = "my_package.tetris:setup_env"
+"""
+
+import re
+from importlib import import_module
+from typing import Any, Callable, Collection, NamedTuple, Optional, Union
+
+ENTRY_POINT_GROUP = "realtimegym.envs"
+
+Factory = Callable[..., tuple[Any, int, Any]]
+
+
+class EnvSpec(NamedTuple):
+    id: str
+    entry_point: Union[str, Factory]
+    kwargs: dict[str, Any]
+
+    @property
+    def game(self) -> str:
+        """Name of the module holding the factory, e.g. "snake"."""
+        if isinstance(self.entry_point, str):
+            module = self.entry_point.split(":")[0]
+        else:
+            module = self.entry_point.__module__
+        return module.rsplit(".", 1)[-1]
+
+
+# ID (or ID pattern) -> spec, in registration order
+_REGISTRY: dict[str, EnvSpec] = {}
+# ID pattern -> regular expression matching the IDs it stands for
+_PATTERNS: dict[str, re.Pattern] = {}
+# ID pattern -> field -> function listing the values the field may take
+_CHOICES: dict[str, dict[str, Callable[[], Collection[str]]]] = {}
+# "module:function" -> the imported factory
+_FACTORIES: dict[str, Factory] = {}
+_plugins_loaded = False
+
+
+def _compile(pattern: str) -> re.Pattern:
+    seen: set[str] = set()
+    regex = ""
+    for literal, field in re.findall(r"([^{]*)(?:\{(\w+)\})?", pattern):
+        regex += re.escape(literal)
+        if field and field in seen:
+            regex += f"(?P={field})"
+        elif field:
+            seen.add(field)
+            regex += rf"(?P<{field}>\w+?)"
+    return re.compile(regex)
+
+
+def register(
+    env_id: str,
+    entry_point: Union[str, Factory],
+    field_choices: Optional[dict[str, Callable[[], Collection[str]]]] = None,
+    **kwargs: Any,  # noqa: ANN401
+) -> None:
+    """
+    Register an environment ID.
+
+    Args:
+        env_id: Environment identifier; `{name}` fields make it a pattern
+                whose values are passed to the factory (digits as int)
+        entry_point: Factory, or "module:function" imported on first use
+        field_choices: Field name -> function listing the values it may
+                take, called on lookup; IDs with other values are unknown
+        kwargs: Keyword arguments for the factory, e.g. cognitive_load="E"
+
+    Examples:
+        >>> import realtimegym
+        >>> realtimegym.register(
+        ...     "Snake-{board_size}x{board_size}-v3",
+        ...     "realtimegym.environments.snake:setup_env",
+        ...     cognitive_load="H",
+        ...     obstacle_density=0.3,
+        ... )
+        >>> env, seed, _ = realtimegym.make("Snake-64x64-v3")
+    """
+    if env_id in _REGISTRY:
+        raise ValueError(f"Environment ID {env_id} is already registered.")
+    _REGISTRY[env_id] = EnvSpec(env_id, entry_point, kwargs)
+    if "{" in env_id:
+        _PATTERNS[env_id] = _compile(env_id)
+        _CHOICES[env_id] = field_choices or {}
+
+
+def _load_plugins() -> None:
+    """Register the IDs of installed packages, once and without importing them."""
+    global _plugins_loaded
+    if _plugins_loaded:
+        return
+    _plugins_loaded = True
+    from importlib.metadata import entry_points
+
+    found = entry_points()
+    if hasattr(found, "select"):
+        group = found.select(group=ENTRY_POINT_GROUP)
+    else:  # Python < 3.10
+        group = found.get(ENTRY_POINT_GROUP, [])
+    for entry in group:
+        if entry.name not in _REGISTRY:
+            register(entry.name, entry.value)
+
+
+def _find(env_id: str) -> Optional[EnvSpec]:
+    if env_id in _REGISTRY and env_id not in _PATTERNS:
+        return _REGISTRY[env_id]
+    for pattern, regex in _PATTERNS.items():
+        match = regex.fullmatch(env_id)
+        choices = _CHOICES.get(pattern, {})
+        if match and all(match[name] in allowed() for name, allowed in choices.items()):
+            values = {
+                name: int(value) if value.isdigit() else value
+                for name, value in match.groupdict().items()
+            }
+            base = _REGISTRY[pattern]
+            return EnvSpec(env_id, base.entry_point, {**base.kwargs, **values})
+    return None
+
+
+def spec(env_id: str) -> EnvSpec:
+    """
+    Look up an environment ID, filling in the fields of a matching pattern.
+
+    Raises:
+        ValueError: If no registered ID or pattern matches
+    """
+    found = _find(env_id)
+    if found is None:
+        _load_plugins()
+        found = _find(env_id)
+    if found is None:
+        available = ", ".join(_REGISTRY.keys())
+        raise ValueError(
+            f"Unknown environment ID: {env_id}. Available environments: {available}"
+        )
+    return found
+
+
+def _factory(entry_point: Union[str, Factory]) -> Factory:
+    if not isinstance(entry_point, str):
+        return entry_point
+    if entry_point not in _FACTORIES:
+        module, _, name = entry_point.partition(":")
+        _FACTORIES[entry_point] = getattr(import_module(module), name)
+    return _FACTORIES[entry_point]
+
+
+def make(
+    env_id: str,
+    seed: int = 0,
+    render: bool = False,
+    **kwargs: Any,  # noqa: ANN401
+) -> tuple[Any, int, Any]:
+    """
+    Create an environment instance.
+
+    Args:
+        env_id: Environment identifier (e.g., 'Freeway-v0', 'Snake-v1', 'Overcooked-v2')
+                Version suffixes: -v0 (Easy), -v1 (Medium), -v2 (Hard)
+                Snake also comes on any board size, e.g. 'Snake-32x32-v1', and
+                Overcooked on any layout, e.g. 'Overcooked-cramped_room'
+        seed: Index of the episode seed for the chosen difficulty
+              (Freeway accepts thousands of seeds per level, see
+              `python -m realtimegym.solvers.freeway`)
+        render: Whether to enable rendering for trajectory visualization
+        kwargs: Extra keyword arguments for the factory, overriding the
+                registered ones (e.g. obstacle_density for Snake)
+
+    Returns:
+        Tuple of (env, actual_seed, render_object)
+        - env: The environment instance
+        - actual_seed: The actual seed used (mapped from input seed)
+        - render_object: Renderer instance if render=True, else None
+
+    Examples:
+        >>> import realtimegym
+        >>> env, seed, renderer = realtimegym.make('Freeway-v0', seed=0)
+        >>> obs = env.reset()
+        >>> action = 'U'  # Move up
+        >>> reward, done = env.act(action)
+    """
+    env_spec = spec(env_id)
+    factory = _factory(env_spec.entry_point)
+    return factory(
+        seed=seed, save_trajectory_gifs=render, **{**env_spec.kwargs, **kwargs}
+    )
@@ -0,0 +1,11 @@
+"""
+Solvers for RealtimeGym games.
+
+These are exact or search-based reference solvers that run directly on the
+environment dynamics. They are used offline (seed generation, score ceilings)
+and never call an LLM.
+
+Available solver modules:
+- freeway: Exact shortest-crossing solver and seed catalog generator
+- snake: Lookahead oracle, score ceiling and per-decision regret
+"""
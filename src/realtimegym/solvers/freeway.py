@@ -0,0 +1,168 @@
+"""Exact Freeway solver and difficulty-indexed seed catalog generator.
+
+Cars in Freeway move independently of the player, and a collision only sends
+the player back to the bottom with the initial traffic. An episode is
+therefore fully described by a table of which lanes are blocked at column 4
+on each turn, and the fastest crossing is a breadth-first search over
+(turn, position).
+
+Usage:
+    python -m realtimegym.solvers.freeway --per-band 2048 --workers 8
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Optional
+
+import numpy as np
+
+from realtimegym.environments.freeway import CATALOG_FILE, FreewayEnv, seed_mapping
+
+MAX_TURNS = 100
+
+# cognitive load -> (min optimal length, max optimal length, min collision density)
+# Fitted on the hand-picked seeds in `freeway.seed_mapping`, all of which fall
+# in their band but M seed 1069 (optimal length 12, so E); it keeps its index
+# in the catalog regardless. Widening M to 12 would overlap E.
+BANDS = {
+    "E": (11, 13, 0.08),
+    "M": (14, 16, 0.10),
+    "H": (19, 21, 0.15),
+}
+
+
+def collision_table(seed: int, horizon: int = MAX_TURNS) -> np.ndarray:
+    """
+    Simulate the traffic of a seed without a player.
+
+    Returns:
+        Boolean array of shape (horizon + 1, 10); entry [t, y] is True when a
+        player standing on row y after the move of turn t would be hit.
+    """
+    env = FreewayEnv()
+    env.set_seed(seed)
+    env.reset()
+    table = np.zeros((horizon + 1, 10), dtype=bool)
+    for t in range(1, horizon + 1):
+        env._update_cars()
+        for lane in range(1, 9):
+            table[t, lane] = env._collides(lane)
+    return table
+
+
+def solve(table: np.ndarray) -> Optional[str]:
+    """Shortest collision-free action sequence reaching row 0, or None."""
+    # parents[t][pos] = (previous position, action) for rows reached at turn t
+    parents: list[dict[int, tuple[int, str]]] = [{9: (9, "")}]
+    for t in range(1, table.shape[0]):
+        frontier: dict[int, tuple[int, str]] = {}
+        for pos in parents[-1]:
+            for action, new_pos in (
+                ("U", max(0, pos - 1)),
+                ("S", pos),
+                ("D", min(9, pos + 1)),
+            ):
+                if new_pos == 0:
+                    actions = [action]
+                    for step in range(t - 1, 0, -1):
+                        pos, action = parents[step][pos]
+                        actions.append(action)
+                    return "".join(reversed(actions))
+                if not table[t, new_pos] and new_pos not in frontier:
+                    frontier[new_pos] = (pos, action)
+        parents.append(frontier)
+    return None
+
+
+def optimal_length(table: np.ndarray) -> Optional[int]:
+    """Fewest turns needed to reach row 0 without a collision, or None."""
+    actions = solve(table)
+    return len(actions) if actions is not None else None
+
+
+def collision_density(table: np.ndarray, length: Optional[int]) -> float:
+    """Fraction of blocked (turn, lane) cells while the optimal crossing runs."""
+    horizon = length if length is not None else table.shape[0] - 1
+    return float(table[1 : horizon + 1, 1:9].mean())
+
+
+def classify(seed: int) -> tuple[Optional[int], float, Optional[str]]:
+    """
+    Classify a seed by its optimal solution length and collision density.
+
+    Returns:
+        (optimal length or None if unsolvable, collision density, band or None)
+    """
+    table = collision_table(seed)
+    length = optimal_length(table)
+    density = collision_density(table, length)
+    band = None
+    if length is not None:
+        for name, (lo, hi, min_density) in BANDS.items():
+            if lo <= length <= hi and density >= min_density:
+                band = name
+                break
+    return length, density, band
+
+
+def _scan_chunk(start: int, stop: int) -> list[tuple[int, Optional[str]]]:
+    return [(seed, classify(seed)[2]) for seed in range(start, stop)]
+
+
+def build_catalog(
+    per_band: int,
+    start: int = 1000,
+    workers: Optional[int] = None,
+    chunk_size: int = 1000,
+) -> dict[str, Any]:
+    """
+    Scan seeds upwards from `start` until every band holds `per_band` seeds.
+
+    The legacy seeds of `seed_mapping` keep indices 0-7 of their band. Chunks
+    are consumed in seed order, so the result does not depend on `workers`.
+    """
+    legacy = {seed for mapping in seed_mapping.values() for seed in mapping.values()}
+    seeds = {load: list(seed_mapping[load].values()) for load in BANDS}
+    workers = workers or os.cpu_count() or 1
+    next_start = start
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while any(len(band) < per_band for band in seeds.values()):
+            bounds = [next_start + i * chunk_size for i in range(workers * 4 + 1)]
+            next_start = bounds[-1]
+            for chunk in executor.map(_scan_chunk, bounds[:-1], bounds[1:]):
+                for seed, band in chunk:
+                    if band is None or seed in legacy or len(seeds[band]) >= per_band:
+                        continue
+                    seeds[band].append(seed)
+    return {
+        "version": 1,
+        "scanned": [start, next_start],
+        "bands": {load: list(criteria) for load, criteria in BANDS.items()},
+        "seeds": seeds,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the Freeway seed catalog.")
+    parser.add_argument("--per-band", type=int, default=2048)
+    parser.add_argument("--start", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", type=str, default=str(CATALOG_FILE))
+    args = parser.parse_args()
+    start_time = time.time()
+    catalog = build_catalog(args.per_band, start=args.start, workers=args.workers)
+    with open(args.output, "w") as f:
+        json.dump(catalog, f, separators=(",", ":"))
+        f.write("\n")
+    lo, hi = catalog["scanned"]
+    print(
+        f"Scanned seeds [{lo}, {hi}) in {time.time() - start_time:.1f}s, "
+        f"wrote {args.per_band} seeds per band to {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""Lookahead oracle and per-seed score ceiling for Snake.
+
+Food in Snake spawns every 3 turns in the pre-shuffled `coords` order of the
+seed, whatever the snake does, so an episode is fully determined by its seed
+and the actions taken. The oracle searches compact (body, direction, eaten
+foods) states with a beam and a transposition table, and a relaxed search
+that ignores the body bounds the score from above.
+
+Usage:
+    python -m realtimegym.solvers.snake build --width 1000 --workers 8
+    python -m realtimegym.solvers.snake evaluate logs/snake_E_*/0_*.csv --load E
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Optional
+
+import pandas as pd
+
+from realtimegym.environments.snake import (
+    DEFAULT_BOARD_SIZE,
+    FOOD_LIFE_SPAN,
+    FOOD_SPAWN_PERIOD,
+    INITIAL_FOOD,
+    SnakeEnv,
+    generate_layout,
+    seed_mapping,
+    start_cell,
+)
+
+MAX_TURNS = 100
+ORACLE_FILE = Path(__file__).parent / "snake_oracle.json"
+MOVES = {"L": (-1, 0), "R": (1, 0), "U": (0, 1), "D": (0, -1)}
+REVERSE = {"L": "R", "R": "L", "U": "D", "D": "U"}
+
+# (body head first, direction, eaten foods still on the board)
+State = tuple[tuple[tuple[int, int], ...], str, frozenset[int]]
+
+
+class Episode:
+    """Obstacles and food schedule of a Snake seed."""
+
+    def __init__(self, seed: int, board_size: int = DEFAULT_BOARD_SIZE) -> None:
+        self.seed = seed
+        self.B = board_size
+        obstacles, coords = generate_layout(seed, board_size)
+        self.walls = set(obstacles)
+        for i in range(board_size):
+            self.walls.update(
+                {(i, 0), (i, board_size - 1), (0, i), (board_size - 1, i)}
+            )
+        # Food j appears at the end of turn spawn[j] and can be eaten on the
+        # following FOOD_LIFE_SPAN turns.
+        self.cells: list[tuple[int, int]] = []
+        self.spawn: list[int] = []
+        for turn in range(MAX_TURNS):
+            count = INITIAL_FOOD if turn == 0 else turn % FOOD_SPAWN_PERIOD == 1
+            for _ in range(count):
+                self.cells.append(coords[len(self.cells) % len(coords)])
+                self.spawn.append(turn)
+        self.food_at: dict[tuple[int, int], list[int]] = {}
+        for food, cell in enumerate(self.cells):
+            self.food_at.setdefault(cell, []).append(food)
+
+    def on_board(self, turn: int) -> list[int]:
+        """Foods not yet expired after `turn` turns, eaten or not."""
+        return [
+            food
+            for food, spawn in enumerate(self.spawn)
+            if spawn <= turn < spawn + FOOD_LIFE_SPAN
+        ]
+
+    def food(self, cell: tuple[int, int], turn: int, eaten: frozenset[int]) -> int:
+        """Food on `cell` that can be eaten on turn `turn`, or -1."""
+        for food in self.food_at.get(cell, ()):
+            if self.spawn[food] < turn <= self.spawn[food] + FOOD_LIFE_SPAN:
+                return -1 if food in eaten else food
+        return -1
+
+    def step(self, state: State, action: str, turn: int) -> tuple[Optional[State], int]:
+        """
+        Apply `action` on turn `turn` with the rules of `SnakeEnv.step`.
+
+        Returns:
+            (next state or None if the snake died, reward)
+        """
+        body, direction, eaten = state
+        if action in MOVES and action != REVERSE[direction]:
+            direction = action
+        dx, dy = MOVES[direction]
+        head = (body[0][0] + dx, body[0][1] + dy)
+        tail = body[-1]
+        food = self.food(head, turn, eaten)
+        if (
+            (head in body and head != tail)
+            or head in self.walls
+            or (head == tail and food >= 0)
+        ):
+            return None, -1
+        if food >= 0:
+            body = (head,) + body
+            eaten = eaten | {food}
+        else:
+            body = (head,) + body[:-1]
+        live = {f for f in eaten if turn < self.spawn[f] + FOOD_LIFE_SPAN}
+        return (body, direction, frozenset(live)), int(food >= 0)
+
+    def initial_state(self) -> State:
+        return ((start_cell(self.B),), "L", frozenset())
+
+    def state_of(self, env: SnakeEnv) -> State:
+        """Compact state of a running `SnakeEnv` on this seed."""
+        present = {(x, y) for x, y, _, _ in env.foods()}
+        eaten = frozenset(
+            food
+            for food in self.on_board(env.game_turn)
+            if self.cells[food] not in present
+        )
+        return (tuple(reversed(env.snake)), env.dir, eaten)
+
+    def _priority(self, state: State, turn: int) -> int:
+        """Distance from the head to the closest food that is still edible."""
+        (hx, hy), _, eaten = state[0][0], state[1], state[2]
+        best = 2 * self.B
+        for food in self.on_board(turn):
+            if food in eaten:
+                continue
+            x, y = self.cells[food]
+            distance = abs(x - hx) + abs(y - hy)
+            if distance <= self.spawn[food] + FOOD_LIFE_SPAN - turn:
+                best = min(best, distance)
+        return best
+
+    def search(
+        self, state: State, turn: int, width: int = 1000
+    ) -> tuple[int, list[str]]:
+        """
+        Beam search for the best return from `state` after `turn` turns.
+
+        States reached on the same turn with the same body, direction and
+        eaten foods are merged. Beams are ranked by reward collected, then by
+        the distance to the closest edible food.
+
+        Returns:
+            (best reward until the end of the episode, actions achieving it)
+        """
+        # state -> (reward so far, parent state, action) per turn
+        beam: dict[State, tuple[int, Optional[State], str]] = {state: (0, None, "")}
+        history = [beam]
+        best: tuple[int, int, Optional[State], str] = (-1, turn + 1, state, "S")
+        for t in range(turn + 1, MAX_TURNS + 1):
+            expanded: dict[State, tuple[int, Optional[State], str]] = {}
+            for parent, (reward, _, _) in beam.items():
+                for action in MOVES:
+                    if action == REVERSE[parent[1]]:
+                        continue
+                    child, r = self.step(parent, action, t)
+                    if child is None:
+                        if reward - 1 > best[0]:
+                            best = (reward - 1, t, parent, action)
+                        continue
+                    if child not in expanded or expanded[child][0] < reward + r:
+                        expanded[child] = (reward + r, parent, action)
+            if not expanded:
+                break
+            ranked = sorted(
+                expanded.items(),
+                key=lambda item: (-item[1][0], self._priority(item[0], t)),
+            )
+            beam = dict(ranked[:width])
+            history.append(beam)
+            if t == MAX_TURNS:
+                final, (reward, _, _) = ranked[0]
+                if reward > best[0]:
+                    best = (reward, t + 1, final, "")
+        reward, end, last, action = best
+        actions = [action] if action else []
+        for t in range(end - 1, turn, -1):
+            assert last is not None  # only the start state has no parent
+            _, last, action = history[t - turn][last]
+            actions.append(action)
+        return reward, list(reversed(actions))
+
+    def upper_bound(self) -> int:
+        """
+        Most food a snake could eat if its body were not in the way.
+
+        The head still has to move to a free neighbouring cell every turn, so
+        every real episode is also a path of this relaxation.
+        """
+        start = start_cell(self.B)
+        # (head, eaten foods still on the board) -> food eaten so far
+        layer: dict[tuple[tuple[int, int], frozenset[int]], int] = {
+            (start, frozenset()): 0
+        }
+        for turn in range(1, MAX_TURNS + 1):
+            expanded: dict[tuple[tuple[int, int], frozenset[int]], int] = {}
+            for ((x, y), eaten), count in layer.items():
+                for dx, dy in MOVES.values():
+                    head = (x + dx, y + dy)
+                    if head in self.walls:
+                        continue
+                    food = self.food(head, turn, eaten)
+                    new_eaten = eaten | {food} if food >= 0 else eaten
+                    new_eaten = frozenset(
+                        f for f in new_eaten if turn < self.spawn[f] + FOOD_LIFE_SPAN
+                    )
+                    key = (head, new_eaten)
+                    value = count + (food >= 0)
+                    if expanded.get(key, -1) < value:
+                        expanded[key] = value
+            layer = expanded
+        return max(layer.values())
+
+
+def solve(seed: int, width: int = 1000) -> dict[str, Any]:
+    """Oracle score, action sequence and score ceiling of a seed."""
+    episode = Episode(seed)
+    score, actions = episode.search(episode.initial_state(), 0, width)
+    return {
+        "score": score,
+        "upper_bound": episode.upper_bound(),
+        "actions": "".join(actions),
+    }
+
+
+_oracle: Optional[dict[str, Any]] = None
+
+
+def load_oracle() -> dict[str, Any]:
+    """Cached oracle results, keyed by seed as a string."""
+    global _oracle
+    if _oracle is None:
+        with open(ORACLE_FILE) as f:
+            _oracle = json.load(f)
+    return _oracle
+
+
+def oracle(seed: int, width: Optional[int] = None) -> dict[str, Any]:
+    """Oracle result of a seed, from the cache when available."""
+    cache = load_oracle() if ORACLE_FILE.exists() else {"width": None, "seeds": {}}
+    if str(seed) in cache["seeds"] and width in (None, cache["width"]):
+        return cache["seeds"][str(seed)]
+    return solve(seed, width or 1000)
+
+
+def evaluate(
+    seed: int, actions: list[Any], width: int = 200
+) -> tuple[dict[str, Any], pd.DataFrame]:
+    """
+    Score an action log against the oracle.
+
+    Replays the actions in `SnakeEnv` and searches the best return from every
+    visited state. Values are made consistent backwards, so that regret, the
+    reward lost by a decision compared to the best one, is never negative.
+
+    Returns:
+        (summary with score, oracle score, ceiling and normalized score,
+         per-turn table with the best action, value and regret)
+    """
+    episode = Episode(seed)
+    env = SnakeEnv()
+    env.set_seed(seed)
+    env.reset()
+    rows: list[dict[str, Any]] = []
+    done = False
+    for action in actions:
+        if done:
+            break
+        state = episode.state_of(env)
+        value, best = episode.search(state, env.game_turn, width)
+        before = env.reward
+        _, done, reward, _ = env.step(action)
+        rows.append(
+            {
+                "turn": env.game_turn - 1,
+                "action": action,
+                "best_action": best[0] if best else "",
+                "reward": reward - before,
+                "value": value,
+            }
+        )
+    future = (
+        0 if done else episode.search(episode.state_of(env), env.game_turn, width)[0]
+    )
+    for i in reversed(range(len(rows))):
+        rows[i]["value"] = max(rows[i]["value"], rows[i]["reward"] + future)
+        rows[i]["regret"] = rows[i]["value"] - rows[i]["reward"] - future
+        future = rows[i]["value"]
+    table = pd.DataFrame(rows)
+    result = oracle(seed)
+    best = max(result["score"], future)
+    summary = {
+        "seed": seed,
+        "score": env.reward,
+        "oracle_score": best,
+        "upper_bound": result["upper_bound"],
+        "normalized_score": env.reward / best if best > 0 else float("nan"),
+        "total_regret": float(table["regret"].sum()) if rows else 0.0,
+    }
+    return summary, table
+
+
+def _solve_seed(seed: int, width: int) -> tuple[int, dict[str, Any]]:
+    return seed, solve(seed, width)
+
+
+def build(width: int, workers: Optional[int] = None) -> dict[str, Any]:
+    """Run the oracle on every seed of Snake-v0/v1/v2."""
+    seeds = [seed for mapping in seed_mapping.values() for seed in mapping.values()]
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = dict(executor.map(_solve_seed, seeds, [width] * len(seeds)))
+    return {"version": 1, "width": width, "seeds": {str(s): results[s] for s in seeds}}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Snake lookahead oracle.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="Cache oracle results.")
+    build_parser.add_argument("--width", type=int, default=1000)
+    build_parser.add_argument("--workers", type=int, default=None)
+    build_parser.add_argument("--output", type=str, default=str(ORACLE_FILE))
+    evaluate_parser = commands.add_parser("evaluate", help="Score agent logs.")
+    evaluate_parser.add_argument(
+        "logs", nargs="+", help="CSV logs named {r}_{seed}.csv"
+    )
+    evaluate_parser.add_argument("--load", choices=["E", "M", "H"], required=True)
+    evaluate_parser.add_argument("--width", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start_time = time.time()
+        cache = build(args.width, args.workers)
+        with open(args.output, "w") as f:
+            json.dump(cache, f, indent=1)
+            f.write("\n")
+        print(
+            f"Solved {len(cache['seeds'])} seeds in {time.time() - start_time:.1f}s, "
+            f"wrote {args.output}"
+        )
+        return
+
+    summaries = []
+    for log in args.logs:
+        match = re.search(r"(\d+)_(\d+)\.csv$", log)
+        if match is None:
+            raise ValueError(f"Cannot read the seed from log name {log}")
+        seed = seed_mapping[args.load][int(match.group(2))]
+        actions = pd.read_csv(log)["action"].tolist()
+        summary, table = evaluate(seed, actions, args.width)
+        table.to_csv(log.replace(".csv", "_regret.csv"), index=False)
+        summaries.append({"log": log, **summary})
+    df = pd.DataFrame(summaries)
+    print(df.to_string(index=False))
+    print(f"Mean normalized score: {df['normalized_score'].mean():.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+"""Batched environments: step many episodes of one game together."""
+
+import multiprocessing as mp
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+from multiprocessing.connection import Connection
+from typing import Any, Literal, Optional, Sequence, Union
+
+import numpy as np
+
+BACKENDS = ("sync", "thread", "subprocess", "shared_memory")
+
+# name -> (shared memory block name, array shape, dtype string)
+SharedSpec = dict[str, tuple[str, tuple[int, ...], str]]
+
+
+def _restart(env: Any) -> tuple[dict[str, Any], bool]:  # noqa: ANN401
+    """Reset an episode to the start of its seed, RNG included (Freeway draws
+    each episode's traffic from it)."""
+    env.set_seed(env.seed)
+    return env.reset()
+
+
+class _EnvGroup:
+    """Several episodes of one game, stepped in turn with automatic reset."""
+
+    def __init__(self, env_id: str, seeds: Sequence[int]) -> None:
+        import realtimegym
+
+        self.game = realtimegym.spec(env_id).game
+        self.envs = []
+        self.real_seeds = []
+        for seed in seeds:
+            env, real_seed, _ = realtimegym.make(env_id, seed=seed, render=False)
+            self.envs.append(env)
+            self.real_seeds.append(real_seed)
+
+    def reset(self) -> list[tuple[dict[str, Any], bool]]:
+        return [_restart(env) for env in self.envs]
+
+    def step(
+        self, actions: Sequence[str]
+    ) -> list[tuple[dict[str, Any], bool, float, bool]]:
+        return [self.step_one(i, action) for i, action in enumerate(actions)]
+
+    def step_one(self, i: int, action: str) -> tuple[dict[str, Any], bool, float, bool]:
+        env = self.envs[i]
+        obs, done, reward, reset = env.step(action)
+        if done:
+            obs, _ = _restart(env)
+        return obs, done, reward, reset
+
+    def write(self, arrays: dict[str, np.ndarray], offset: int, results: list) -> None:
+        """Write tensor observations and flags into rows `offset`... of `arrays`."""
+        from realtimegym.wrappers import encode
+
+        for i, (env, result) in enumerate(zip(self.envs, results)):
+            row = offset + i
+            arrays["obs"][row] = encode(env, self.game)
+            arrays["dones"][row] = result[1]
+            # reset() results are (obs, done); step() results add reward, reset
+            arrays["rewards"][row] = result[2] if len(result) > 2 else env.reward
+            arrays["resets"][row] = len(result) > 3 and result[3]
+
+
+def _attach(
+    spec: SharedSpec,
+) -> tuple[list[shared_memory.SharedMemory], dict[str, np.ndarray]]:
+    blocks = []
+    arrays = {}
+    for key, (name, shape, dtype) in spec.items():
+        block = shared_memory.SharedMemory(name=name)
+        blocks.append(block)
+        arrays[key] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    return blocks, arrays
+
+
+def _worker(
+    remote: Connection,
+    parent_remote: Connection,
+    env_id: str,
+    seeds: list[int],
+    spec: Optional[SharedSpec] = None,
+    offset: int = 0,
+) -> None:
+    parent_remote.close()
+    blocks: list[shared_memory.SharedMemory] = []
+    arrays = None
+    if spec is not None:
+        blocks, arrays = _attach(spec)
+    try:
+        try:
+            group = _EnvGroup(env_id, seeds)
+            remote.send(group.real_seeds)
+        except Exception as e:
+            remote.send(e)
+            return
+        while True:
+            command, data = remote.recv()
+            if command == "close":
+                break
+            try:
+                if command == "step":
+                    results: Any = group.step(data)
+                elif command == "reset":
+                    results = group.reset()
+                else:
+                    raise NotImplementedError(f"Unknown command {command}")
+                if arrays is not None:
+                    # Only an acknowledgement crosses the pipe.
+                    group.write(arrays, offset, results)
+                    results = None
+                remote.send(results)
+            except Exception as e:
+                # Report the error to the parent instead of dying silently.
+                remote.send(e)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        remote.close()
+        arrays = None
+        for block in blocks:
+            block.close()
+
+
+def _receive(remote: Connection) -> Any:  # noqa: ANN401
+    result = remote.recv()
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+class VecEnv:
+    """
+    Batched version of the `reset()`/`step()` API.
+
+    `step(actions)` takes one action per episode and returns lists of the
+    usual per-episode results. An episode that finishes is reset right away:
+    its `done` flag and final cumulative reward are reported, and the
+    observation returned is the first one of the next episode on its seed.
+
+    With the "shared_memory" backend, observations are the tensors of
+    `realtimegym.wrappers.TensorEnv`, stacked into one uint8 array that the
+    workers write in place. That array is reused by the next `reset()` or
+    `step()`; copy it to keep an observation.
+    """
+
+    def __init__(
+        self,
+        env_id: str,
+        seeds: Sequence[int],
+        backend: str = "sync",
+        num_workers: Optional[int] = None,
+        context: Optional[Literal["fork", "spawn", "forkserver"]] = None,
+    ) -> None:
+        if backend not in BACKENDS:
+            raise ValueError(
+                f"Unknown backend: {backend}. Available backends: {', '.join(BACKENDS)}"
+            )
+        if len(seeds) == 0:
+            raise ValueError("make_vec needs at least one seed.")
+        self.env_id = env_id
+        self.seeds = list(seeds)
+        self.num_envs = len(self.seeds)
+        self.backend = backend
+        self.closed = False
+        self._blocks: list[shared_memory.SharedMemory] = []
+        self._remotes: list[Connection] = []
+        self._processes: list[Any] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        if backend in ("subprocess", "shared_memory"):
+            spec = self._allocate() if backend == "shared_memory" else None
+            num_workers = min(num_workers or mp.cpu_count(), self.num_envs)
+            # Contiguous chunks, so that results come back in seed order.
+            self._chunks = [
+                chunk.tolist()
+                for chunk in np.array_split(np.arange(self.num_envs), num_workers)
+            ]
+            ctx = mp.get_context(context)
+            for chunk in self._chunks:
+                remote, work_remote = ctx.Pipe()
+                seeds_chunk = [self.seeds[i] for i in chunk]
+                process = ctx.Process(
+                    target=_worker,
+                    args=(work_remote, remote, env_id, seeds_chunk, spec, chunk[0]),
+                    daemon=True,
+                )
+                process.start()
+                work_remote.close()
+                self._remotes.append(remote)
+                self._processes.append(process)
+            try:
+                self.real_seeds = [
+                    seed for remote in self._remotes for seed in _receive(remote)
+                ]
+            except Exception:
+                self.close()
+                raise
+        else:
+            self._group = _EnvGroup(env_id, self.seeds)
+            self.real_seeds = self._group.real_seeds
+            if backend == "thread":
+                self._executor = ThreadPoolExecutor(max_workers=num_workers)
+
+    def _allocate(self) -> SharedSpec:
+        from realtimegym.wrappers import TensorEnv
+
+        shape = TensorEnv(self.env_id, seed=self.seeds[0]).observation_space.shape
+        assert shape is not None, "TensorEnv observations are fixed-shape."
+        N = self.num_envs
+        layout = {
+            "obs": ((N, *shape), np.uint8),
+            "dones": ((N,), np.bool_),
+            "rewards": ((N,), np.float64),
+            "resets": ((N,), np.bool_),
+        }
+        spec: SharedSpec = {}
+        self._arrays = {}
+        for key, (array_shape, dtype) in layout.items():
+            size = int(np.prod(array_shape)) * np.dtype(dtype).itemsize
+            block = shared_memory.SharedMemory(create=True, size=size)
+            self._blocks.append(block)
+            spec[key] = (block.name, array_shape, np.dtype(dtype).str)
+            self._arrays[key] = np.ndarray(array_shape, dtype=dtype, buffer=block.buf)
+        return spec
+
+    def _run(self, command: str, data: Optional[list[str]] = None) -> list:
+        """Send a command to every worker and gather their replies in order."""
+        for i, remote in enumerate(self._remotes):
+            chunk = None if data is None else [data[j] for j in self._chunks[i]]
+            remote.send((command, chunk))
+        # Take every reply before raising, so the pipes stay in step.
+        replies = [remote.recv() for remote in self._remotes]
+        for reply in replies:
+            if isinstance(reply, Exception):
+                raise reply
+        return [result for reply in replies for result in reply or []]
+
+    def reset(self) -> tuple[Union[list[dict[str, Any]], np.ndarray], np.ndarray]:
+        """
+        Reset every episode.
+
+        Returns:
+            observations (list or np.ndarray): Initial observation of each episode
+            dones (np.ndarray): Done flag of each episode
+        """
+        if self.backend == "shared_memory":
+            self._run("reset")
+            return self._arrays["obs"], self._arrays["dones"].copy()
+        if self.backend == "subprocess":
+            results = self._run("reset")
+        else:
+            results = self._group.reset()
+        obs, dones = zip(*results)
+        return list(obs), np.array(dones, dtype=bool)
+
+    def step(
+        self, actions: Sequence[str]
+    ) -> tuple[
+        Union[list[dict[str, Any]], np.ndarray], np.ndarray, np.ndarray, np.ndarray
+    ]:
+        """
+        Step every episode with its action.
+
+        Args:
+            actions: One action per episode
+
+        Returns:
+            observations (list or np.ndarray): New observation of each episode,
+                from the next episode for the ones that finished
+            dones (np.ndarray): Whether each episode finished on this step
+            rewards (np.ndarray): Cumulative reward of each episode
+            resets (np.ndarray): Reset flag returned by each environment
+        """
+        if len(actions) != self.num_envs:
+            raise ValueError(f"Expected {self.num_envs} actions, got {len(actions)}.")
+        actions = list(actions)
+        if self.backend == "shared_memory":
+            self._run("step", actions)
+            arrays = self._arrays
+            return (
+                arrays["obs"],
+                arrays["dones"].copy(),
+                arrays["rewards"].copy(),
+                arrays["resets"].copy(),
+            )
+        if self.backend == "subprocess":
+            results = self._run("step", actions)
+        elif self._executor is not None:
+            results = list(
+                self._executor.map(self._group.step_one, range(self.num_envs), actions)
+            )
+        else:
+            results = self._group.step(actions)
+        obs, dones, rewards, resets = zip(*results)
+        return (
+            list(obs),
+            np.array(dones, dtype=bool),
+            np.array(rewards),
+            np.array(resets, dtype=bool),
+        )
+
+    def close(self) -> None:
+        """Stop the worker processes or threads."""
+        if self.closed:
+            return
+        self.closed = True
+        if self.backend in ("subprocess", "shared_memory"):
+            for remote in self._remotes:
+                try:
+                    remote.send(("close", None))
+                except (BrokenPipeError, EOFError):
+                    pass
+            for process in self._processes:
+                process.join()
+        elif self._executor is not None:
+            self._executor.shutdown()
+        self._arrays = {}
+        for block in self._blocks:
+            try:
+                block.close()
+            except BufferError:
+                # An observation array is still referenced; the mapping goes
+                # away with it.
+                pass
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self) -> "VecEnv":
+        return self
+
+    def __exit__(self, *args: Any) -> None:  # noqa: ANN401
+        self.close()
+
+    def __del__(self) -> None:
+        if not getattr(self, "closed", True):
+            self.close()
+
+
+def make_vec(
+    env_id: str,
+    seeds: Sequence[int],
+    backend: str = "sync",
+    num_workers: Optional[int] = None,
+) -> VecEnv:
+    """
+    Create a batched environment with one episode per seed.
+
+    Args:
+        env_id: Environment identifier, as for `realtimegym.make`
+        seeds: Seed index of each episode, as for `realtimegym.make`
+        backend: "sync" steps the episodes one after the other in this
+                 process, "thread" steps them on a thread pool, and
+                 "subprocess" spreads them over worker processes that receive
+                 commands through pipes (best for Overcooked).
+                 "shared_memory" also uses worker processes, but they write
+                 tensor observations, rewards and flags into shared memory,
+                 so only actions and acknowledgements cross the pipes
+        num_workers: Number of threads or processes (defaults to the CPU count)
+
+    Returns:
+        VecEnv with `reset()`, `step(actions)` and `close()`; its
+        `real_seeds` holds the actual seed of each episode
+
+    Examples:
+        >>> import realtimegym
+        >>> envs = realtimegym.make_vec('Freeway-v0', seeds=range(8))
+        >>> obs, dones = envs.reset()
+        >>> obs, dones, rewards, resets = envs.step(['U'] * 8)
+    """
+    from realtimegym import spec
+
+    spec(env_id)  # Fail early on unknown IDs
+    return VecEnv(env_id, seeds, backend=backend, num_workers=num_workers)
@@ -0,0 +1,188 @@
+"""
+Gym-style wrappers with fixed-shape NumPy observations.
+
+`TensorEnv` exposes a game through the `gym.Env` API (the same `reset()` /
+`step()` signatures as Gymnasium), with integer action indices into the
+game's `ALL_ACTIONS` and uint8 observation tensors:
+
+- Freeway: [2, horizon, 10] — plane 0 marks the rows blocked at the player's
+  column over the next `horizon` turns, plane 1 the player's row
+- Snake: [4, B, B] — the board planes of `SnakeVecEnv.planes()`
+- Overcooked: [W, H, 26] — `OvercookedGridworld.lossless_state_encoding`
+  seen by the controlled player
+"""
+
+import copy
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, Optional, cast
+
+import gym
+import numpy as np
+from gym import spaces
+
+from realtimegym.environments.base import BaseEnv
+
+if TYPE_CHECKING:
+    from realtimegym.environments.freeway import FreewayEnv
+    from realtimegym.environments.overcooked import OvercookedEnv
+    from realtimegym.environments.snake import SnakeEnv
+
+# Turns of Freeway traffic ahead in the observation
+FREEWAY_HORIZON = 16
+
+
+def freeway_tensor(env: "FreewayEnv", horizon: int = FREEWAY_HORIZON) -> np.ndarray:
+    """Lane occupancy at the player's column for the next turns, and player row."""
+    tensor = np.zeros((2, horizon, 10), dtype=np.uint8)
+    # Traffic ignores the player, so it can be rolled forward on a copy.
+    traffic = copy.copy(env)
+    traffic.cars = [list(car) for car in env.cars]
+    for t in range(horizon):
+        traffic._update_cars()
+        # Same test as FreewayEnv._collides, for all lanes in one pass
+        for x, lane, _, speed, length in traffic.cars:
+            if speed is not None and 0 <= (4 - x) * (-1 if speed > 0 else 1) < length:
+                tensor[0, t, lane] = 1
+    tensor[1, :, env.pos] = 1
+    return tensor
+
+
+def snake_tensor(env: "SnakeEnv") -> np.ndarray:
+    """Board planes in the layout of `SnakeVecEnv.planes()`."""
+    B = env.B
+    tensor = np.zeros((4, B, B), dtype=np.uint8)
+    tensor[0, [0, -1], :] = 1
+    tensor[0, :, [0, -1]] = 1
+    for x, y in env.obstacle:
+        tensor[0, x, y] = 1
+    for x, y in env.snake:
+        tensor[1, x, y] = 1
+    x, y = env.snake[-1]
+    tensor[2, x, y] = 1
+    live = env.food_life > 0
+    pos = env.food_pos[live]
+    tensor[3, pos[:, 0], pos[:, 1]] = env.food_life[live] * env.food_value[live]
+    return tensor
+
+
+def overcooked_tensor(env: "OvercookedEnv") -> np.ndarray:
+    """Lossless state encoding of the controlled player (player 0)."""
+    base_env = env.gym_env.base_env
+    encoding = env.gym_env.base_mdp.lossless_state_encoding(
+        base_env.state, horizon=base_env.horizon
+    )
+    return encoding[0].astype(np.uint8)
+
+
+def encode(
+    env: BaseEnv, game: str, freeway_horizon: int = FREEWAY_HORIZON
+) -> np.ndarray:
+    """
+    Tensor observation of the current turn of a game.
+
+    Args:
+        env: Environment created by `realtimegym.make`
+        game: Its module name: "freeway", "snake" or "overcooked"
+        freeway_horizon: Turns of traffic in Freeway observations
+    """
+    if game == "freeway":
+        return freeway_tensor(cast("FreewayEnv", env), freeway_horizon)
+    if game == "snake":
+        return snake_tensor(cast("SnakeEnv", env))
+    return overcooked_tensor(cast("OvercookedEnv", env))
+
+
+class TensorEnv(gym.Env):
+    """
+    A RealtimeGym game with tensor observations and discrete actions.
+
+    `step()` returns the per-turn reward (the change of the game's cumulative
+    reward); `info["score"]` holds the cumulative value the game reports and
+    `info["reset"]` its reset flag. Episodes end on the game's own `done`
+    flag, so `truncated` is always False.
+
+    Examples:
+        >>> from realtimegym.wrappers import TensorEnv
+        >>> env = TensorEnv('Snake-v0', seed=0)
+        >>> obs, info = env.reset()
+        >>> obs, reward, terminated, truncated, info = env.step(0)
+    """
+
+    def __init__(
+        self, env_id: str, seed: int = 0, freeway_horizon: int = FREEWAY_HORIZON
+    ) -> None:
+        """
+        Args:
+            env_id: Environment identifier, as for `realtimegym.make`
+            seed: Seed index, as for `realtimegym.make`
+            freeway_horizon: Turns of traffic in Freeway observations
+        """
+        from realtimegym import spec
+
+        self.env_id = env_id
+        self.game = spec(env_id).game
+        if self.game not in ("freeway", "snake", "overcooked"):
+            raise ValueError(f"No tensor observations for {env_id}.")
+        self.freeway_horizon = freeway_horizon
+        self.actions: str = import_module(
+            f"realtimegym.prompts.{self.game}"
+        ).ALL_ACTIONS
+        self.action_space = spaces.Discrete(len(self.actions))
+        self._make(seed)
+        if self.game == "freeway":
+            shape: tuple[int, ...] = (2, freeway_horizon, 10)
+        elif self.game == "snake":
+            shape = (4, self.env.board_size, self.env.board_size)
+        else:
+            # The layout is only loaded on reset, which is deterministic for
+            # Overcooked (Freeway resets would advance the traffic RNG).
+            self.env.reset()
+            shape = self.encode().shape
+        self.observation_space = spaces.Box(
+            low=0, high=255, shape=shape, dtype=np.uint8
+        )
+
+    def _make(self, seed: int) -> None:
+        import realtimegym
+
+        self.env, self.real_seed, _ = realtimegym.make(self.env_id, seed=seed)
+        self.score = self.env.reward
+
+    def encode(self) -> np.ndarray:
+        """Tensor observation of the current turn."""
+        return encode(self.env, self.game, self.freeway_horizon)
+
+    def reset(
+        self, *, seed: Optional[int] = None, options: Optional[dict[str, Any]] = None
+    ) -> tuple[np.ndarray, dict[str, Any]]:
+        """
+        Start a new episode.
+
+        Args:
+            seed: Seed index to switch to, as for `realtimegym.make`; the
+                current one is replayed if None
+
+        Returns:
+            (observation, info)
+        """
+        super().reset(seed=seed)
+        if seed is not None:
+            self._make(seed)
+        # Restart the RNG too: Freeway draws each episode's traffic from it.
+        self.env.set_seed(self.env.seed)
+        self.env.reset()
+        self.score = self.env.reward
+        return self.encode(), {"score": self.score, "game_turn": self.env.game_turn}
+
+    def step(self, action: int) -> tuple[np.ndarray, float, bool, bool, dict[str, Any]]:
+        """
+        Play the action with index `action` in `self.actions`.
+
+        Returns:
+            (observation, reward, terminated, truncated, info)
+        """
+        _, done, score, reset = self.env.step(self.actions[int(action)])
+        reward = score - self.score
+        self.score = score
+        info = {"score": score, "game_turn": self.env.game_turn, "reset": reset}
+        return self.encode(), float(reward), bool(done), False, info
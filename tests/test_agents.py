@@ -1,6 +1,6 @@
 """Tests for RealtimeGym agents API."""
 
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 
 import pytest
 
@@ -231,3 +231,1060 @@ class TestRealAgents:
         params = list(sig.parameters.keys())
 
         assert "self" in params
+
+
+class TestCheckpointResume:
+    """Test resuming a run from its CSV log and environment snapshots."""
+
+    def _play(self, log_file: str, turns: int) -> Any:  # noqa: ANN401
+        import pandas as pd
+
+        from realtimegym.agents.base import snapshot_file
+        from realtimegym.environments.base import append_snapshot
+
+        env, _, _ = realtimegym.make("Snake-v0", seed=2, render=False)
+        env.reset()
+        append_snapshot(snapshot_file(log_file), env.get_state())
+        actions = []
+        for action in "LLDDRRRRUUUULLLL"[:turns]:
+            env.step(action)
+            actions.append(action)
+            append_snapshot(snapshot_file(log_file), env.get_state())
+        pd.DataFrame({"action": actions}).to_csv(log_file)
+        return env
+
+    def _agent(self, log_file: str) -> Any:  # noqa: ANN401
+        from realtimegym.agents.base import BaseAgent
+        from realtimegym.prompts import snake
+
+        class Agent(BaseAgent):
+            def truncate_logs(self) -> None:
+                return
+
+        return Agent(snake, log_file, "token")
+
+    @pytest.mark.parametrize("with_snapshots", [True, False])
+    def test_resume_restores_env(self, tmp_path: Any, with_snapshots: bool) -> None:  # noqa: ANN401
+        """Test the environment is brought to the last logged turn."""
+        from realtimegym.agents.base import snapshot_file
+        from realtimegym.environments.base import load_snapshots
+
+        checkpoint = str(tmp_path / "checkpoint_0.csv")
+        played = self._play(checkpoint, 12)
+        if not with_snapshots:
+            import os
+
+            os.remove(snapshot_file(checkpoint))
+        resumed_file = str(tmp_path / "resumed_0.csv")
+        env, _, _ = realtimegym.make("Snake-v0", seed=2, render=False)
+        self._agent(resumed_file).resume_from_checkpoint(env, checkpoint)
+        assert env.game_turn == 12
+        assert env.state_string() == played.state_string()
+        assert len(load_snapshots(snapshot_file(resumed_file))) == 13
+
+    def test_resume_finished_episode(self, tmp_path: Any) -> None:  # noqa: ANN401
+        """Test a checkpoint of a finished episode reports its result."""
+        import argparse
+
+        from realtimegym import agile_eval
+        from realtimegym.agents.base import snapshot_file
+        from realtimegym.environments.base import append_snapshot
+
+        (tmp_path / "checkpoint").mkdir()
+        (tmp_path / "logs").mkdir()
+        checkpoint = str(tmp_path / "checkpoint" / "0_0.csv")
+        env, _, _ = realtimegym.make("Snake-v0", seed=0, render=False)
+        env.reset()
+        append_snapshot(snapshot_file(checkpoint), env.get_state())
+        done = False
+        while not done:  # run into the wall
+            _, done, _, _ = env.step("L")
+            append_snapshot(snapshot_file(checkpoint), env.get_state())
+        config = tmp_path / "model.yaml"
+        config.write_text("model: fake\nurl: http://127.0.0.1:9/v1\napi_key: test\n")
+        args = argparse.Namespace(
+            game="snake",
+            cognitive_load="E",
+            mode="reactive",
+            time_unit="token",
+            time_pressure=64,
+            internal_budget=64,
+            prompt_config="configs/example-prompts.yaml",
+            reactive_model_config=str(config),
+            save_trajectory_gifs=False,
+            checkpoint=str(tmp_path / "checkpoint"),
+            log_dir=str(tmp_path / "logs"),
+            cache=None,
+            cache_mode="record",
+            clock="real",
+        )
+        result = agile_eval.game_loop(str(tmp_path / "logs" / "0_0.csv"), 0, args)
+        assert result["reward"] == env.reward
+        assert result["total_time"] == 0
+
+    def test_resume_csv_checkpoint(self, tmp_path: Any) -> None:  # noqa: ANN401
+        """Test a CSV-only checkpoint replays into the logged game."""
+        import argparse
+
+        import pandas as pd
+
+        from realtimegym import agile_eval
+        from realtimegym.agents.base import snapshot_file
+        from realtimegym.environments.base import load_snapshots
+
+        (tmp_path / "checkpoint").mkdir()
+        (tmp_path / "logs").mkdir()
+        played, _, _ = realtimegym.make("Freeway-v0", seed=0, render=False)
+        played.reset()
+        states = [played.state_string()]
+        actions = "UUSUDUUSUU"
+        for action in actions:
+            played.step(action)
+            states.append(played.state_string())
+        pd.DataFrame({"action": list(actions)}).to_csv(
+            tmp_path / "checkpoint" / "0_0.csv"
+        )
+        config = tmp_path / "model.yaml"
+        config.write_text("model: fake\nurl: http://127.0.0.1:9/v1\napi_key: test\n")
+        args = argparse.Namespace(
+            game="freeway",
+            cognitive_load="E",
+            mode="reactive",
+            time_unit="token",
+            time_pressure=64,
+            internal_budget=64,
+            prompt_config="configs/example-prompts.yaml",
+            reactive_model_config=str(config),
+            save_trajectory_gifs=False,
+            checkpoint=str(tmp_path / "checkpoint"),
+            log_dir=str(tmp_path / "logs"),
+            cache=None,
+            cache_mode="record",
+            clock="real",
+        )
+        file = str(tmp_path / "logs" / "0_0.csv")
+        env, _, _, _, obs, done = agile_eval._start_episode(file, 0, args)
+        assert not done and obs["game_turn"] == len(actions)
+        assert env.state_string() == played.state_string()
+        replayed, _, _ = realtimegym.make("Freeway-v0", seed=0, render=False)
+        replayed.reset()
+        snapshots = load_snapshots(snapshot_file(file))
+        assert len(snapshots) == len(states)
+        for state, snapshot in zip(states, snapshots):
+            replayed.set_state(snapshot)
+            assert replayed.state_string() == state
+
+
+def _worker_state() -> tuple[int, bool]:
+    import sys
+
+    from realtimegym import agile_eval
+
+    cached = agile_eval._load_prompt_module.cache_info().currsize
+    return cached, "pandas" in sys.modules
+
+
+class TestWorkerWarmUp:
+    """Test agile_eval workers start from the parent's warmed-up state."""
+
+    def test_forked_workers_inherit_warm_up(self) -> None:
+        """Test prompt modules and imports are ready before the first episode."""
+        import argparse
+        import multiprocessing as mp
+        from concurrent.futures import ProcessPoolExecutor
+        from pathlib import Path
+
+        from realtimegym import agile_eval
+
+        if "fork" not in mp.get_all_start_methods():
+            pytest.skip("fork start method unavailable")
+        args = argparse.Namespace(
+            game="snake",
+            cognitive_load="E",
+            mode="reactive",
+            prompt_config=str(
+                Path(__file__).parents[1] / "configs" / "example-prompts.yaml"
+            ),
+            planning_model_config=None,
+            save_trajectory_gifs=False,
+        )
+        agile_eval.warm_up([("log_0.csv", 0, args), ("log_1.csv", 1, args)])
+        context = mp.get_context("fork")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            cached, imported = executor.submit(_worker_state).result()
+        assert cached >= 1
+        assert imported
+
+
+def _message(content: str) -> Any:  # noqa: ANN401
+    from types import SimpleNamespace
+
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+        usage=SimpleNamespace(completion_tokens=len(content)),
+    )
+
+
+def _chunk(content: str) -> Any:  # noqa: ANN401
+    from types import SimpleNamespace
+
+    return SimpleNamespace(
+        choices=[SimpleNamespace(delta=SimpleNamespace(content=content))],
+        usage=None,
+    )
+
+
+class FakeAsyncClient:
+    """AsyncOpenAI stand-in answering every request after a short wait."""
+
+    def __init__(self, reply: str) -> None:
+        from types import SimpleNamespace
+
+        self.reply = reply
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **params: Any) -> Any:  # noqa: ANN401
+        import asyncio
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if not params.get("stream"):
+            return _message(self.reply)
+
+        async def stream() -> Any:  # noqa: ANN401
+            for piece in self.reply:
+                yield _chunk(piece)
+
+        return stream()
+
+
+class TestAsyncAgents:
+    """Test agents thinking concurrently on one event loop."""
+
+    def _config(self, tmp_path: Any) -> str:  # noqa: ANN401
+        path = tmp_path / "model.yaml"
+        path.write_text("model: fake\nurl: http://127.0.0.1:9/v1\napi_key: test\n")
+        return str(path)
+
+    def test_reactive_agents_overlap_requests(self, tmp_path: Any) -> None:  # noqa: ANN401
+        """Test athink() awaits the model, so requests of many agents overlap."""
+        import asyncio
+
+        from realtimegym.agents.reactive import ReactiveAgent
+        from realtimegym.prompts import freeway
+
+        client = FakeAsyncClient("\\boxed{U}")
+        agents = []
+        for i in range(20):
+            env, _, _ = realtimegym.make("Freeway-v0", seed=i)
+            obs, _ = env.reset()
+            agent = ReactiveAgent(
+                freeway, str(tmp_path / f"{i}.csv"), "token", self._config(tmp_path), 64
+            )
+            agent.async_clients["llm1"] = client  # type: ignore
+            agent.observe(obs)
+            agents.append(agent)
+
+        async def think_all() -> None:
+            await asyncio.gather(*(agent.athink(timeout=64) for agent in agents))
+
+        asyncio.run(think_all())
+        assert [agent.act() for agent in agents] == ["U"] * 20
+        assert client.max_in_flight == 20
+
+    def test_planning_stream_in_seconds(self, tmp_path: Any) -> None:  # noqa: ANN401
+        """Test the planning stream is consumed by a task while the turn waits."""
+        import asyncio
+
+        from realtimegym.agents.planning import PlanningAgent
+        from realtimegym.prompts import freeway
+
+        env, _, _ = realtimegym.make("Freeway-v0", seed=0)
+        obs, _ = env.reset()
+        agent = PlanningAgent(
+            freeway, str(tmp_path / "0.csv"), "seconds", self._config(tmp_path)
+        )
+        agent.async_clients["llm2"] = FakeAsyncClient("\\boxed{UUS}")  # type: ignore
+
+        async def think() -> None:
+            agent.observe(obs)
+            await agent.athink(timeout=0.05)
+
+        asyncio.run(think())
+        assert agent.act() == "U"
+        assert agent.plan == "US"
+        assert agent.planning_task is not None and agent.planning_task.done()
+
+    def test_think_only_agent_runs_in_thread(self, tmp_path: Any) -> None:  # noqa: ANN401
+        """Test athink() of an agent that only overrides think() runs it aside."""
+        import asyncio
+        import threading
+
+        from realtimegym.agents.base import BaseAgent
+        from realtimegym.prompts import freeway
+
+        class Agent(BaseAgent):
+            def think(self, timeout: Optional[float] = None) -> None:
+                self.thread = threading.current_thread()
+                self.action = "U"
+
+        agent = Agent(freeway, str(tmp_path / "0.csv"), "token")
+        asyncio.run(agent.athink(timeout=64))
+        assert agent.act() == "U"
+        assert agent.thread is not threading.main_thread()
+
+
+class TestClientRegistry:
+    """Test agents on one endpoint share a client and its connections."""
+
+    def test_shared_client_reuses_connection(self, tmp_path: Any) -> None:  # noqa: ANN401
+        """Test two agents get one client whose requests reuse a connection."""
+        from realtimegym.agents import clients
+        from realtimegym.agents.reactive import ReactiveAgent
+        from realtimegym.mock_server import MockLLMServer
+        from realtimegym.prompts import freeway
+
+        with MockLLMServer("\\boxed{U}") as server:
+            url = server.url
+            config = tmp_path / "model.yaml"
+            config.write_text(f"model: stub\nurl: {url}\napi_key: test\n")
+            env, _, _ = realtimegym.make("Freeway-v0", seed=0)
+            obs, _ = env.reset()
+            agents = [
+                ReactiveAgent(
+                    freeway, str(tmp_path / f"{i}.csv"), "token", str(config), 64
+                )
+                for i in range(2)
+            ]
+            assert agents[0].llm1 is agents[1].llm1
+            for agent in agents * 2:
+                agent.observe(obs)
+                agent.think(timeout=64)
+                assert agent.act() == "U"
+        stats = clients.connection_stats()[url]
+        assert stats["requests"] == 4
+        assert stats["connections"] == 1
+        assert stats["reused"] == 3
+
+    def test_configure_rejects_unknown_settings(self) -> None:
+        """Test misspelt pool settings are reported."""
+        from realtimegym.agents import clients
+
+        with pytest.raises(ValueError, match="max_conections"):
+            clients.configure(max_conections=10)
+
+
+class TestRetry:
+    """Test deadline-aware retries and the per-endpoint circuit breaker."""
+
+    def test_failing_endpoint_falls_back_to_default_action(
+        self,
+        tmp_path: Any,  # noqa: ANN401
+    ) -> None:
+        """Test retries stop at the deadline and open the endpoint's circuit."""
+        from types import SimpleNamespace
+
+        import pandas as pd
+
+        from realtimegym.agents.reactive import ReactiveAgent
+        from realtimegym.prompts import freeway
+
+        config = tmp_path / "model.yaml"
+        config.write_text(
+            "model: fake\nurl: http://127.0.0.1:9/retry\napi_key: test\n"
+            "retry:\n  base_delay: 0.01\n  max_delay: 0.02\n  max_wait: 0.2\n"
+            "  failure_threshold: 3\n  reset_timeout: 60\n"
+        )
+        calls = []
+
+        def create(**params: Any) -> None:  # noqa: ANN401
+            calls.append(params)
+            raise ConnectionError("endpoint down")
+
+        env, _, _ = realtimegym.make("Freeway-v0", seed=0)
+        obs, _ = env.reset()
+        agents = []
+        for i in range(2):
+            agent = ReactiveAgent(
+                freeway, str(tmp_path / f"{i}.csv"), "token", str(config), 64
+            )
+            agent.llm1 = SimpleNamespace(  # type: ignore
+                chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+            )
+            agent.observe(obs)
+            agent.think(timeout=64)
+            assert agent.act() == freeway.DEFAULT_ACTION
+            assert agent.request_stats["fallback"] == 1
+            agents.append(agent)
+        # The first agent opened the circuit; the second never reached the endpoint.
+        assert len(calls) == 3
+        assert agents[0].request_stats["retries"] >= 2
+        agents[0].log(0, False)
+        logs = pd.read_csv(agents[0].file)
+        assert logs["fallback"].tolist() == [1]
+        assert logs["retries"].tolist()[0] >= 2
+
+    def test_circuit_breaker_half_open(self) -> None:
+        """Test an open circuit lets one trial request through after its timeout."""
+        import time
+
+        from realtimegym.agents.retry import CircuitBreaker
+
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert not breaker.allow()
+        time.sleep(0.06)
+        assert breaker.allow()
+        assert not breaker.allow()  # one trial at a time
+        breaker.record_failure()
+        assert not breaker.allow()
+        time.sleep(0.06)
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.allow() and breaker.allow()
+
+    def test_trial_cache_miss_frees_circuit(self, tmp_path: Any) -> None:  # noqa: ANN401
+        """Test a trial request ended by a cache miss lets the next one through."""
+        import time
+
+        from realtimegym.agents.cache import CacheMiss, ResponseCache
+        from realtimegym.agents.reactive import ReactiveAgent
+        from realtimegym.prompts import freeway
+
+        config = tmp_path / "model.yaml"
+        config.write_text(
+            "model: fake\nurl: http://127.0.0.1:9/trial\napi_key: test\n"
+            "retry:\n  reset_timeout: 0.05\n"
+        )
+        env, _, _ = realtimegym.make("Freeway-v0", seed=0)
+        obs, _ = env.reset()
+        agent = ReactiveAgent(
+            freeway, str(tmp_path / "0.csv"), "token", str(config), 64
+        )
+        agent.use_cache(ResponseCache(str(tmp_path / "r.sqlite"), "replay"), "0")
+        breaker = agent._breaker("llm1")
+        breaker.opened_at = time.monotonic() - 1  # the trial is due
+        agent.observe(obs)
+        with pytest.raises(CacheMiss):
+            agent.think(timeout=64)
+        assert breaker.allow()  # a new trial
+
+
+class TestResponseCache:
+    """Test recording model responses and replaying them offline."""
+
+    def _agent(
+        self,
+        tmp_path: Any,  # noqa: ANN401
+        agent_class: type,
+        time_unit: str,
+        create: Callable[..., Any],
+    ) -> Any:  # noqa: ANN401
+        from types import SimpleNamespace
+
+        from realtimegym.prompts import freeway
+
+        config = tmp_path / "model.yaml"
+        config.write_text("model: fake\nurl: http://127.0.0.1:9/cache\napi_key: test\n")
+        if agent_class.__name__ == "ReactiveAgent":
+            agent = agent_class(
+                freeway, str(tmp_path / "0.csv"), time_unit, str(config), 64
+            )
+        else:
+            agent = agent_class(
+                freeway, str(tmp_path / "0.csv"), time_unit, str(config)
+            )
+        llm = SimpleNamespace(
+            chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+        )
+        agent.llm1 = agent.llm2 = llm
+        return agent
+
+    def _offline(self, **params: Any) -> None:  # noqa: ANN401
+        raise AssertionError("replay made a request")
+
+    def test_record_then_replay(self, tmp_path: Any) -> None:  # noqa: ANN401
+        """Test repeated identical requests replay in their recorded order."""
+        from realtimegym.agents.cache import CacheMiss, ResponseCache
+        from realtimegym.agents.reactive import ReactiveAgent
+
+        replies = iter(["\\boxed{U}", "\\boxed{D}"])
+        env, _, _ = realtimegym.make("Freeway-v0", seed=0)
+        obs, _ = env.reset()
+        path = str(tmp_path / "responses.sqlite")
+
+        agent = self._agent(
+            tmp_path, ReactiveAgent, "token", lambda **p: _message(next(replies))
+        )
+        agent.use_cache(ResponseCache(path, "record"), "0_0.csv")
+        recorded = []
+        for _ in range(2):
+            agent.observe(obs)
+            agent.think(timeout=64)
+            recorded.append(agent.act())
+        assert recorded == ["U", "D"]
+
+        agent = self._agent(tmp_path, ReactiveAgent, "token", self._offline)
+        cache = ResponseCache(path, "replay")
+        agent.use_cache(cache, "0_0.csv")
+        replayed = []
+        for _ in range(2):
+            agent.observe(obs)
+            agent.think(timeout=64)
+            replayed.append(agent.act())
+        assert replayed == recorded
+        assert cache.hits == 2
+
+        agent.use_cache(cache, "1_0.csv")
+        agent.observe(obs)
+        with pytest.raises(CacheMiss):
+            agent.think(timeout=64)
+
+    def test_stream_replay_keeps_chunks(self, tmp_path: Any) -> None:  # noqa: ANN401
+        """Test a planning stream is stored with its chunks and replayed."""
+        import json
+        import sqlite3
+        import time
+
+        from realtimegym.agents.cache import ResponseCache
+        from realtimegym.agents.planning import PlanningAgent
+
+        env, _, _ = realtimegym.make("Freeway-v0", seed=0)
+        obs, _ = env.reset()
+        path = str(tmp_path / "responses.sqlite")
+
+        def stream(**params: Any) -> Any:  # noqa: ANN401
+            for piece in ["\\boxed{", "UU", "S}"]:
+                time.sleep(0.005)
+                yield _chunk(piece)
+
+        plans = []
+        for mode, create in (("record", stream), ("replay", self._offline)):
+            agent = self._agent(tmp_path, PlanningAgent, "seconds", create)
+            agent.use_cache(ResponseCache(path, mode), "0_0.csv")
+            agent.observe(obs)
+            agent.think(timeout=0.1)
+            plans.append((agent.act(), agent.plan))
+        assert plans == [("U", "US"), ("U", "US")]
+        with sqlite3.connect(path) as db:
+            text, record = db.execute("SELECT text, record FROM responses").fetchone()
+        assert text == "\\boxed{UUS}"
+        offsets = [item[0] for item in json.loads(record)]
+        assert offsets == sorted(offsets) and offsets[0] > 0
+
+    @pytest.mark.parametrize("asynchronous", [False, True])
+    def test_cut_stream_replay(self, tmp_path: Any, asynchronous: bool) -> None:  # noqa: ANN401
+        """Test a reactive stream cut by its budget is stored, replayed and
+        completed by a longer budget in record mode."""
+        import asyncio
+
+        from realtimegym.agents.cache import CacheMiss, ResponseCache
+        from realtimegym.agents.clock import VirtualClock
+        from realtimegym.agents.reactive import ReactiveAgent
+        from realtimegym.mock_server import MockLLMServer
+        from realtimegym.prompts import freeway
+
+        def reply(messages: list[dict[str, Any]]) -> str:
+            if messages[-1]["role"] == "assistant":  # budget forcing
+                return "D}"
+            return " step" * 100 + "\\boxed{U}"
+
+        env, _, _ = realtimegym.make("Freeway-v0", seed=0)
+        obs, _ = env.reset()
+        path = str(tmp_path / "responses.sqlite")
+        with MockLLMServer(
+            reply, ttft=0.05, tokens_per_second=10, wait=False
+        ) as server:
+            config = tmp_path / "model.yaml"
+            config.write_text(f"model: mock\nurl: {server.url}\napi_key: mock\n")
+            actions = []
+            for mode, internal_budget, hits in (
+                ("record", 2, 0),
+                ("replay", 2, 2),
+                ("replay", 4, None),
+                ("record", 4, 1),
+                ("replay", 4, 2),
+            ):
+                agent = ReactiveAgent(
+                    freeway, str(tmp_path / f"{mode}.csv"), "seconds", str(config), 0
+                )
+                agent.internal_budget = internal_budget
+                agent.clock = VirtualClock()
+                agent.use_cache(ResponseCache(path, mode), "0_0.csv")
+                agent.observe(obs)
+                try:
+                    if asynchronous:
+                        asyncio.run(agent.athink(timeout=internal_budget + 1))
+                    else:
+                        agent.think(timeout=internal_budget + 1)
+                except CacheMiss:
+                    actions.append(None)
+                    continue
+                actions.append(agent.act())
+                assert agent.cache_hits == hits
+        # The budget forcing answer "D" is cached too. A longer budget reads
+        # past the stored cut: replay fails, record requests the rest and
+        # stores it for the next replay.
+        assert actions == ["D", "D", None, "D", "D"]
+        assert len(server.requests) == 4
+
+    def test_budget_sweep_chain(self, tmp_path: Any) -> None:  # noqa: ANN401
+        """Test chained settings replay the generations made from shared states."""
+        import argparse
+
+        from realtimegym import agile_eval
+        from realtimegym.mock_server import MockLLMServer
+
+        with MockLLMServer(
+            "<think>" + " car" * 300 + "</think>\\boxed{UUSU}"
+        ) as server:
+            config = tmp_path / "model.yaml"
+            config.write_text(f"model: mock\nurl: {server.url}\napi_key: mock\n")
+            instances = []
+            for time_pressure in (64, 256):
+                args = argparse.Namespace(
+                    game="freeway",
+                    cognitive_load="E",
+                    mode="planning",
+                    time_unit="token",
+                    time_pressure=time_pressure,
+                    internal_budget=0,
+                    prompt_config="configs/example-prompts.yaml",
+                    planning_model_config=str(config),
+                    save_trajectory_gifs=False,
+                    checkpoint=None,
+                    log_dir=str(tmp_path),
+                    cache=None,
+                    cache_mode="record",
+                    clock="real",
+                )
+                (tmp_path / str(time_pressure)).mkdir()
+                for seed in range(2):
+                    file = str(tmp_path / str(time_pressure) / f"0_{seed}.csv")
+                    instances.append((file, seed, args))
+            alone = [agile_eval.game_loop(*instance) for instance in instances]
+            requests = len(server.requests)
+
+            for _, _, args in instances:
+                args.cache = str(tmp_path / "responses.sqlite")
+            chains = agile_eval.chain_episodes(instances)
+            assert [[file for file, _, _ in chain] for chain in chains] == [
+                [instances[0][0], instances[2][0]],
+                [instances[1][0], instances[3][0]],
+            ]
+            chained = [r for chain in chains for r in agile_eval.play_chain(chain)]
+        assert [r["reward"] for r in chained] == [
+            alone[i]["reward"] for i in (0, 2, 1, 3)
+        ]
+        # The second setting of each episode starts with the first's plan.
+        assert all(r["cache_hits"] > 0 for r in chained[1::2])
+        made = len(server.requests) - requests
+        assert made == sum(r["requests"] - r["cache_hits"] for r in chained)
+        assert made < requests
+
+    def test_seconds_budget_chain(self, tmp_path: Any) -> None:  # noqa: ANN401
+        """Test a longer seconds budget chained after a cut reactive stream."""
+        import argparse
+
+        from realtimegym import agile_eval
+        from realtimegym.mock_server import MockLLMServer
+
+        def reply(messages: list[dict[str, Any]]) -> str:
+            if messages[-1]["role"] == "assistant":  # budget forcing
+                return "U}"
+            return " step" * 100 + "\\boxed{U}"
+
+        with MockLLMServer(
+            reply, ttft=0.05, tokens_per_second=10, wait=False
+        ) as server:
+            config = tmp_path / "model.yaml"
+            config.write_text(f"model: mock\nurl: {server.url}\napi_key: mock\n")
+            instances = []
+            for internal_budget in (2, 4):
+                args = argparse.Namespace(
+                    game="freeway",
+                    cognitive_load="E",
+                    mode="reactive",
+                    time_unit="seconds",
+                    time_pressure=internal_budget + 1,
+                    internal_budget=internal_budget,
+                    prompt_config="configs/example-prompts.yaml",
+                    reactive_model_config=str(config),
+                    save_trajectory_gifs=False,
+                    checkpoint=None,
+                    log_dir=str(tmp_path),
+                    cache=str(tmp_path / "responses.sqlite"),
+                    cache_mode="record",
+                    clock="virtual",
+                )
+                (tmp_path / str(internal_budget)).mkdir()
+                file = str(tmp_path / str(internal_budget) / "0_0.csv")
+                instances.append((file, 0, args))
+            (chain,) = agile_eval.chain_episodes(instances)
+            short, long = agile_eval.play_chain(chain)
+        # The longer budget reads on past each stored cut, live.
+        assert long["cache_hits"] > 0
+        assert long["requests"] > long["cache_hits"]
+        assert short["reward"] == long["reward"]
+
+
+class TestMockServer:
+    """Test the mock OpenAI-compatible server and agents' budgets against it."""
+
+    def test_completions_and_streams(self) -> None:
+        """Test replies carry reasoning and usage, streamed at the token rate."""
+        import time
+
+        from openai import OpenAI
+        from openai.types.chat import ChatCompletionMessageParam
+
+        from realtimegym.mock_server import MockLLMServer
+
+        reply = "<think>Car on y=1.</think>\\boxed{S}"
+        with MockLLMServer(
+            [reply, "\\boxed{U}"], ttft=0.05, tokens_per_second=50
+        ) as server:
+            llm = OpenAI(base_url=server.url, api_key="mock", max_retries=0)
+            messages: list[ChatCompletionMessageParam] = [
+                {"role": "user", "content": "Which action?"}
+            ]
+            response = llm.chat.completions.create(model="mock", messages=messages)
+            message = response.choices[0].message
+            assert message.reasoning_content == "Car on y=1."  # type: ignore
+            assert message.content == "\\boxed{S}"
+            assert response.usage is not None
+            assert response.usage.completion_tokens == 4
+            start = time.monotonic()
+            arrivals, text = [], ""
+            for chunk in llm.chat.completions.create(
+                model="mock", messages=messages, stream=True
+            ):
+                arrivals.append(time.monotonic() - start)
+                text += chunk.choices[0].delta.content or ""
+            assert text == "\\boxed{U}"
+            assert arrivals[0] >= 0.05
+            assert chunk.usage is not None and chunk.usage.completion_tokens == 1
+            cut = llm.chat.completions.create(
+                model="mock", messages=messages, max_tokens=2
+            )
+            assert cut.choices[0].message.reasoning_content == "Car on"  # type: ignore
+            assert cut.choices[0].message.content == ""
+        assert [r.get("stream") for r in server.requests] == [None, True, None]
+
+    def test_seconds_budget_and_injected_errors(
+        self,
+        tmp_path: Any,  # noqa: ANN401
+    ) -> None:
+        """Test a slow stream is cut at the budget and failures fall back."""
+        import time
+
+        from realtimegym.agents.reactive import ReactiveAgent
+        from realtimegym.mock_server import MockLLMServer
+        from realtimegym.prompts import freeway
+
+        def reply(messages: list[dict[str, Any]]) -> str:
+            if messages[-1]["role"] == "assistant":  # budget forcing
+                return "U}"
+            return "<think>" + " step" * 100 + "</think>\\boxed{D}"
+
+        env, _, _ = realtimegym.make("Freeway-v0", seed=0)
+        obs, _ = env.reset()
+        for error_rate, action in ((0.0, "U"), (1.0, freeway.DEFAULT_ACTION)):
+            with MockLLMServer(
+                reply, tokens_per_second=100, error_rate=error_rate, error_status=429
+            ) as server:
+                config = tmp_path / "model.yaml"
+                config.write_text(
+                    f"model: mock\nurl: {server.url}\napi_key: mock\n"
+                    "retry:\n  base_delay: 0.01\n  max_delay: 0.02\n"
+                )
+                agent = ReactiveAgent(
+                    freeway,
+                    str(tmp_path / f"{error_rate}.csv"),
+                    "seconds",
+                    str(config),
+                    0.2,
+                )
+                agent.observe(obs)
+                start = time.monotonic()
+                agent.think(timeout=0.3)
+                elapsed = time.monotonic() - start
+            assert agent.act() == action
+            assert 0.3 <= elapsed < 0.6
+            assert agent.request_stats["fallback"] == error_rate
+
+
+def _tokenizer(path: Any) -> str:  # noqa: ANN401
+    """Save a small byte-level BPE tokenizer (with BOS) under `path`."""
+    from tokenizers import (
+        Tokenizer,
+        decoders,
+        models,
+        pre_tokenizers,
+        processors,
+        trainers,
+    )
+    from transformers import PreTrainedTokenizerFast
+
+    tokenizer = Tokenizer(models.BPE())
+    tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tokenizer.decoder = decoders.ByteLevel()
+    trainer = trainers.BpeTrainer(
+        vocab_size=300,
+        special_tokens=["<bos>"],
+        initial_alphabet=pre_tokenizers.ByteLevel.alphabet(),
+    )
+    tokenizer.train_from_iterator(["The car on freeway 3 moves right."] * 20, trainer)
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="<bos> $A", special_tokens=[("<bos>", 0)]
+    )
+    fast = PreTrainedTokenizerFast(tokenizer_object=tokenizer, bos_token="<bos>")
+    fast.add_tokens(["<think>", "</think>"])
+    fast.save_pretrained(str(path))
+    return str(path)
+
+
+class TestPlanningFlush:
+    """Test planning text revealed turn by turn."""
+
+    def test_stream_segments(self, tmp_path: Any) -> None:  # noqa: ANN401
+        """Test each read takes the new text, and a superseded stream adds none."""
+        import threading
+        from types import SimpleNamespace
+
+        from realtimegym.agents.base import PlanningStream
+        from realtimegym.agents.planning import PlanningAgent
+        from realtimegym.prompts import freeway
+
+        def chunk(reasoning: Optional[str], content: Optional[str]) -> Any:  # noqa: ANN401
+            delta = SimpleNamespace(reasoning_content=reasoning, content=content)
+            return SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+
+        stream = PlanningStream()
+        stream.add(chunk("Car ", None))
+        stream.add(chunk("ahead.", None))
+        assert stream.take() == ("<think>Car ahead.", 0)
+        assert stream.take() == ("", 0)
+        stream.add(chunk(None, "\\boxed{U"))
+        stream.add(
+            SimpleNamespace(choices=[], usage=SimpleNamespace(completion_tokens=5))
+        )
+        assert stream.take() == ("\n</think>\n\\boxed{U", 5)
+
+        config = tmp_path / "model.yaml"
+        config.write_text("model: fake\nurl: http://127.0.0.1:9/plan\napi_key: test\n")
+        agent = PlanningAgent(freeway, str(tmp_path / "0.csv"), "seconds", str(config))
+        release, superseded = threading.Event(), threading.Event()
+
+        def first(llm: Any, params: dict[str, Any]) -> Any:  # noqa: ANN401
+            yield chunk(None, "\\boxed{DD")
+            release.wait()
+            yield chunk(None, "D}")
+            superseded.set()  # "D}" was handed over
+
+        agent.open_stream = first  # type: ignore
+        agent.start_planning_stream(None, "fake", [], {})  # type: ignore
+        agent.open_stream = lambda llm, params: iter([chunk(None, "\\boxed{UU}")])  # type: ignore
+        agent.start_planning_stream(None, "fake", [], {})  # type: ignore
+        assert agent.planning_stream is not None
+        assert agent.planning_stream.done.wait(5)
+        release.set()
+        assert superseded.wait(5)
+        assert agent.get_planning_chunks() == ("\\boxed{UU}", 0)
+        assert agent.is_planning_finished()
+
+    @pytest.mark.parametrize("budget", [32, 32.0])
+    @pytest.mark.parametrize("ends", [True, False])
+    def test_flushes_match_decoded_prefixes(
+        self,
+        tmp_path: Any,  # noqa: ANN401
+        monkeypatch: Any,  # noqa: ANN401
+        budget: float,
+        ends: bool,
+    ) -> None:
+        """Test each turn's visible prefix is the decode of its tokens."""
+        from realtimegym.agents import base
+        from realtimegym.agents.planning import PlanningAgent
+        from realtimegym.mock_server import MockLLMServer
+        from realtimegym.prompts import freeway
+
+        tokenizer = _tokenizer(tmp_path / "tokenizer")
+        thought = " ".join(
+            f"The car on freeway {i % 8} moves right." for i in range(40)
+        )
+        with MockLLMServer(f"<think>{thought}</think>\\boxed{{UUS}}") as server:
+            config = tmp_path / "model.yaml"
+            config.write_text(
+                f"model: mock\nurl: {server.url}\napi_key: mock\ntokenizer: {tokenizer}\n"
+            )
+            agent = PlanningAgent(
+                freeway, str(tmp_path / "0.csv"), "token", str(config)
+            )
+            if not ends:  # decode the token ids instead
+                monkeypatch.setattr(base, "token_ends", lambda tokenizer, text: None)
+            messages = [{"role": "user", "content": "Plan."}]
+            text, token_num, turn = agent.planning_inference(messages, budget, 0)
+        assert (agent.gen_ends is not None) == ends and turn == 0
+        assert agent.tokenizer is not None
+        full = agent.gen_text
+        tokens = agent.tokenizer.encode(full)
+        prefixes = [text]
+        while agent.gen_text:
+            prefixes.append(agent.planning_inference([], budget, 0)[0])
+        assert len(prefixes) > 4
+        assert prefixes[-1] == full and prefixes[-1].endswith("\\boxed{UUS}")
+        for i, prefix in enumerate(prefixes[:-1]):
+            expected = agent.tokenizer.decode(
+                tokens[: 32 * (i + 1)], skip_special_tokens=True
+            )
+            assert prefix == expected
+
+
+class TestTokenizerCache:
+    """Test tokenizers are loaded once and kept for offline use."""
+
+    def test_hub_tokenizer_kept_locally(
+        self,
+        tmp_path: Any,  # noqa: ANN401
+        monkeypatch: Any,  # noqa: ANN401
+    ) -> None:
+        """Test a hub tokenizer is saved once and then loaded without the hub."""
+        from transformers import AutoTokenizer
+
+        from realtimegym.agents import tokenizer_cache
+
+        monkeypatch.setenv("REALTIMEGYM_TOKENIZER_DIR", str(tmp_path / "tokenizers"))
+        hub = _tokenizer(tmp_path / "hub")
+        from_pretrained = AutoTokenizer.from_pretrained
+        requested = []
+
+        def fetch(name: str, **kwargs: Any) -> Any:  # noqa: ANN401
+            requested.append(name)
+            if name == "org/planner":
+                return from_pretrained(hub)
+            return from_pretrained(name, **kwargs)
+
+        monkeypatch.setattr(AutoTokenizer, "from_pretrained", fetch)
+        tokenizer_cache.load_tokenizer.cache_clear()
+        try:
+            first = tokenizer_cache.load_tokenizer("org/planner")
+            assert tokenizer_cache.load_tokenizer("org/planner") is first
+            copy = tokenizer_cache.local_path("org/planner")
+            assert copy == str(tmp_path / "tokenizers" / "org--planner")
+            tokenizer_cache.load_tokenizer.cache_clear()
+            second = tokenizer_cache.load_tokenizer("org/planner")
+        finally:
+            tokenizer_cache.load_tokenizer.cache_clear()
+        assert requested == ["org/planner", copy]
+        assert second.encode("The car moves.") == first.encode("The car moves.")
+
+        config = tmp_path / "planning.yaml"
+        config.write_text("model: m\napi_key: k\ntokenizer: org/planner\n")
+        names = tokenizer_cache.config_tokenizers([str(config), "org/planner", "a/b"])
+        assert names == ["org/planner", "a/b"]
+
+
+class TestVirtualClock:
+    """Test seconds budgets played on a virtual clock."""
+
+    def _config(self, tmp_path: Any, url: str) -> str:  # noqa: ANN401
+        config = tmp_path / "model.yaml"
+        config.write_text(f"model: mock\nurl: {url}\napi_key: mock\n")
+        return str(config)
+
+    def test_reactive_stream_cut_at_budget(self, tmp_path: Any) -> None:  # noqa: ANN401
+        """Test a stream is cut where its offsets pass the budget, without waiting."""
+        import time
+
+        from realtimegym.agents.clock import VirtualClock
+        from realtimegym.agents.reactive import ReactiveAgent
+        from realtimegym.mock_server import MockLLMServer
+        from realtimegym.prompts import freeway
+
+        def reply(messages: list[dict[str, Any]]) -> str:
+            if messages[-1]["role"] == "assistant":  # budget forcing
+                return "U}"
+            return " step" * 100 + "\\boxed{D}"
+
+        env, _, _ = realtimegym.make("Freeway-v0", seed=0)
+        obs, _ = env.reset()
+        with MockLLMServer(
+            reply, ttft=0.55, tokens_per_second=10, wait=False
+        ) as server:
+            agent = ReactiveAgent(
+                freeway,
+                str(tmp_path / "0.csv"),
+                "seconds",
+                self._config(tmp_path, server.url),
+                6,
+            )
+            agent.clock = VirtualClock()
+            assert agent.llm1 is not None
+            messages = [{"role": "user", "content": "Which action?"}]
+            text, _ = agent.start_reactive_stream(agent.llm1, "mock", messages, {}, 2.0)
+            # Tokens due at 0.55 s, 0.65 s, ..., 1.95 s
+            assert text == " step" * 15
+            # The turn ends with the first token past the budget, as it would
+            # when reading the stream in real time.
+            assert agent.clock.time() == pytest.approx(2.05)
+
+            start = time.monotonic()
+            for _ in range(3):
+                turn_start = agent.clock.time()
+                agent.observe(obs)
+                agent.think(timeout=8)
+                assert agent.act() == "U"
+                # Cut at 6.05 s, forced answer 0.55 s later, then 2 s of the turn
+                assert agent.clock.time() - turn_start == pytest.approx(8.6)
+            assert time.monotonic() - start < 2.0
+
+    def test_planning_stream_replayed_by_arrival(
+        self,
+        tmp_path: Any,  # noqa: ANN401
+    ) -> None:
+        """Test each turn sees the plan due by its end, live and from the cache."""
+        import time
+
+        from realtimegym.agents.cache import ResponseCache
+        from realtimegym.agents.clock import VirtualClock
+        from realtimegym.agents.planning import PlanningAgent
+        from realtimegym.mock_server import MockLLMServer
+        from realtimegym.prompts import freeway
+
+        env, _, _ = realtimegym.make("Freeway-v0", seed=0)
+        obs, _ = env.reset()
+        path = str(tmp_path / "responses.sqlite")
+        reply = "<think>" + " car" * 25 + "</think>\\boxed{UUS}"
+        runs = []
+        with MockLLMServer(
+            reply, ttft=0.05, tokens_per_second=10, wait=False
+        ) as server:
+            config = self._config(tmp_path, server.url)
+            for mode in ("record", "replay"):
+                agent = PlanningAgent(
+                    freeway, str(tmp_path / f"{mode}.csv"), "seconds", config
+                )
+                agent.clock = VirtualClock()
+                agent.use_cache(ResponseCache(path, mode), "0_0.csv")
+                start, seen = time.monotonic(), []
+                for _ in range(4):
+                    agent.observe(obs)
+                    agent.think(timeout=1)
+                    agent.act()
+                    seen.append((agent.gen_text.count("car"), agent.plan))
+                assert time.monotonic() - start < 2.0
+                runs.append(seen)
+                # The last stream is stored once read to its end.
+                assert agent.planning_stream is not None
+                assert agent.planning_stream.done.wait(5)
+        # 10 tokens arrive per turn; the plan is due in the third, and the
+        # next one is requested then.
+        assert runs[0] == [(10, ""), (20, ""), (0, "US"), (10, "S")]
+        assert runs[1] == runs[0]
+        assert len(server.requests) == 2
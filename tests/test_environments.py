@@ -2,6 +2,7 @@
 
 from typing import Any
 
+import numpy as np
 import pytest
 
 import realtimegym
@@ -42,6 +43,81 @@ class TestEnvironmentRegistry:
             env, _, _ = realtimegym.make(f"Freeway-{difficulty}", seed=0, render=False)
             assert env is not None
 
+    def test_register_and_patterns(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test registering IDs and ID patterns, and kwargs overrides."""
+        from realtimegym import registration
+
+        monkeypatch.setattr(registration, "_REGISTRY", dict(registration._REGISTRY))
+        monkeypatch.setattr(registration, "_PATTERNS", dict(registration._PATTERNS))
+        monkeypatch.setattr(registration, "_CHOICES", dict(registration._CHOICES))
+        realtimegym.register(
+            "Maze-{board_size}x{board_size}-v0",
+            "realtimegym.environments.snake:setup_env",
+            cognitive_load="H",
+            obstacle_density=0.3,
+        )
+        with pytest.raises(ValueError):
+            realtimegym.register(
+                "Maze-{board_size}x{board_size}-v0",
+                "realtimegym.environments.freeway:setup_env",
+            )
+        assert realtimegym.spec("Maze-16x16-v0").kwargs == {
+            "cognitive_load": "H",
+            "obstacle_density": 0.3,
+            "board_size": 16,
+        }
+        assert realtimegym.spec("Maze-16x16-v0").game == "snake"
+        with pytest.raises(ValueError):
+            realtimegym.spec("Maze-16x12-v0")
+        env, _, _ = realtimegym.make("Maze-16x16-v0", obstacle_density=0.1)
+        env.reset()
+        assert env.B == 16 and len(env.obstacle) == round(0.1 * 14 * 14)
+
+    def test_overcooked_layouts(self) -> None:
+        """Test "Overcooked-{layout}" only matches layouts that exist."""
+        assert realtimegym.spec("Overcooked-cramped_room").kwargs == {
+            "cognitive_load": "E",
+            "layout": "cramped_room",
+        }
+        for env_id in ["Overcooked-v3", "Overcooked-Snake", "Overcooked-"]:
+            with pytest.raises(ValueError, match="Unknown environment ID"):
+                realtimegym.make(env_id)
+
+    def test_entry_point_plugins(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test games of installed packages are found through entry points."""
+        from importlib import metadata
+
+        from realtimegym import registration
+
+        monkeypatch.setattr(registration, "_REGISTRY", dict(registration._REGISTRY))
+        monkeypatch.setattr(registration, "_plugins_loaded", False)
+        plugin = metadata.EntryPoint(
+            name="Plugin-v0",
+            value="realtimegym.environments.freeway:setup_env",
+            group=registration.ENTRY_POINT_GROUP,
+        )
+        monkeypatch.setattr(
+            metadata, "entry_points", lambda: metadata.EntryPoints([plugin])
+        )
+        env, seed, _ = realtimegym.make("Plugin-v0", cognitive_load="M")
+        assert seed == realtimegym.make("Freeway-v1")[1]
+
+    def test_heavy_dependencies_load_lazily(self) -> None:
+        """Test make() and the evaluation entry point defer heavy imports."""
+        import subprocess
+        import sys
+
+        code = (
+            "import sys, realtimegym, realtimegym.agile_eval, realtimegym.prompts\n"
+            "realtimegym.make('Freeway-v0'); realtimegym.make('Snake-v0')\n"
+            "heavy = ['transformers', 'openai', 'pandas', 'pygame', 'PIL', 'IPython']\n"
+            "print([name for name in heavy if name in sys.modules])"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        assert result.stdout.strip() == "[]"
+
 
 class TestEnvironmentAPI:
     """Test the standard gym-like API for all environments."""
@@ -147,6 +223,266 @@ class TestSnakeEnvironment:
         # Food should be mentioned in state
         assert len(state_string) > 0
 
+    def test_snake_occupancy_tracks_body(self) -> None:
+        """Test the occupancy set stays in sync with the snake body."""
+        env, _, _ = realtimegym.make("Snake-v0", seed=3, render=False)
+        obs, done = env.reset()
+        for action in "LLDDRRRRUUUULLLLDDDRRR":
+            if done:
+                break
+            obs, done, reward, __ = env.step(action)
+            assert env.body == set(env.snake)
+            assert len(env.body) == len(env.snake)
+
+    def test_snake_food_expires_uniformly(self) -> None:
+        """Test every food ages by one per turn, even when others expire."""
+        env, _, _ = realtimegym.make("Snake-v0", seed=0, render=False)
+        obs, done = env.reset()
+        for action in "LLDDRRRRUUUULLLL":
+            before = {(x, y): life for x, y, life, _ in obs["state"]["foods"]}
+            obs, done, reward, __ = env.step(action)
+            if done:
+                break
+            for x, y, life, _ in obs["state"]["foods"]:
+                assert life == before.get((x, y), 11) - 1
+
+    def test_snake_state_views_are_shared(self) -> None:
+        """Test observations of a turn share immutable views of the state."""
+        env, _, _ = realtimegym.make("Snake-v1", seed=0, render=False)
+        obs, done = env.reset()
+        again = env.observe()
+        for key in ("snake", "foods", "internal_obstacles"):
+            assert isinstance(obs["state"][key], tuple)
+            assert again["state"][key] is obs["state"][key]
+        assert again["state_string"] is obs["state_string"]
+        old_snake = obs["state"]["snake"]
+        obs, done, reward, __ = env.step("L")
+        assert obs["state"]["snake"] is not old_snake
+        assert obs["state"]["snake"][0] == (old_snake[0][0] - 1, old_snake[0][1])
+
+    def test_snake_large_board(self) -> None:
+        """Test larger Snake boards keep the obstacle density of their level."""
+        env, _, _ = realtimegym.make("Snake-32x32-v1", seed=0, render=False)
+        obs, done = env.reset()
+        assert env.B == 32
+        assert len(env.obstacle) == round(5 / 36 * 30**2)
+        assert obs["state"]["size"] == 32
+        assert len(obs["state_string"].splitlines()) == 32
+        for action in "LLLLDDDD":
+            obs, done, reward, __ = env.step(action)
+            if done:
+                break
+
+    def test_snake_render_game_over(self) -> None:
+        """Test a finished Snake board renders with its game-over overlay."""
+        env, _, renderer = realtimegym.make("Snake-32x32-v0", seed=0, render=True)
+        env.reset()
+        start = renderer.render(env)
+        done = False
+        while not done:  # run into the wall
+            _, done, _, _ = env.step("L")
+        assert renderer.render(env).get_size() == start.get_size()
+
+
+class TestSnakeVecEnvironment:
+    """Tests for the batched Snake environment."""
+
+    def test_snake_vec_matches_snake_env(self) -> None:
+        """Test every batched episode follows SnakeEnv, including auto-reset."""
+        from realtimegym.environments.snake import SnakeEnv
+        from realtimegym.environments.snake_vec import SnakeVecEnv
+
+        seeds = [1000, 1001, 5000, 5001, 8000, 8001]
+        envs = []
+        for seed in seeds:
+            env = SnakeEnv()
+            env.set_seed(seed)
+            env.reset()
+            envs.append(env)
+        vec = SnakeVecEnv(seeds)
+        vec.reset()
+        rng = np.random.RandomState(0)
+        for _ in range(250):
+            actions = [
+                env.get_possible_actions()[rng.randint(3)]
+                if rng.rand() < 0.8
+                else "LRUDS"[rng.randint(5)]
+                for env in envs
+            ]
+            planes, dones, rewards = vec.step(actions)
+            for i, env in enumerate(envs):
+                _, done, reward, __ = env.step(actions[i])
+                assert done == dones[i]
+                assert reward == rewards[i]
+                if done:
+                    env.reset()
+                assert vec.state(i) == env.state_builder()
+                assert planes[i, 1].sum() == len(env.body)
+
+
+class TestVecEnv:
+    """Test batched environments created by make_vec()."""
+
+    @pytest.mark.parametrize("backend", ["sync", "thread", "subprocess"])
+    def test_backends_match_single_envs(self, backend: str) -> None:
+        """Test every backend reproduces individually stepped environments."""
+        seeds = [0, 1, 2]
+        envs = [realtimegym.make("Snake-v1", seed=seed)[0] for seed in seeds]
+        for env in envs:
+            env.reset()
+        rng = np.random.RandomState(0)
+        with realtimegym.make_vec(
+            "Snake-v1", seeds=seeds, backend=backend, num_workers=2
+        ) as vec:
+            obs, dones = vec.reset()
+            assert len(obs) == 3
+            assert not dones.any()
+            assert vec.real_seeds == [5000, 5001, 5002]
+            for _ in range(30):
+                actions = ["LRUD"[i] for i in rng.randint(4, size=len(seeds))]
+                obs, dones, rewards, resets = vec.step(actions)
+                for i, env in enumerate(envs):
+                    expected, done, reward, _ = env.step(actions[i])
+                    if done:
+                        expected, _ = env.reset()
+                    assert dones[i] == done
+                    assert rewards[i] == reward
+                    assert obs[i]["state_string"] == expected["state_string"]
+
+    @pytest.mark.parametrize("env_id", ["Freeway-v0", "Snake-v1"])
+    def test_shared_memory_matches_tensor_envs(self, env_id: str) -> None:
+        """Test the shared-memory backend writes the TensorEnv observations."""
+        from realtimegym.wrappers import TensorEnv
+
+        seeds = [0, 1, 2]
+        envs = [TensorEnv(env_id, seed=seed) for seed in seeds]
+        for env in envs:
+            env.reset()
+        actions = envs[0].actions
+        rng = np.random.RandomState(0)
+        with realtimegym.make_vec(
+            env_id, seeds=seeds, backend="shared_memory", num_workers=2
+        ) as vec:
+            obs, dones = vec.reset()
+            assert obs.shape[0] == 3
+            assert obs.shape[1:] == envs[0].observation_space.shape
+            for _ in range(30):
+                indices = rng.randint(len(actions), size=len(seeds))
+                obs, dones, rewards, resets = vec.step([actions[i] for i in indices])
+                for i, env in enumerate(envs):
+                    _, _, done, _, info = env.step(indices[i])
+                    if done:
+                        env.reset()
+                    assert dones[i] == done
+                    assert rewards[i] == info["score"]
+                    np.testing.assert_array_equal(obs[i], env.encode())
+
+    def test_finished_episodes_restart(self) -> None:
+        """Test finished episodes are reset automatically."""
+        with realtimegym.make_vec("Freeway-v0", seeds=[0, 1]) as vec:
+            vec.reset()
+            for _ in range(100):
+                obs, dones, rewards, resets = vec.step(["S", "S"])
+            assert dones.all()
+            assert all(o["game_turn"] == 0 for o in obs)
+
+    @pytest.mark.parametrize("backend", ["sync", "subprocess"])
+    def test_restarts_replay_the_seed(self, backend: str) -> None:
+        """Test an automatic reset restarts the episode its seed began with."""
+        with realtimegym.make_vec(
+            "Freeway-v0", seeds=[0, 1], backend=backend, num_workers=2
+        ) as vec:
+            first, _ = vec.reset()
+            for _ in range(100):
+                obs, dones, rewards, resets = vec.step(["S", "S"])
+            assert dones.all()
+            for start, restart in zip(first, obs):
+                assert restart["state_string"] == start["state_string"]
+
+    def test_make_vec_rejects_bad_arguments(self) -> None:
+        """Test unknown environments, backends and action counts."""
+        with pytest.raises(ValueError):
+            realtimegym.make_vec("Unknown-v0", seeds=[0])
+        with pytest.raises(ValueError):
+            realtimegym.make_vec("Freeway-v0", seeds=[0], backend="gpu")
+        with realtimegym.make_vec("Freeway-v0", seeds=[0, 1]) as vec:
+            vec.reset()
+            with pytest.raises(ValueError):
+                vec.step(["U"])
+
+
+class TestTensorEnv:
+    """Test the tensor-observation wrapper."""
+
+    @pytest.mark.parametrize(
+        "env_id,shape,num_actions",
+        [
+            ("Freeway-v0", (2, 16, 10), 3),
+            ("Snake-v0", (4, 8, 8), 4),
+            ("Overcooked-v0", (5, 5, 26), 6),
+        ],
+    )
+    def test_spaces_and_step(
+        self, env_id: str, shape: tuple[int, ...], num_actions: int
+    ) -> None:
+        """Test observations fit the space and rewards add up to the score."""
+        from gym import spaces
+
+        from realtimegym.wrappers import TensorEnv
+
+        env = TensorEnv(env_id, seed=0)
+        assert env.observation_space.shape == shape
+        assert isinstance(env.action_space, spaces.Discrete)
+        assert env.action_space.n == num_actions
+        obs, info = env.reset()
+        assert env.observation_space.contains(obs)
+        total = info["score"]
+        for action in range(num_actions):
+            obs, reward, terminated, truncated, info = env.step(action)
+            assert env.observation_space.contains(obs) and not truncated
+            total += reward
+            assert total == info["score"]
+
+    def test_reset_replays_the_seed(self) -> None:
+        """Test a second reset() starts the same Freeway episode again."""
+        from realtimegym.wrappers import TensorEnv
+
+        env = TensorEnv("Freeway-v0", seed=0)
+        first, _ = env.reset()
+        for _ in range(5):
+            env.step(0)
+        again, _ = env.reset()
+        np.testing.assert_array_equal(again, first)
+
+    def test_freeway_occupancy_matches_solver(self) -> None:
+        """Test the Freeway traffic plane is the solver's collision table."""
+        from realtimegym.solvers.freeway import collision_table
+        from realtimegym.wrappers import TensorEnv
+
+        env = TensorEnv("Freeway-v1", seed=0)
+        obs, _ = env.reset()
+        table = collision_table(env.real_seed, horizon=16)
+        np.testing.assert_array_equal(obs[0], table[1:])
+        assert obs[1, :, 9].all() and obs[1].sum() == 16
+
+    def test_snake_planes_match_vec_env(self) -> None:
+        """Test Snake tensors match SnakeVecEnv planes."""
+        from realtimegym.environments.snake_vec import SnakeVecEnv
+        from realtimegym.wrappers import TensorEnv
+
+        env = TensorEnv("Snake-v1", seed=3)
+        obs, _ = env.reset()
+        vec = SnakeVecEnv([env.real_seed])
+        planes = vec.reset()
+        rng = np.random.RandomState(1)
+        for _ in range(40):
+            np.testing.assert_array_equal(obs, planes[0])
+            action = rng.randint(4)
+            obs, _, terminated, _, _ = env.step(action)
+            planes, _, _ = vec.step([env.actions[action]])
+            if terminated:
+                break
+
 
 class TestOvercookedEnvironment:
     """Specific tests for Overcooked environment."""
@@ -169,6 +505,74 @@ class TestOvercookedEnvironment:
         assert "game_turn" in obs and "state_string" in obs and "state" in obs
 
 
+class TestSnapshots:
+    """Test get_state()/set_state() snapshots."""
+
+    @pytest.mark.parametrize(
+        "env_id,actions",
+        [("Freeway-v2", "UDS"), ("Snake-v0", "LRUD"), ("Overcooked-v1", "UDLRIS")],
+    )
+    def test_restore_replays_identically(self, env_id: str, actions: str) -> None:
+        """Test a restored snapshot continues exactly like the original."""
+        import pickle
+
+        env, _, _ = realtimegym.make(env_id, seed=1, render=False)
+        env.reset()
+        rng = np.random.RandomState(0)
+        for _ in range(5):
+            env.step(actions[rng.randint(len(actions))])
+        snapshot = pickle.loads(pickle.dumps(env.get_state()))
+        moves = [actions[rng.randint(len(actions))] for _ in range(30)]
+
+        def play(env: Any) -> list[tuple[Any, bool, float]]:  # noqa: ANN401
+            trace = []
+            for action in moves:
+                obs, done, reward, __ = env.step(action)
+                trace.append((obs.get("state_string"), done, reward))
+                if done:
+                    break
+            return trace
+
+        expected = play(env)
+        env.set_state(snapshot)
+        assert play(env) == expected
+        fresh, _, _ = realtimegym.make(env_id, seed=1, render=False)
+        fresh.set_state(snapshot)
+        assert play(fresh) == expected
+
+
+class TestObservation:
+    """Test the lazily computed observation fields."""
+
+    @pytest.mark.parametrize("env_id", ["Freeway-v0", "Snake-v1", "Overcooked-v0"])
+    def test_fields_describe_their_turn(self, env_id: str) -> None:
+        """Test fields read after later steps still describe their own turn."""
+        import pickle
+
+        env, _, _ = realtimegym.make(env_id, seed=0, render=False)
+        obs, done = env.reset()
+        for _ in range(5):
+            expected = (env.state_string(), str(env.state_builder()))
+            new_obs, done, _, _ = env.step("U")
+            assert (obs["state_string"], str(obs["state"])) == expected
+            assert pickle.loads(pickle.dumps(obs)) == dict(obs) == obs
+            obs = new_obs
+            if done:
+                break
+
+    def test_fields_are_computed_on_demand(self) -> None:
+        """Test nothing is computed until a lazy field is read, then once."""
+        env, _, _ = realtimegym.make("Freeway-v0", seed=0, render=False)
+        calls = []
+        state_string = env.state_string
+        env.state_string = lambda: calls.append(1) or state_string()
+        obs, _ = env.reset()
+        assert isinstance(obs, dict) and "state_string" in obs and len(obs) == 3
+        assert obs["game_turn"] == 0 and calls == []
+        assert obs["state_string"] == obs.get("state_string") == state_string()
+        assert calls == [1]
+
+
 class TestSeeding:
     """Test environment seeding for reproducibility."""
 
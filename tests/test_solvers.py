@@ -0,0 +1,96 @@
+"""Tests for RealtimeGym reference solvers."""
+
+import pytest
+
+import realtimegym
+from realtimegym.environments.freeway import seed_catalog, seed_mapping
+from realtimegym.environments.snake import SnakeEnv
+from realtimegym.solvers import freeway as freeway_solver
+from realtimegym.solvers import snake as snake_solver
+
+
+class TestFreewaySolver:
+    """Test the Freeway solver and seed catalog."""
+
+    def test_legacy_seeds_lead_catalog(self) -> None:
+        """Test that the hand-picked seeds keep indices 0-7."""
+        catalog = seed_catalog()
+        for load in ["E", "M", "H"]:
+            assert catalog[load][:8] == list(seed_mapping[load].values())
+            assert len(catalog[load]) >= 1000
+            assert len(set(catalog[load])) == len(catalog[load])
+
+    def test_legacy_seeds_match_band(self) -> None:
+        """Test that the hand-picked seeds fall in their band, as BANDS notes."""
+        for load in ["E", "M", "H"]:
+            for seed in seed_mapping[load].values():
+                expected = "E" if seed == 1069 else load
+                assert freeway_solver.classify(seed)[2] == expected
+
+    def test_catalog_seeds_match_band(self) -> None:
+        """Test that generated seeds reproduce their difficulty band."""
+        catalog = seed_catalog()
+        for load in ["E", "M", "H"]:
+            for seed in catalog[load][8:12]:
+                assert freeway_solver.classify(seed)[2] == load
+
+    def test_solution_is_achievable(self) -> None:
+        """Test that the solver's action sequence crosses in the real env."""
+        actions = freeway_solver.solve(freeway_solver.collision_table(1447))
+        assert actions is not None
+        env, real_seed, _ = realtimegym.make("Freeway-v2", seed=0)
+        assert real_seed == 1447
+        env.reset()
+        for action in actions:
+            _, done, _, reset = env.step(action)
+            assert not reset
+        assert done and env.game_turn == len(actions)
+
+    def test_make_accepts_large_seeds(self) -> None:
+        """Test that make() indexes into the catalog beyond the legacy seeds."""
+        env, real_seed, _ = realtimegym.make("Freeway-v2", seed=1000)
+        assert real_seed == seed_catalog()["H"][1000]
+        obs, done = env.reset()
+        assert not done
+        with pytest.raises(ValueError):
+            realtimegym.make("Freeway-v2", seed=len(seed_catalog()["H"]))
+
+
+class TestSnakeOracle:
+    """Test the Snake lookahead oracle."""
+
+    def test_oracle_actions_are_achievable(self) -> None:
+        """Test that the cached oracle score is reached in the real env."""
+        result = snake_solver.oracle(5000)
+        env, _, _ = realtimegym.make("Snake-v1", seed=0, render=False)
+        env.reset()
+        for action in result["actions"]:
+            env.step(action)
+        assert env.reward == result["score"]
+        assert result["score"] <= result["upper_bound"]
+
+    def test_compact_state_follows_env(self) -> None:
+        """Test that the compact simulator matches SnakeEnv step by step."""
+        episode = snake_solver.Episode(1003)
+        env = SnakeEnv()
+        env.set_seed(1003)
+        env.reset()
+        state = episode.state_of(env)
+        for action in "LLDDRRRRUUUULLLLDDDRRRUU":
+            turn = env.game_turn + 1
+            before = env.reward
+            _, done, reward, __ = env.step(action)
+            state, r = episode.step(state, action, turn)
+            assert r == reward - before
+            if done:
+                assert state is None
+                break
+            assert state == episode.state_of(env)
+
+    def test_regret_is_consistent(self) -> None:
+        """Test that regret is non-negative and zero along the oracle line."""
+        actions = list(snake_solver.oracle(1001)["actions"][:10])
+        summary, table = snake_solver.evaluate(1001, actions, width=20)
+        assert (table["regret"] >= 0).all()
+        assert list(table["action"]) == actions
+        assert summary["oracle_score"] <= summary["upper_bound"]